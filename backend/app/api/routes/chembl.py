@@ -1,12 +1,29 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+import logging
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import List, Literal, Optional, Union
 from app.services.chembl_service import chembl_service
+from app.utils.instrumentation import stage_timer
+from app.utils.materialized import MaterializedView, MaterializedViews
+from app.utils.response_cache import cached_response
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 50
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 class ChEMBLRequest(BaseModel):
     pdb_id_input: str
+    image_mode: Literal["inline", "url"] = "inline"
+    # Setting limit (or passing a cursor) returns a sorted page instead of the full list
+    limit: Optional[int] = Field(None, ge=1, le=500)
+    cursor: Optional[str] = None
+    sort_by: Literal["ic50", "molecular_weight", "similarity"] = "ic50"
+    sort_order: Literal["asc", "desc"] = "asc"
+    reference_smiles: Optional[str] = None
 
 class ChEMBLResponse(BaseModel):
     molecule: str
@@ -16,39 +33,90 @@ class ChEMBLResponse(BaseModel):
     disease_pid: str
     disease_protien_name: str
     molecule_image: Optional[str] = None
+    molecule_image_url: Optional[str] = None
+    molecular_weight: Optional[float] = None
+    similarity: Optional[float] = None
+    inchikey: Optional[str] = None
+    measurement_count: Optional[int] = None
+
+class ChEMBLPageResponse(BaseModel):
+    items: List[ChEMBLResponse]
+    next_cursor: Optional[str] = None
+    total: int
+    limit: int
+    sort_by: str
+    sort_order: str
+
+_response_adapter = TypeAdapter(Union[List[ChEMBLResponse], ChEMBLPageResponse])
+
+def _serialize(result: Union[List[dict], dict]) -> bytes:
+    """Validate against the response models and encode to JSON"""
+    with stage_timer("serialize"):
+        return _response_adapter.dump_json(_response_adapter.validate_python(result))
+
+async def _build_view(target: str, image_mode: str) -> bytes:
+    """Full hit list for a hot target, validated once here instead of on every request"""
+    return _serialize(await chembl_service.fetch_bioactivity_data(target, image_mode=image_mode))
+
+# Prebuilt full-list bodies per hot target and image mode; started in the app lifespan
+chembl_views = MaterializedViews(
+    "fetch_chambl_data", _build_view, chembl_service.data_version, variants=("inline", "url")
+)
 
-@router.post("/fetch_chambl_data/", response_model=List[ChEMBLResponse])
-async def fetch_chembl_data(request: ChEMBLRequest):
+def _view_response(view: MaterializedView, http_request: Request) -> Response:
+    headers = {"ETag": view.etag, "X-Data-Version": view.version}
+    if http_request.headers.get("if-none-match") == view.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(view.body, media_type="application/json", headers=headers)
+
+@router.post("/fetch_chambl_data/", response_model=Union[List[ChEMBLResponse], ChEMBLPageResponse])
+async def fetch_chembl_data(request: ChEMBLRequest, http_request: Request):
     """Fetch ChEMBL molecular hits for a given PDB ID"""
-    
-    # ============ DEBUG STEP 1: Endpoint Hit ============
-    print(f"\n{'*'*60}")
-    print(f"[BACKEND ROUTE] /fetch_chambl_data/ ENDPOINT HIT")
-    print(f"[BACKEND ROUTE] Request received: {request.dict()}")
-    print(f"[BACKEND ROUTE] PDB ID: '{request.pdb_id_input}'")
-    print(f"{'*'*60}\n")
+    if NDJSON_MEDIA_TYPE in http_request.headers.get("accept", ""):
+        return StreamingResponse(_stream_rows(request), media_type=NDJSON_MEDIA_TYPE)
+    if request.limit is None and request.cursor is None:
+        view = chembl_views.get(request.pdb_id_input, request.image_mode)
+        if view is not None:
+            return _view_response(view, http_request)
+    return Response(await _fetch_chembl_body(request), media_type="application/json")
+
+async def _stream_rows(request: ChEMBLRequest):
+    """One JSON object per line, flushed as each molecule is ready; rows come in potency order
+    and only limit applies, since cursors and sorting need the full list"""
+    async for row in chembl_service.stream_bioactivity_data(
+        request.pdb_id_input, image_mode=request.image_mode, limit=request.limit
+    ):
+        with stage_timer("serialize"):
+            line = ChEMBLResponse.model_validate(row).model_dump_json() + "\n"
+        yield line
+
+async def _data_version(request: ChEMBLRequest) -> Optional[str]:
+    return await chembl_service.run_lookup(chembl_service.cache_version, request.pdb_id_input)
+
+# Encoding happens here rather than in FastAPI so the serialize stage is timed
+# and cache hits skip it entirely
+@cached_response("fetch_chambl_data", case_insensitive=("pdb_id_input",), version=_data_version)
+async def _fetch_chembl_body(request: ChEMBLRequest) -> bytes:
+    if request.limit is not None or request.cursor is not None:
+        try:
+            page = await chembl_service.fetch_bioactivity_page(
+                request.pdb_id_input,
+                limit=request.limit or DEFAULT_PAGE_SIZE,
+                cursor=request.cursor,
+                sort_by=request.sort_by,
+                sort_order=request.sort_order,
+                image_mode=request.image_mode,
+                reference_smiles=request.reference_smiles,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return _serialize(page)
     
     try:
-        # ============ DEBUG STEP 2: Calling Service ============
-        print(f"[BACKEND ROUTE] Calling ChEMBL service...")
-        results = await chembl_service.fetch_bioactivity_data(request.pdb_id_input)
-        
-        # ============ DEBUG STEP 3: Service Response ============
-        print(f"\n{'*'*60}")
-        print(f"[BACKEND ROUTE] Service returned successfully")
-        print(f"[BACKEND ROUTE] Number of molecules: {len(results)}")
-        print(f"[BACKEND ROUTE] Response type: {type(results)}")
-        if results:
-            print(f"[BACKEND ROUTE] First molecule IC50: {results[0].get('ic50')}")
-            has_image = results[0].get('molecule_image') is not None
-            print(f"[BACKEND ROUTE] First molecule has image: {has_image}")
-        print(f"[BACKEND ROUTE] Sending response to client...")
-        print(f"{'*'*60}\n")
-        
-        return results
-        
+        results = await chembl_service.fetch_bioactivity_data(
+            request.pdb_id_input, image_mode=request.image_mode
+        )
     except Exception as e:
-        print(f"\n[BACKEND ROUTE] ❌ ERROR: {e}")
-        print(f"[BACKEND ROUTE] Error type: {type(e).__name__}")
+        logger.error(f"/fetch_chambl_data/ failed for {request.pdb_id_input}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-
+    return _serialize(results)
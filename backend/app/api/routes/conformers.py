@@ -0,0 +1,80 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from app.services.conformers import cached_conformers, conformer_params, generate_conformers
+
+router = APIRouter()
+
+SDF_MEDIA_TYPE = "chemical/x-mdl-sdfile"
+
+class ConformerRequest(BaseModel):
+    smiles: List[str] = Field(..., min_length=1, max_length=100)
+    num_conformers: int = Field(10, ge=1, le=50)
+    random_seed: int = 42
+    # Leave out the SDF text and fetch it from sdf_url when needed
+    include_sdf: bool = True
+
+class ConformerSet(BaseModel):
+    index: int
+    smiles: str
+    valid: bool
+    inchikey: Optional[str] = None
+    key: Optional[str] = None
+    force_field: Optional[str] = None
+    energies: List[float] = []
+    converged: List[bool] = []
+    cached: bool = False
+    sdf_url: Optional[str] = None
+    sdf: Optional[str] = None
+
+class ConformerResponse(BaseModel):
+    count: int
+    embedded_count: int
+    results: List[ConformerSet]
+
+
+@router.post("/conformers/", response_model=ConformerResponse)
+async def generate_molecule_conformers(request: ConformerRequest):
+    """Energy-ranked 3D conformers (ETKDG + MMFF94) for a batch, cached by InChIKey and parameters"""
+    params = conformer_params(num_conformers=request.num_conformers, random_seed=request.random_seed)
+    records = await generate_conformers(request.smiles, params)
+    results = []
+    for index, (smiles, record) in enumerate(zip(request.smiles, records)):
+        if record is None:
+            results.append({"index": index, "smiles": smiles, "valid": False})
+            continue
+        results.append({
+            "index": index,
+            "smiles": smiles,
+            "valid": True,
+            "inchikey": record["inchikey"],
+            "key": record["key"],
+            "force_field": record["force_field"],
+            "energies": record["energies"],
+            "converged": record["converged"],
+            "cached": record["cached"],
+            "sdf_url": f"/conformers/{record['key']}.sdf",
+            "sdf": record["sdf"] if request.include_sdf else None,
+        })
+    return {
+        "count": len(results),
+        "embedded_count": sum(1 for result in results if result["valid"]),
+        "results": results,
+    }
+
+
+@router.get("/conformers/{filename}")
+async def get_conformers_sdf(filename: str, request: Request):
+    """Serve a cached conformer set as an SDF file"""
+    key, _, fmt = filename.rpartition(".")
+    if not key or fmt != "sdf":
+        raise HTTPException(status_code=404, detail="Unknown conformer format")
+    record = cached_conformers(key)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Conformers not found")
+    # Keys are derived from structure and parameters, so the content never changes
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=record["sdf"], media_type=SDF_MEDIA_TYPE, headers=headers)
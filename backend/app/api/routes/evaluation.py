@@ -1,37 +1,75 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from app.services import ml_service
 
 router = APIRouter()
 
 class EvaluationRequest(BaseModel):
     smiles: str
+    # Target whose QSAR model predicts the IC50
+    target_id: str = "1TUP"
 
 class EvaluationResponse(BaseModel):
     molecule: str
-    molecule_name: str
-    ic50: float
-    disease_name: str
+    molecule_name: Optional[str] = None
+    # QSAR prediction (µM); None when no model covers the target
+    ic50: Optional[float] = None
+    ic50_source: Optional[str] = None
+    disease_name: Optional[str] = None
     disease_pid: str
     disease_protien_name: str
     data_analysis_report: str
+    # Fetch the SDF from /conformers/{conformer_key}.sdf
+    conformer_key: Optional[str] = None
+
+class BatchEvaluationRequest(BaseModel):
+    smiles: List[str] = Field(..., min_length=1, max_length=5000)
+    target_id: Optional[str] = None
+
+class DescriptorResult(BaseModel):
+    smiles: str
+    valid: bool
+    mol_wt: Optional[float] = None
+    logp: Optional[float] = None
+    tpsa: Optional[float] = None
+    hbd: Optional[int] = None
+    hba: Optional[int] = None
+    rotatable_bonds: Optional[int] = None
+    heavy_atoms: Optional[int] = None
+    ring_count: Optional[int] = None
+    aromatic_rings: Optional[int] = None
+    fraction_csp3: Optional[float] = None
+    lipinski_violations: int
+    lipinski_pass: bool
+    veber_pass: bool
+    lead_like: bool
+    predicted_ic50: Optional[float] = None
+
+class BatchEvaluationResponse(BaseModel):
+    count: int
+    valid_count: int
+    results: List[DescriptorResult]
 
 @router.post("/find_data_evaluation_report/", response_model=List[EvaluationResponse])
 async def find_evaluation_report(request: EvaluationRequest):
     """Get evaluation report for a molecule"""
     try:
-        # Mock implementation - replace with actual evaluation logic
-        mock_results = [
-            {
-                "molecule": request.smiles,
-                "molecule_name": "Compound_A",
-                "ic50": 0.32,
-                "disease_name": "Cancer",
-                "disease_pid": "1TUP",
-                "disease_protien_name": "TP53",
-                "data_analysis_report": "Detailed analysis: This compound shows promising binding affinity with the target protein. Molecular weight: 180.16 g/mol. LogP: 1.31. TPSA: 37.3. The compound demonstrates favorable pharmacokinetic properties with good oral bioavailability potential."
-            }
-        ]
-        return mock_results
+        return [await ml_service.evaluate_molecule(request.smiles, request.target_id)]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/evaluate_batch/", response_model=BatchEvaluationResponse)
+async def evaluate_batch(request: BatchEvaluationRequest):
+    """Compute descriptors and drug-likeness rules for a batch of molecules"""
+    try:
+        results = await ml_service.evaluate_batch(request.smiles, request.target_id)
+        return {
+            "count": len(results),
+            "valid_count": sum(1 for row in results if row["valid"]),
+            "results": results,
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,85 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from app.utils.image_gen import DEPICTION_MEDIA_TYPES, depict_batch, depiction_by_key, parse_size
+
+router = APIRouter()
+
+class DepictBatchRequest(BaseModel):
+    smiles: List[str] = Field(..., min_length=1, max_length=200)
+    layout: Literal["grid", "sprite"] = "grid"
+    format: Literal["png", "svg"] = "png"
+    mols_per_row: int = Field(5, ge=1, le=20)
+    sub_image_size: int = Field(200, ge=50, le=600)
+    # Grid layout only; one caption per SMILES
+    legends: Optional[List[str]] = None
+
+class DepictionCell(BaseModel):
+    index: int
+    smiles: str
+    x: int
+    y: int
+    width: int
+    height: int
+    valid: bool
+
+class DepictBatchResponse(BaseModel):
+    image: str
+    media_type: str
+    layout: str
+    width: int
+    height: int
+    cells: List[DepictionCell]
+
+# Depictions are content-addressed, so a URL never changes meaning
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison is what RFC 9110 prescribes for If-None-Match
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+@router.get("/molecule_image/{filename}")
+async def get_molecule_image(
+    filename: str, request: Request, smiles: Optional[str] = None, size: Optional[str] = None
+):
+    """Serve a molecule depiction as raw PNG or SVG bytes, rendering it from the URL's source if needed"""
+    key, _, fmt = filename.rpartition(".")
+    if not key or fmt not in DEPICTION_MEDIA_TYPES:
+        raise HTTPException(status_code=404, detail="Unknown image format")
+
+    etag = f'"{key}-{fmt}"'
+    headers = {"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        data = await depiction_by_key(key, fmt, smiles, parse_size(size) if size else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if data is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    return Response(content=data, media_type=DEPICTION_MEDIA_TYPES[fmt], headers=headers)
+
+
+@router.post("/depict_batch/", response_model=DepictBatchResponse)
+async def depict_molecule_batch(request: DepictBatchRequest):
+    """Render a whole page of molecules as one grid image or sprite sheet"""
+    try:
+        return await depict_batch(
+            request.smiles,
+            layout=request.layout,
+            fmt=request.format,
+            mols_per_row=request.mols_per_row,
+            sub_size=(request.sub_image_size, request.sub_image_size),
+            legends=request.legends,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,72 @@
+import json
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Any, Literal, Optional
+from app.services.job_queue import job_queue
+import app.services.pipeline_service  # noqa: F401  registers the pipelines
+
+router = APIRouter()
+
+class JobRequest(BaseModel):
+    kind: Literal["discovery"] = "discovery"
+    disease: str
+    target_id: Optional[str] = None
+    evaluate_top: int = Field(5, ge=0, le=100)
+
+class JobSubmitted(BaseModel):
+    job_id: str
+    status: str
+
+class JobStatus(BaseModel):
+    job_id: str
+    kind: str
+    status: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+
+@router.post("/jobs", response_model=JobSubmitted, status_code=202)
+async def submit_job(request: JobRequest):
+    """Queue a long-running pipeline and return its id immediately"""
+    params = request.model_dump(exclude={"kind"})
+    try:
+        job_id = await job_queue.submit(request.kind, params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"job_id": job_id, "status": "queued"}
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """Current status of a job, including its stored result once finished"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {**job, "job_id": job["id"]}
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """Stream stage progress as Server-Sent Events; reconnects resume from Last-Event-ID"""
+    if await job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    try:
+        after_id = int(request.headers.get("last-event-id", "0"))
+    except ValueError:
+        after_id = 0
+
+    async def events():
+        async for event in job_queue.stream_events(job_id, after_id):
+            if event is None:
+                # SSE comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            payload = {key: event[key] for key in ("stage", "progress", "message", "data", "created_at")}
+            yield f"id: {event['id']}\nevent: {event['stage']}\ndata: {json.dumps(payload)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
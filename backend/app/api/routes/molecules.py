@@ -1,14 +1,34 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Union
+from app.services import molecule_service
+from app.services.chembl_service import chembl_service
+from app.services.ranking import page_query_id, rank_page
+from app.utils.image_gen import smiles_to_base64_images, smiles_to_image_url
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.response_cache import cached_response
 
 router = APIRouter()
 
-# Simple placeholder image (1x1 white pixel PNG in base64)
+DEFAULT_PAGE_SIZE = 50
+
+# Simple placeholder image (1x1 white pixel PNG in base64), used when a structure fails to render
 PLACEHOLDER_IMAGE = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
 
 class MoleculeRequest(BaseModel):
     disease: str
+    # Defaults to the disease's top-ranked target
+    target_id: Optional[str] = None
+    top_k: Optional[int] = Field(None, ge=1, le=200)
+    # Same seed, same molecules
+    random_seed: Optional[int] = None
+    image_mode: Literal["inline", "url"] = "inline"
+    # Setting limit (or passing a cursor) returns a sorted page instead of the full list
+    limit: Optional[int] = Field(None, ge=1, le=500)
+    cursor: Optional[str] = None
+    sort_by: Literal["ic50", "molecular_weight", "similarity"] = "ic50"
+    sort_order: Literal["asc", "desc"] = "asc"
+    reference_smiles: Optional[str] = None
 
 class MoleculeResponse(BaseModel):
     molecule: str
@@ -19,54 +39,73 @@ class MoleculeResponse(BaseModel):
     disease_pid: str
     disease_protien_name: str
     molecule_image: Optional[str] = None
+    molecule_image_url: Optional[str] = None
+    molecular_weight: Optional[float] = None
+    similarity: Optional[float] = None
+    parent_smiles: Optional[str] = None
+    transformations: List[str] = []
+    qed: Optional[float] = None
+    score: Optional[float] = None
+    inchikey: Optional[str] = None
+    ic50_source: Optional[str] = None
+
+class MoleculePageResponse(BaseModel):
+    items: List[MoleculeResponse]
+    next_cursor: Optional[str] = None
+    total: int
+    limit: int
+    sort_by: str
+    sort_order: str
+
+def _paginate(results: List[dict], request: MoleculeRequest) -> dict:
+    """Sort server-side and cut one page; only page rows go on to be depicted"""
+    limit = request.limit or DEFAULT_PAGE_SIZE
+    query_id = page_query_id(
+        request.disease, request.target_id, str(request.top_k), str(request.random_seed),
+        request.sort_by, request.sort_order, request.reference_smiles,
+    )
+    offset = int(decode_cursor(request.cursor, query_id).get("offset", 0)) if request.cursor else 0
+    items = rank_page(
+        results, request.sort_by, request.sort_order == "desc", offset, limit,
+        request.reference_smiles, smiles_field="smile_string",
+    )
+    has_more = offset + limit < len(results)
+    return {
+        "items": items,
+        "next_cursor": encode_cursor(query_id, {"offset": offset + limit}) if has_more else None,
+        "total": len(results),
+        "limit": limit,
+        "sort_by": request.sort_by,
+        "sort_order": request.sort_order,
+    }
+
+async def _data_version(request: MoleculeRequest) -> Optional[str]:
+    target_id = await molecule_service.seed_target(request.disease, request.target_id)
+    if target_id is None:
+        return "no-target"
+    return await chembl_service.run_lookup(chembl_service.cache_version, target_id)
 
-@router.post("/alternate_molecule_generator/", response_model=List[MoleculeResponse])
+@router.post("/alternate_molecule_generator/", response_model=Union[List[MoleculeResponse], MoleculePageResponse])
+@cached_response("alternate_molecule_generator", version=_data_version)
 async def generate_alternate_molecules(request: MoleculeRequest):
     """Generate alternate molecules for a given disease"""
     try:
-        # Mock implementation - replace with actual ML-based generation
-        mock_results = [
-            {
-                "molecule": "CC(=O)Oc1ccccc1C(=O)O",
-                "molecule_name": "Aspirin_Analog_1",
-                "smile_string": "CC(=O)Oc1ccccc1C(=O)O",
-                "ic50": 0.35,
-                "disease_name": request.disease,
-                "disease_pid": "1TUP",
-                "disease_protien_name": "TP53",
-                "molecule_image": PLACEHOLDER_IMAGE
-            },
-            {
-                "molecule": "CCO",
-                "molecule_name": "Compound_A",
-                "smile_string": "CCO",
-                "ic50": 0.45,
-                "disease_name": request.disease,
-                "disease_pid": "2ABC",
-                "disease_protien_name": "TP53",
-                "molecule_image": PLACEHOLDER_IMAGE
-            },
-            {
-                "molecule": "CC(=O)O",
-                "molecule_name": "Compound_B",
-                "smile_string": "CC(=O)O",
-                "ic50": 0.52,
-                "disease_name": request.disease,
-                "disease_pid": "3DEF",
-                "disease_protien_name": "TP53",
-                "molecule_image": PLACEHOLDER_IMAGE
-            },
-            {
-                "molecule": "c1ccccc1",
-                "molecule_name": "Benzene_Derivative",
-                "smile_string": "c1ccccc1",
-                "ic50": 0.78,
-                "disease_name": request.disease,
-                "disease_pid": "4GHI",
-                "disease_protien_name": "TP53",
-                "molecule_image": PLACEHOLDER_IMAGE
-            }
-        ]
-        return mock_results
+        results = await molecule_service.generate_alternate_molecules(
+            request.disease, request.target_id, request.top_k, request.random_seed
+        )
+        page = None
+        if request.limit is not None or request.cursor is not None:
+            page = _paginate(results, request)
+            results = page["items"]
+        if request.image_mode == "url":
+            for result in results:
+                result["molecule_image_url"] = smiles_to_image_url(result["smile_string"])
+        else:
+            images = await smiles_to_base64_images([result["smile_string"] for result in results])
+            for result, image in zip(results, images):
+                result["molecule_image"] = image or PLACEHOLDER_IMAGE
+        return page or results
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
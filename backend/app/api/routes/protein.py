@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
+from app.services.protein_service import find_target_proteins
+from app.utils.response_cache import cached_response
 
 router = APIRouter()
 
@@ -12,20 +14,16 @@ class ProteinResponse(BaseModel):
     protien_id: str
     percentage_contro: float
     Associated_pathway: str
+    target_symbol: Optional[str] = None
+    matched_disease: Optional[str] = None
+    match_score: Optional[float] = None
+    pathways: List[str] = []
 
 @router.post("/find_protien/", response_model=List[ProteinResponse])
+@cached_response("find_protien", case_insensitive=("disease",))
 async def find_protein(request: ProteinRequest):
     """Find target proteins for a given disease"""
     try:
-        # Mock implementation - replace with actual logic
-        mock_results = [
-            {
-                "disease_protien": "TP53 (Tumor Protein P53)",
-                "protien_id": "1TUP",
-                "percentage_contro": 0.68,
-                "Associated_pathway": "p53 ras"
-            }
-        ]
-        return mock_results
+        return await find_target_proteins(request.disease)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,68 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional
+from app.services.chembl_service import chembl_service
+from app.services.screening import screen_targets
+from app.utils.response_cache import cached_response
+
+router = APIRouter()
+
+class ScreenBatchRequest(BaseModel):
+    target_ids: List[str] = Field(..., min_length=1, max_length=20)
+    limit: int = Field(50, ge=1, le=500)
+    cursor: Optional[str] = None
+    sort_by: Literal["potency", "selectivity", "coverage"] = "potency"
+    image_mode: Literal["inline", "url"] = "inline"
+    # Most potent actives taken from each target before merging
+    per_target_limit: Optional[int] = Field(None, ge=1, le=5000)
+
+class ScreenedTarget(BaseModel):
+    target_id: str
+    protein_name: str
+    compounds: int
+
+class ScreenedCompound(BaseModel):
+    molecule: str
+    canonical_smiles: str
+    name: Optional[str] = None
+    inchikey: Optional[str] = None
+    best_target: str
+    best_ic50: float
+    best_pic50: float
+    mean_pic50: float
+    selectivity: Optional[float] = None
+    targets_measured: int
+    ic50_by_target: Dict[str, Optional[float]]
+    molecule_image: Optional[str] = None
+    molecule_image_url: Optional[str] = None
+
+class ScreenBatchResponse(BaseModel):
+    targets: List[ScreenedTarget]
+    # Requested identifiers that match no known target; they add no compounds
+    unresolved_targets: List[str] = []
+    items: List[ScreenedCompound]
+    next_cursor: Optional[str] = None
+    total: int
+    limit: int
+    sort_by: str
+
+async def _data_version(request: ScreenBatchRequest) -> Optional[str]:
+    return await chembl_service.run_lookup(chembl_service.cache_version, *request.target_ids)
+
+@router.post("/screen_batch/", response_model=ScreenBatchResponse)
+@cached_response("screen_batch", case_insensitive=("target_ids",), version=_data_version)
+async def screen_batch(request: ScreenBatchRequest):
+    """Rank the compounds of several targets together, with a cross-target potency and selectivity matrix"""
+    try:
+        return await screen_targets(
+            request.target_ids,
+            limit=request.limit,
+            cursor=request.cursor,
+            sort_by=request.sort_by,
+            image_mode=request.image_mode,
+            per_target_limit=request.per_target_limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
@@ -0,0 +1,31 @@
+import asyncio
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from app.services.similarity_index import get_similarity_index
+
+router = APIRouter()
+
+class SimilarityRequest(BaseModel):
+    smiles: str
+    k: int = Field(10, ge=1, le=500)
+    threshold: float = Field(0.0, ge=0.0, le=1.0)
+
+class SimilarMolecule(BaseModel):
+    smiles: str
+    name: Optional[str] = None
+    ic50: Optional[float] = None
+    target: Optional[str] = None
+    similarity: float
+
+@router.post("/similar_molecules/", response_model=List[SimilarMolecule])
+async def find_similar_molecules(request: SimilarityRequest):
+    """Find the stored compounds most similar to a query structure"""
+    try:
+        index = await get_similarity_index()
+        # NumPy releases the GIL while scanning, so a thread keeps the event loop free
+        return await asyncio.to_thread(index.search, request.smiles, request.k, request.threshold)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
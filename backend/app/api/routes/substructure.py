@@ -0,0 +1,29 @@
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Literal
+from app.services.substructure_search import parse_query, search_substructure
+
+router = APIRouter()
+
+class SubstructureRequest(BaseModel):
+    pattern: str
+    pattern_type: Literal["smarts", "smiles"] = "smarts"
+    max_results: int = Field(100, ge=1, le=10000)
+
+@router.post("/substructure_search/")
+async def substructure_search(request: SubstructureRequest):
+    """Stream compounds containing a SMARTS/SMILES pattern as NDJSON, ending with a summary line"""
+    try:
+        # Reject bad patterns before the 200 status line goes out
+        await asyncio.to_thread(parse_query, request.pattern, request.pattern_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def lines():
+        async for record in search_substructure(request.pattern, request.pattern_type, request.max_results):
+            yield json.dumps(record) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
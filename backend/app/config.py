@@ -7,6 +7,78 @@ class Settings(BaseSettings):
     database_url: str = ""
     chembl_api_url: str = "https://www.ebi.ac.uk/chembl/api/data"
     allowed_origins: str = "http://localhost:3000"
+
+    # ChEMBL compound store lives at database_url (e.g. sqlite:///./data/chembl.db);
+    # leave it empty to serve MOLECULE_DATABASE only
+    max_hits_per_target: int = 100
+    # Rows considered when sorting by something other than potency
+    max_sort_candidates: int = 5000
+
+    # ChEMBL web API fallback for targets missing from the store, the table and
+    # MOLECULE_DATABASE. Responses are kept in SQLite (empty path disables it)
+    # and revalidated with ChEMBL once older than chembl_cache_max_age seconds
+    chembl_live_fallback: bool = True
+    chembl_cache_path: str = "data/chembl_http.db"
+    chembl_cache_max_age: float = 86400.0
+    chembl_http_concurrency: int = 8
+    chembl_http_timeout: float = 30.0
+    chembl_http_retries: int = 3
+    # Activities fetched per target, and how long a request waits for them before serving DEFAULT
+    chembl_max_records: int = 2000
+    chembl_fallback_timeout: float = 15.0
+
+    # Molecule depiction cache
+    depiction_cache_size: int = 2048
+    depiction_cache_dir: str = ""  # empty disables the on-disk tier
+
+    # Columnar compound table (scripts/build_compound_table.py), memory-mapped and
+    # shared by every worker; when set it serves lookups ahead of the store
+    compound_table_path: str = ""
+
+    # Prebuilt fingerprint index (scripts/build_similarity_index.py); empty indexes MOLECULE_DATABASE
+    similarity_index_dir: str = ""
+
+    # Disease-target associations: serialized index, or a TSV to build it from
+    disease_index_path: str = ""
+    disease_associations_tsv: str = ""
+
+    # Per-route response cache for identical disease/target queries; 0 disables it
+    response_cache_size: int = 256
+    response_cache_ttl: float = 300.0
+
+    # Targets whose full /fetch_chambl_data/ responses are prebuilt at startup,
+    # and how often (seconds) their data version is checked; 0 never refreshes
+    materialized_targets: str = "TP53,EGFR,VEGFR2,HER2,BRAF"
+    materialize_interval: float = 60.0
+
+    # Instrumentation: latency histograms at /metrics, and the fraction of
+    # requests whose structured debug events are logged (0 turns logging off)
+    metrics_enabled: bool = True
+    debug_sample_rate: float = 0.0
+
+    # Analog generation: results kept, seeds used, and the per-request budget
+    analog_top_k: int = 20
+    analog_seed_count: int = 12
+    analog_time_budget: float = 5.0
+    analog_max_candidates: int = 5000
+    analog_random_seed: int = 0
+
+    # 3D conformers: cache entries in memory, files on disk (empty keeps them in
+    # memory only) and RDKit threads per embedding (0 splits the cores across pool workers)
+    conformer_cache_size: int = 512
+    conformer_cache_dir: str = "data/conformers"
+    conformer_threads: int = 0
+
+    # QSAR models: saved per target in this directory (empty keeps them in memory only)
+    qsar_model_dir: str = ""
+    qsar_cache_size: int = 32
+
+    # Background jobs: SQLite queue file and concurrently running jobs
+    job_store_path: str = "data/jobs.db"
+    job_workers: int = 2
+
+    # Worker processes for CPU-bound RDKit work; 0 runs it inline
+    compute_pool_workers: int = 2
     
     class Config:
         env_file = ".env"
@@ -1,11 +1,60 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes import protein, chembl, molecules, evaluation
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.api.routes import protein, chembl, molecules, evaluation, images, similarity, substructure, jobs, conformers, screening
+from app.config import settings
+from app.services.chembl_client import chembl_client
+from app.services.chembl_service import chembl_service
+from app.services.compound_table import load_compound_table
+from app.services.conformers import conformer_cache
+from app.services.disease_index import load_disease_index
+from app.services.job_queue import job_queue
+from app.services.similarity_index import get_similarity_index
+from app.services.substructure_search import get_substructure_index
+from app.utils.compute_pool import start_compute_pool, shutdown_compute_pool
+from app.utils.image_gen import depiction_cache
+from app.utils.instrumentation import MetricsMiddleware, render_metrics
+from app.utils.lazy_imports import imported_modules
+from app.utils.readiness import readiness
+from app.utils.response_cache import response_cache_stats
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_compute_pool(settings.compute_pool_workers)
+    await job_queue.start(settings.job_workers)
+    # Heavy warm-up runs in the background so the server takes requests right
+    # away; /ready reports when it is done. Requests that arrive earlier load
+    # what they need on demand.
+    readiness.start("disease_index", lambda: asyncio.to_thread(load_disease_index))
+    readiness.start("compound_table", lambda: asyncio.to_thread(load_compound_table))
+    # Render the built-in structures up front so the first users don't pay for it
+    readiness.start("depiction_cache", chembl_service.warm_depiction_cache)
+    # Finished response bodies for the hottest targets, kept current in the background
+    readiness.start(
+        "materialized_responses",
+        lambda: chembl.chembl_views.start(settings.materialized_targets.split(","), settings.materialize_interval),
+        after=("depiction_cache",),
+    )
+    readiness.start("similarity_index", get_similarity_index)
+    readiness.start("substructure_index", get_substructure_index, after=("similarity_index",))
+    try:
+        yield
+    finally:
+        await readiness.stop()
+        await job_queue.stop()
+        await chembl.chembl_views.stop()
+        await chembl_client.close()
+        shutdown_compute_pool()
+
 
 app = FastAPI(
     title="AushadhiAI API",
     description="Drug discovery platform backend",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration for frontend
@@ -17,11 +66,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(protein.router, tags=["Protein"])
 app.include_router(chembl.router, tags=["ChEMBL"])
 app.include_router(molecules.router, tags=["Molecules"])
 app.include_router(evaluation.router, tags=["Evaluation"])
+app.include_router(images.router, tags=["Images"])
+app.include_router(similarity.router, tags=["Similarity"])
+app.include_router(substructure.router, tags=["Similarity"])
+app.include_router(jobs.router, tags=["Jobs"])
+app.include_router(conformers.router, tags=["Conformers"])
+app.include_router(screening.router, tags=["ChEMBL"])
 
 @app.get("/")
 async def root():
@@ -30,3 +87,30 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/ready")
+async def ready():
+    """Warm-up state of each background-loaded component; 503 until all of them are ready"""
+    return JSONResponse(
+        {"ready": readiness.ready, "components": readiness.status(), "imports": imported_modules()},
+        status_code=200 if readiness.ready else 503,
+    )
+
+@app.get("/cache_stats")
+async def cache_stats():
+    """Hit rates and coalesced-request counts for the response, depiction and ChEMBL HTTP caches"""
+    return {
+        "responses": response_cache_stats(),
+        "depictions": depiction_cache.stats(),
+        "materialized": chembl.chembl_views.stats(),
+        "conformers": conformer_cache.stats(),
+        "chembl_http": chembl_client.stats(),
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus exposition of per-route and per-stage latency and cache counters"""
+    return PlainTextResponse(
+        render_metrics(response_cache_stats(), depiction_cache.stats()),
+        media_type="text/plain; version=0.0.4",
+    )
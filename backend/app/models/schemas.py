@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
 
 
 # ============== Protein Schemas ==============
@@ -12,12 +12,23 @@ class ProteinResponse(BaseModel):
     protien_id: str
     percentage_contro: float
     Associated_pathway: str
+    target_symbol: Optional[str] = None
+    matched_disease: Optional[str] = None
+    match_score: Optional[float] = None
+    pathways: List[str] = []
 
 
 # ============== ChEMBL Schemas ==============
 
 class ChEMBLRequest(BaseModel):
     pdb_id_input: str
+    image_mode: Literal["inline", "url"] = "inline"
+    # Setting limit (or passing a cursor) returns a sorted page instead of the full list
+    limit: Optional[int] = Field(None, ge=1, le=500)
+    cursor: Optional[str] = None
+    sort_by: Literal["ic50", "molecular_weight", "similarity"] = "ic50"
+    sort_order: Literal["asc", "desc"] = "asc"
+    reference_smiles: Optional[str] = None
 
 class ChEMBLResponse(BaseModel):
     molecule: str
@@ -27,12 +38,35 @@ class ChEMBLResponse(BaseModel):
     disease_pid: str
     disease_protien_name: str
     molecule_image: Optional[str] = None
+    molecule_image_url: Optional[str] = None
+    molecular_weight: Optional[float] = None
+    similarity: Optional[float] = None
+    inchikey: Optional[str] = None
+    measurement_count: Optional[int] = None
+
+class ChEMBLPageResponse(BaseModel):
+    items: List[ChEMBLResponse]
+    next_cursor: Optional[str] = None
+    total: int
+    limit: int
+    sort_by: str
+    sort_order: str
 
 
 # ============== Molecule Schemas ==============
 
 class MoleculeRequest(BaseModel):
     disease: str
+    target_id: Optional[str] = None
+    top_k: Optional[int] = Field(None, ge=1, le=200)
+    random_seed: Optional[int] = None
+    image_mode: Literal["inline", "url"] = "inline"
+    # Setting limit (or passing a cursor) returns a sorted page instead of the full list
+    limit: Optional[int] = Field(None, ge=1, le=500)
+    cursor: Optional[str] = None
+    sort_by: Literal["ic50", "molecular_weight", "similarity"] = "ic50"
+    sort_order: Literal["asc", "desc"] = "asc"
+    reference_smiles: Optional[str] = None
 
 class MoleculeResponse(BaseModel):
     molecule: str
@@ -43,18 +77,204 @@ class MoleculeResponse(BaseModel):
     disease_pid: str
     disease_protien_name: str
     molecule_image: Optional[str] = None
+    molecule_image_url: Optional[str] = None
+    molecular_weight: Optional[float] = None
+    similarity: Optional[float] = None
+    parent_smiles: Optional[str] = None
+    transformations: List[str] = []
+    qed: Optional[float] = None
+    score: Optional[float] = None
+    inchikey: Optional[str] = None
+    ic50_source: Optional[str] = None
+
+class MoleculePageResponse(BaseModel):
+    items: List[MoleculeResponse]
+    next_cursor: Optional[str] = None
+    total: int
+    limit: int
+    sort_by: str
+    sort_order: str
 
 
 # ============== Evaluation Schemas ==============
 
 class EvaluationRequest(BaseModel):
     smiles: str
+    target_id: str = "1TUP"
 
 class EvaluationResponse(BaseModel):
     molecule: str
-    molecule_name: str
-    ic50: float
-    disease_name: str
+    molecule_name: Optional[str] = None
+    # QSAR prediction (µM); None when no model covers the target
+    ic50: Optional[float] = None
+    ic50_source: Optional[str] = None
+    disease_name: Optional[str] = None
     disease_pid: str
     disease_protien_name: str
     data_analysis_report: str
+    conformer_key: Optional[str] = None
+
+class BatchEvaluationRequest(BaseModel):
+    smiles: List[str] = Field(..., min_length=1, max_length=5000)
+    target_id: Optional[str] = None
+
+class DescriptorResult(BaseModel):
+    smiles: str
+    valid: bool
+    mol_wt: Optional[float] = None
+    logp: Optional[float] = None
+    tpsa: Optional[float] = None
+    hbd: Optional[int] = None
+    hba: Optional[int] = None
+    rotatable_bonds: Optional[int] = None
+    heavy_atoms: Optional[int] = None
+    ring_count: Optional[int] = None
+    aromatic_rings: Optional[int] = None
+    fraction_csp3: Optional[float] = None
+    lipinski_violations: int
+    lipinski_pass: bool
+    veber_pass: bool
+    lead_like: bool
+    predicted_ic50: Optional[float] = None
+
+class BatchEvaluationResponse(BaseModel):
+    count: int
+    valid_count: int
+    results: List[DescriptorResult]
+
+
+# ============== Image Schemas ==============
+
+class DepictBatchRequest(BaseModel):
+    smiles: List[str] = Field(..., min_length=1, max_length=200)
+    layout: Literal["grid", "sprite"] = "grid"
+    format: Literal["png", "svg"] = "png"
+    mols_per_row: int = Field(5, ge=1, le=20)
+    sub_image_size: int = Field(200, ge=50, le=600)
+    legends: Optional[List[str]] = None
+
+class DepictionCell(BaseModel):
+    index: int
+    smiles: str
+    x: int
+    y: int
+    width: int
+    height: int
+    valid: bool
+
+class DepictBatchResponse(BaseModel):
+    image: str
+    media_type: str
+    layout: str
+    width: int
+    height: int
+    cells: List[DepictionCell]
+
+
+# ============== Screening Schemas ==============
+
+class ScreenBatchRequest(BaseModel):
+    target_ids: List[str] = Field(..., min_length=1, max_length=20)
+    limit: int = Field(50, ge=1, le=500)
+    cursor: Optional[str] = None
+    sort_by: Literal["potency", "selectivity", "coverage"] = "potency"
+    image_mode: Literal["inline", "url"] = "inline"
+    per_target_limit: Optional[int] = Field(None, ge=1, le=5000)
+
+class ScreenedTarget(BaseModel):
+    target_id: str
+    protein_name: str
+    compounds: int
+
+class ScreenedCompound(BaseModel):
+    molecule: str
+    canonical_smiles: str
+    name: Optional[str] = None
+    inchikey: Optional[str] = None
+    best_target: str
+    best_ic50: float
+    best_pic50: float
+    mean_pic50: float
+    selectivity: Optional[float] = None
+    targets_measured: int
+    ic50_by_target: Dict[str, Optional[float]]
+    molecule_image: Optional[str] = None
+    molecule_image_url: Optional[str] = None
+
+class ScreenBatchResponse(BaseModel):
+    targets: List[ScreenedTarget]
+    items: List[ScreenedCompound]
+    next_cursor: Optional[str] = None
+    total: int
+    limit: int
+    sort_by: str
+
+
+# ============== Conformer Schemas ==============
+
+class ConformerRequest(BaseModel):
+    smiles: List[str] = Field(..., min_length=1, max_length=100)
+    num_conformers: int = Field(10, ge=1, le=50)
+    random_seed: int = 42
+    include_sdf: bool = True
+
+class ConformerSet(BaseModel):
+    index: int
+    smiles: str
+    valid: bool
+    inchikey: Optional[str] = None
+    key: Optional[str] = None
+    force_field: Optional[str] = None
+    energies: List[float] = []
+    converged: List[bool] = []
+    cached: bool = False
+    sdf_url: Optional[str] = None
+    sdf: Optional[str] = None
+
+class ConformerResponse(BaseModel):
+    count: int
+    embedded_count: int
+    results: List[ConformerSet]
+
+
+# ============== Similarity Schemas ==============
+
+class SimilarityRequest(BaseModel):
+    smiles: str
+    k: int = Field(10, ge=1, le=500)
+    threshold: float = Field(0.0, ge=0.0, le=1.0)
+
+class SubstructureRequest(BaseModel):
+    pattern: str
+    pattern_type: Literal["smarts", "smiles"] = "smarts"
+    max_results: int = Field(100, ge=1, le=10000)
+
+class SimilarMolecule(BaseModel):
+    smiles: str
+    name: Optional[str] = None
+    ic50: Optional[float] = None
+    target: Optional[str] = None
+    similarity: float
+
+
+# ============== Job Schemas ==============
+
+class JobRequest(BaseModel):
+    kind: Literal["discovery"] = "discovery"
+    disease: str
+    target_id: Optional[str] = None
+    evaluate_top: int = Field(5, ge=0, le=100)
+
+class JobSubmitted(BaseModel):
+    job_id: str
+    status: str
+
+class JobStatus(BaseModel):
+    job_id: str
+    kind: str
+    status: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+import asyncio
+import heapq
+import logging
+import random
+import time
+
+from app.utils import compute_pool
+from app.utils.descriptors import DESCRIPTOR_COLUMNS, mol_descriptor_row
+from app.utils.lazy_imports import lazy_module
+
+Chem = lazy_module("rdkit.Chem")
+DataStructs = lazy_module("rdkit.DataStructs")
+AllChem = lazy_module("rdkit.Chem.AllChem")
+QED = lazy_module("rdkit.Chem.QED")
+
+logger = logging.getLogger(__name__)
+
+# Matched-molecular-pair style single-site edits, written as reaction SMARTS
+TRANSFORMATIONS = [
+    ("methyl_to_trifluoromethyl", "[CH3:1][c:2]>>FC(F)(F)[c:2]"),
+    ("methoxy_to_hydroxy", "[CH3][O:1][c:2]>>[O:1][c:2]"),
+    ("hydroxy_to_methoxy", "[OH1:1][c:2]>>C[O:1][c:2]"),
+    ("acid_to_methyl_ester", "[C:1](=[O:2])[OH1]>>[C:1](=[O:2])OC"),
+    ("acid_to_tetrazole", "[c,C:1][CX3](=O)[OH1]>>[*:1]c1nn[nH]n1"),
+    ("ester_to_amide", "[C:1](=[O:2])O[CH3]>>[C:1](=[O:2])N"),
+    ("amide_n_methylation", "[C:1](=[O:2])[NH2:3]>>[C:1](=[O:2])[N:3]C"),
+    ("fluoro_to_chloro", "[c:1]F>>[c:1]Cl"),
+    ("chloro_to_fluoro", "[c:1]Cl>>[c:1]F"),
+    ("chloro_to_nitrile", "[c:1]Cl>>[c:1]C#N"),
+    ("ring_carbon_to_nitrogen", "[cH;r6:1]>>[n:1]"),
+    ("ethyl_to_cyclopropyl", "[CH2:1][CH3]>>[C:1]1CC1"),
+]
+
+# Substituents tried at every aromatic C-H (fragment replacement of a hydrogen)
+FRAGMENTS = [
+    ("F", "F"),
+    ("Cl", "Cl"),
+    ("methyl", "C"),
+    ("methoxy", "OC"),
+    ("nitrile", "C#N"),
+    ("trifluoromethyl", "C(F)(F)F"),
+    ("amino", "N"),
+    ("hydroxy", "O"),
+]
+
+# Products of one round that are expanded again in the next
+BEAM_WIDTH = 8
+MAX_DEPTH = 2
+# Analogs closer than this are effectively the seed; farther ones lose the seed's activity
+MIN_SIMILARITY = 0.35
+MAX_SIMILARITY = 0.999
+
+_MOL_WT = DESCRIPTOR_COLUMNS.index("mol_wt")
+_LOGP = DESCRIPTOR_COLUMNS.index("logp")
+_TPSA = DESCRIPTOR_COLUMNS.index("tpsa")
+_HBD = DESCRIPTOR_COLUMNS.index("hbd")
+_HBA = DESCRIPTOR_COLUMNS.index("hba")
+_ROTATABLE = DESCRIPTOR_COLUMNS.index("rotatable_bonds")
+
+
+@lru_cache(maxsize=1)
+def _reactions() -> Tuple[Tuple[str, AllChem.ChemicalReaction], ...]:
+    """Compiled once per worker process"""
+    smarts = TRANSFORMATIONS + [
+        (f"add_{name}", f"[cH:1]>>[c:1]{fragment}") for name, fragment in FRAGMENTS
+    ]
+    return tuple((name, AllChem.ReactionFromSmarts(rule)) for name, rule in smarts)
+
+
+def _fingerprint(mol: Chem.Mol):
+    return AllChem.GetMorganFingerprintAsBitVect(mol, 2, nBits=2048)
+
+
+def _passes_filters(row: Tuple[float, ...]) -> bool:
+    """Lipinski (one violation tolerated) and Veber, as in apply_rule_filters"""
+    violations = (
+        (row[_MOL_WT] > 500) + (row[_LOGP] > 5) + (row[_HBD] > 5) + (row[_HBA] > 10)
+    )
+    return violations <= 1 and row[_ROTATABLE] <= 10 and row[_TPSA] <= 140
+
+
+def enumerate_seed(
+    seed_smiles: str,
+    reference_smiles: List[str],
+    random_seed: int,
+    k: int,
+    max_candidates: int,
+    deadline: float,
+) -> Dict:
+    """
+    Enumerate, filter and score analogs of one seed, keeping only its top k.
+
+    Edits are applied in an order drawn from a generator seeded with
+    (random_seed, seed SMILES), so the result does not depend on which worker
+    runs it. Stops at max_candidates products or the wall-clock deadline.
+    Runs inside compute pool workers, so it must stay a module-level function.
+    """
+    seed = Chem.MolFromSmiles(seed_smiles)
+    if seed is None:
+        return {"analogs": [], "evaluated": 0}
+    references = [fp for fp in (
+        _fingerprint(mol) for mol in map(Chem.MolFromSmiles, reference_smiles) if mol is not None
+    )]
+    rng = random.Random(f"{random_seed}:{seed_smiles}")
+    reactions = list(_reactions())
+
+    seen = {Chem.MolToSmiles(seed), *reference_smiles}
+    top: List[Tuple[float, str, Dict]] = []
+    evaluated = 0
+    frontier = [(seed, [])]
+    exhausted = False
+
+    for _ in range(MAX_DEPTH):
+        expanded = []
+        rng.shuffle(reactions)
+        for parent, path in frontier:
+            for name, reaction in reactions:
+                for products in reaction.RunReactants((parent,)):
+                    if evaluated >= max_candidates or time.time() > deadline:
+                        exhausted = True
+                        break
+                    product = products[0]
+                    try:
+                        # Recomputes implicit hydrogens and aromaticity after the edit
+                        Chem.SanitizeMol(product)
+                        smiles = Chem.MolToSmiles(product)
+                    except Exception:
+                        continue
+                    if smiles in seen:
+                        continue
+                    seen.add(smiles)
+                    # Re-parse so the product is a clean molecule for the next round
+                    mol = Chem.MolFromSmiles(smiles)
+                    if mol is None:
+                        continue
+                    smiles = Chem.MolToSmiles(mol)
+                    evaluated += 1
+
+                    row = mol_descriptor_row(mol)
+                    if not _passes_filters(row):
+                        continue
+                    similarity = max(DataStructs.BulkTanimotoSimilarity(_fingerprint(mol), references), default=0.0)
+                    if not MIN_SIMILARITY <= similarity < MAX_SIMILARITY:
+                        continue
+                    qed = QED.qed(mol)
+                    score = 0.6 * similarity + 0.4 * qed
+                    analog = {
+                        "smiles": smiles,
+                        "parent_smiles": seed_smiles,
+                        "transformations": path + [name],
+                        "similarity": similarity,
+                        "qed": qed,
+                        "score": score,
+                        "mol_wt": row[_MOL_WT],
+                        "logp": row[_LOGP],
+                    }
+                    entry = (score, smiles, analog)
+                    if len(top) < k:
+                        heapq.heappush(top, entry)
+                    elif entry[:2] > top[0][:2]:
+                        heapq.heapreplace(top, entry)
+                    expanded.append((score, smiles, mol, path + [name]))
+                if exhausted:
+                    break
+            if exhausted:
+                break
+        # Expand only the best products of this round
+        expanded.sort(key=lambda item: (-item[0], item[1]))
+        frontier = [(mol, path) for _, _, mol, path in expanded[:BEAM_WIDTH]]
+        if exhausted or not frontier:
+            break
+
+    analogs = [analog for _, _, analog in sorted(top, key=lambda entry: (-entry[0], entry[1]))]
+    return {"analogs": analogs, "evaluated": evaluated}
+
+
+def _kth_score(best: Dict[str, Dict], k: int) -> Optional[float]:
+    if len(best) < k:
+        return None
+    return heapq.nlargest(k, (analog["score"] for analog in best.values()))[-1]
+
+
+async def generate_analogs(
+    seeds: Sequence[dict],
+    k: int = 20,
+    random_seed: int = 0,
+    time_budget: float = 5.0,
+    max_candidates: int = 5000,
+) -> Dict:
+    """
+    Top-k analogs over all seeds, enumerated across the compute pool.
+
+    Seeds (dicts with "smiles", most potent first) are processed one pool-wide
+    round at a time; generation stops early once a round no longer improves
+    the current top k, or when the time or candidate budget runs out.
+    """
+    reference_smiles = [seed["smiles"] for seed in seeds]
+    deadline = time.time() + time_budget
+    round_size = max(compute_pool.pool_size(), 1)
+    per_seed_budget = max(1, max_candidates // max(len(seeds), 1))
+
+    best: Dict[str, Dict] = {}
+    evaluated = 0
+    rounds = 0
+    stopped_early = False
+    for start in range(0, len(seeds), round_size):
+        if time.time() > deadline or evaluated >= max_candidates:
+            stopped_early = True
+            break
+        rounds += 1
+        batch = seeds[start:start + round_size]
+        cutoff = _kth_score(best, k)
+        results = await asyncio.gather(*(
+            compute_pool.run_in_pool(
+                enumerate_seed, seed["smiles"], reference_smiles, random_seed, k, per_seed_budget, deadline
+            )
+            for seed in batch
+        ))
+        improved = False
+        for seed, result in zip(batch, results):
+            evaluated += result["evaluated"]
+            for analog in result["analogs"]:
+                known = best.get(analog["smiles"])
+                if known is None or analog["score"] > known["score"]:
+                    best[analog["smiles"]] = {**analog, "parent_name": seed.get("name"), "parent_ic50": seed.get("ic50")}
+                    improved = improved or cutoff is None or analog["score"] > cutoff
+        if len(best) >= k and not improved:
+            stopped_early = start + round_size < len(seeds)
+            break
+
+    ranked = sorted(best.values(), key=lambda analog: (-analog["score"], analog["smiles"]))[:k]
+    logger.info(f"Generated {len(ranked)} analogs from {len(seeds)} seeds ({evaluated} candidates, {rounds} rounds)")
+    return {"analogs": ranked, "evaluated": evaluated, "rounds": rounds, "stopped_early": stopped_early}
+
@@ -0,0 +1,367 @@
+from __future__ import annotations
+
+from typing import Dict, List, NamedTuple, Optional, Sequence
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode
+
+from app.config import settings
+from app.utils.lazy_imports import lazy_module
+
+httpx = lazy_module("httpx")
+
+logger = logging.getLogger(__name__)
+
+# The ChEMBL web services return at most this many records per page
+MAX_PAGE_SIZE = 1000
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+UNIPROT_ACCESSION = re.compile(r"^([OPQ][0-9][A-Z0-9]{3}[0-9]|[A-NR-Z][0-9]([A-Z][A-Z0-9]{2}[0-9]){1,2})$")
+# Activity fields actually used; everything else is left out of the payload
+ACTIVITY_FIELDS = ("molecule_chembl_id", "molecule_pref_name", "canonical_smiles", "standard_value")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    body BLOB NOT NULL,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+class CachedResponse(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body: bytes
+    fetched_at: float
+
+
+class HTTPResponseCache:
+    """
+    ChEMBL response bodies keyed by URL in a local SQLite file, with the
+    validators needed to revalidate them. An empty path disables it. Calls
+    block on SQLite, so async callers run them in a worker thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        if not self.path:
+            return None
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT etag, last_modified, body, fetched_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        return CachedResponse(*row) if row is not None else None
+
+    def put(self, url: str, etag: Optional[str], last_modified: Optional[str], body: bytes) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (url, etag, last_modified, body, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, body, time.time()),
+            )
+            conn.commit()
+
+    def touch(self, url: str) -> None:
+        """Mark an entry fresh again after the server confirmed it unchanged"""
+        if not self.path:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def _float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _gene_symbols(target: dict) -> List[str]:
+    return [
+        synonym["component_synonym"].upper()
+        for component in target.get("target_components") or []
+        for synonym in component.get("target_component_synonyms") or []
+        if synonym.get("syn_type") == "GENE_SYMBOL" and synonym.get("component_synonym")
+    ]
+
+
+def best_target(candidates: Sequence[dict], identifier: str) -> Optional[dict]:
+    """
+    The search result a user most likely meant: a single protein whose gene
+    symbol is the identifier, then any human single protein, then the top hit.
+    """
+    if not candidates:
+        return None
+    identifier = identifier.upper().strip()
+    single = [target for target in candidates if target.get("target_type") == "SINGLE PROTEIN"]
+    for target in single:
+        if identifier in _gene_symbols(target) or (target.get("pref_name") or "").upper() == identifier:
+            return target
+    for target in single:
+        if target.get("organism") == "Homo sapiens":
+            return target
+    return single[0] if single else candidates[0]
+
+
+class ChEMBLClient:
+    """
+    Async client for the ChEMBL web services.
+
+    Every request goes through one pooled httpx.AsyncClient (keep-alive, and
+    HTTP/2 when the h2 package is installed), at most `concurrency` at a
+    time. Timeouts, connection errors, 429 and 5xx responses are retried with
+    jittered exponential backoff, honouring Retry-After. JSON responses are
+    kept in an HTTPResponseCache: entries younger than max_age are served without
+    a request, older ones are revalidated with If-None-Match/If-Modified-Since,
+    and when ChEMBL cannot be reached the stale copy is served instead.
+
+    base_url (and transport, e.g. an httpx.MockTransport) can point it at a
+    local stub such as scripts/chembl_stub_server.py.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        cache_path: str = "",
+        concurrency: int = 8,
+        timeout: float = 30.0,
+        retries: int = 3,
+        max_age: float = 86400.0,
+        backoff: float = 0.5,
+        transport=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.cache = HTTPResponseCache(cache_path)
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.retries = retries
+        self.max_age = max_age
+        self.backoff = backoff
+        self.transport = transport
+        self._client = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.http2 = importlib.util.find_spec("h2") is not None
+        self.requests = 0
+        self.retried = 0
+        self.fresh_hits = 0
+        self.revalidated = 0
+        self.downloaded = 0
+        self.stale_served = 0
+
+    def _http(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+                headers={"Accept": "application/json"},
+                follow_redirects=True,
+                transport=self.transport,
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._client
+
+    def url(self, path: str, params: Optional[Dict] = None) -> str:
+        """Absolute URL with sorted query parameters, so equal queries share a cache entry"""
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        return f"{url}?{urlencode(sorted(params.items()))}" if params else url
+
+    def _delay(self, attempt: int, response=None) -> float:
+        retry_after = _float(response.headers.get("retry-after")) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.timeout)
+        return self.backoff * 2 ** attempt * (0.5 + random.random())
+
+    async def _send(self, url: str, headers: Dict[str, str]):
+        """GET with retries; the last response is returned even if it is still an error"""
+        client = self._http()
+        attempt = 0
+        while True:
+            response = None
+            try:
+                async with self._semaphore:
+                    self.requests += 1
+                    response = await client.get(url, headers=headers)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    return response
+            except httpx.TransportError:
+                if attempt >= self.retries:
+                    raise
+            # Backing off happens outside the semaphore so other requests keep going
+            await asyncio.sleep(self._delay(attempt, response))
+            attempt += 1
+            self.retried += 1
+
+    async def get_json(self, path: str, params: Optional[Dict] = None) -> Dict:
+        """
+        A JSON document, from the cache while fresh, revalidated once stale.
+        Raises httpx.HTTPError when ChEMBL fails and nothing is cached.
+        """
+        url = self.url(path, params)
+        cached = await asyncio.to_thread(self.cache.get, url)
+        if cached is not None and time.time() - cached.fetched_at < self.max_age:
+            self.fresh_hits += 1
+            return json.loads(cached.body)
+
+        headers = {}
+        if cached is not None and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached is not None and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+        try:
+            response = await self._send(url, headers)
+            if response.status_code == 304 and cached is not None:
+                await asyncio.to_thread(self.cache.touch, url)
+                self.revalidated += 1
+                return json.loads(cached.body)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            if cached is None:
+                raise
+            self.stale_served += 1
+            logger.warning(f"ChEMBL request failed ({e!r}); serving the cached copy of {url}")
+            return json.loads(cached.body)
+
+        self.downloaded += 1
+        await asyncio.to_thread(
+            self.cache.put, url, response.headers.get("etag"), response.headers.get("last-modified"), response.content
+        )
+        return response.json()
+
+    async def paginate(
+        self, path: str, params: Dict, key: str, max_records: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Every record of a paginated list endpoint, up to max_records. The first
+        page gives the total count; the remaining pages are requested
+        concurrently by offset.
+        """
+        page_size = min(MAX_PAGE_SIZE, max_records or MAX_PAGE_SIZE)
+        first = await self.get_json(path, {**params, "limit": page_size, "offset": 0})
+        records = list(first.get(key) or [])
+        total = (first.get("page_meta") or {}).get("total_count") or len(records)
+        if max_records:
+            total = min(total, max_records)
+        pages = await asyncio.gather(*(
+            self.get_json(path, {**params, "limit": page_size, "offset": offset})
+            for offset in range(page_size, total, page_size)
+        ))
+        for page in pages:
+            records.extend(page.get(key) or [])
+        return records[:total]
+
+    async def resolve_target(self, identifier: str) -> Optional[dict]:
+        """ChEMBL target record for a ChEMBL ID, UniProt accession, gene symbol or name"""
+        query = identifier.upper().strip()
+        if query.startswith("CHEMBL"):
+            try:
+                return await self.get_json(f"target/{query}.json")
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code == 404:
+                    return None
+                raise
+        if UNIPROT_ACCESSION.match(query):
+            data = await self.get_json("target.json", {"target_components__accession": query, "limit": 20})
+        else:
+            data = await self.get_json("target/search.json", {"q": identifier.strip(), "limit": 20})
+        return best_target(data.get("targets") or [], query)
+
+    async def ic50_activities(self, target_chembl_id: str, max_records: Optional[int] = None) -> List[dict]:
+        """Exact IC50 measurements against a target as {"smiles", "name", "molecule_chembl_id", "ic50"} (µM)"""
+        records = await self.paginate(
+            "activity.json",
+            {
+                "target_chembl_id": target_chembl_id,
+                "standard_type": "IC50",
+                "standard_relation": "=",
+                "standard_units": "nM",
+                "only": ",".join(ACTIVITY_FIELDS),
+            },
+            "activities",
+            max_records,
+        )
+        rows = []
+        for record in records:
+            value = _float(record.get("standard_value"))
+            if not record.get("canonical_smiles") or value is None or value <= 0:
+                continue
+            rows.append({
+                "smiles": record["canonical_smiles"],
+                "name": record.get("molecule_pref_name") or record.get("molecule_chembl_id"),
+                "molecule_chembl_id": record.get("molecule_chembl_id"),
+                "ic50": value / 1000.0,
+            })
+        return rows
+
+    async def target_activities(self, identifier: str, max_records: Optional[int] = None) -> Optional[Dict]:
+        """{"target_chembl_id", "pref_name", "activities"} for an identifier, or None if ChEMBL has no such target"""
+        target = await self.resolve_target(identifier)
+        if target is None or not target.get("target_chembl_id"):
+            return None
+        return {
+            "target_chembl_id": target["target_chembl_id"],
+            "pref_name": target.get("pref_name"),
+            "activities": await self.ic50_activities(target["target_chembl_id"], max_records),
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "retried": self.retried,
+            "fresh_hits": self.fresh_hits,
+            "revalidated": self.revalidated,
+            "downloaded": self.downloaded,
+            "stale_served": self.stale_served,
+            "http2": self.http2,
+        }
+
+    async def close(self) -> None:
+        """Close the pool; the next request opens a new one"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._semaphore = None
+        self.cache.close()
+
+
+chembl_client = ChEMBLClient(
+    settings.chembl_api_url,
+    cache_path=settings.chembl_cache_path,
+    concurrency=settings.chembl_http_concurrency,
+    timeout=settings.chembl_http_timeout,
+    retries=settings.chembl_http_retries,
+    max_age=settings.chembl_cache_max_age,
+)
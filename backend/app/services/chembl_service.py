@@ -1,11 +1,39 @@
-from typing import List
+from collections import OrderedDict
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Tuple, TypeVar
+import asyncio
+import hashlib
+import json
 import logging
-from app.utils.image_gen import smiles_to_base64_image
+import time
+from app.config import settings
+from app.services.chembl_client import chembl_client
+from app.services.compound_store import get_compound_store
+from app.services.compound_table import get_compound_table
+from app.services.ranking import page_query_id, rank_page
+from app.utils.canonical import canonical_identity, canonicalize, dedupe_molecules
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.image_gen import smiles_to_base64_images, smiles_to_image_url, warm_depiction_cache
+from app.utils.instrumentation import debug_event, should_sample, stage_timer
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Molecules looked up and depicted together when streaming; small so the first
+# rows go out quickly, large enough to keep the compute pool busy
+STREAM_BATCH = 8
+
+# Targets fetched from the ChEMBL web API kept in memory, and how long (seconds)
+# an identifier the API could not serve is left alone before trying again
+REMOTE_TARGETS = 64
+REMOTE_RETRY_AFTER = 300.0
+
 # Pre-built molecule data for common drug targets
-# This provides instant responses while ChEMBL would take 30+ seconds
+# This provides instant responses while ChEMBL would take 30+ seconds.
+# When a compound store is configured (see scripts/ingest_chembl.py) it takes
+# precedence and this table only covers targets missing from it. Targets in
+# neither are fetched from the ChEMBL web API (ensure_target) before DEFAULT.
 MOLECULE_DATABASE = {
     "TP53": [
         {"smiles": "CC(=O)Oc1ccccc1C(=O)O", "name": "Aspirin analog", "ic50": 0.35},
@@ -54,106 +82,447 @@ PROTEIN_NAMES = {
     "COX2": "Cyclooxygenase-2",
 }
 
+# Other identifiers for the MOLECULE_DATABASE targets
+BUILTIN_TARGET_ALIASES = {
+    "1TUP": "TP53",
+    "P04637": "TP53",
+    "P00533": "EGFR",
+    "KDR": "VEGFR2",
+    "ERBB2": "HER2",
+}
+
+
+@lru_cache(maxsize=None)
+def _canonical_builtin(target_key: str) -> Tuple[dict, ...]:
+    """MOLECULE_DATABASE rows with canonical SMILES and InChIKeys, duplicates collapsed"""
+    molecules = MOLECULE_DATABASE[target_key]
+    return tuple(dedupe_molecules(molecules, [canonical_identity(mol["smiles"]) for mol in molecules]))
+
+
+@lru_cache(maxsize=None)
+def _builtin_version(target_key: str) -> str:
+    """Content hash of a MOLECULE_DATABASE entry, stable across restarts"""
+    payload = json.dumps(MOLECULE_DATABASE[target_key], sort_keys=True).encode()
+    return f"builtin:{target_key}:{hashlib.sha256(payload).hexdigest()[:12]}"
+
+
+class RemoteTarget(NamedTuple):
+    """Actives for a target served from the ChEMBL web API"""
+    target_chembl_id: str
+    pref_name: Optional[str]
+    molecules: Tuple[dict, ...]
+    version: str
+
 
 class ChEMBLService:
     """Fast molecule service with pre-cached data"""
     
-    def _get_molecules_for_target(self, target_id: str) -> List[dict]:
-        """Get pre-cached molecules for a target"""
+    def __init__(self):
+        # Identifier -> target nothing local covers, fetched by ensure_target
+        self._remote: "OrderedDict[str, RemoteTarget]" = OrderedDict()
+        self._remote_failures: Dict[str, float] = {}
+        self._remote_inflight: Dict[str, asyncio.Task] = {}
+    
+    def _resolve_target(self, target_id: str):
+        """
+        (source, target) for the first of the memory-mapped compound table and
+        the compound store that has a target, or (None, None). Targets missing
+        from the table still come from the store.
+        """
+        for source in (get_compound_table(), get_compound_store()):
+            if source is not None:
+                target = source.resolve_target(target_id)
+                if target is not None:
+                    return source, target
+        return None, None
+    
+    async def run_lookup(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Call a lookup that may query the compound store. With a database
+        configured it runs in a worker thread, so SQL round trips don't block
+        the event loop; the table and MOLECULE_DATABASE answer inline.
+        """
+        if settings.database_url:
+            return await asyncio.to_thread(func, *args, **kwargs)
+        return func(*args, **kwargs)
+    
+    def _get_molecules_for_target(
+        self,
+        target_id: str,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[float, int]] = None,
+    ) -> List[dict]:
+        """Get molecules for a target, most potent first when served from the compound store"""
+        store, target = self._resolve_target(target_id)
+        if target is not None:
+            return store.top_actives(
+                target.target_chembl_id, limit or settings.max_hits_per_target, after
+            )
+        
+        molecules = self._get_builtin_molecules(target_id)
+        return molecules[:limit] if limit else molecules
+    
+    def _get_molecules_for_targets(
+        self, target_ids: List[str], limit: int
+    ) -> Tuple[Dict[str, List[dict]], List[str]]:
+        """
+        Molecules for several targets keyed by target_key, in request order,
+        with identifiers that resolve to the same target collapsed, plus the
+        identifiers nothing covers. Those would only get the DEFAULT
+        placeholders, so they are left out of the molecules. Targets in the
+        compound store or table are fetched together in one lookup.
+        """
+        keys: List[str] = []
+        unresolved: List[str] = []
+        builtin = {}
+        # source.kind -> (table or store, target keys it serves)
+        stored: Dict[str, tuple] = {}
+        for target_id in target_ids:
+            source, target = self._resolve_target(target_id)
+            key = target.target_chembl_id if target is not None else self._builtin_key(target_id)
+            if key == "DEFAULT":
+                unresolved.append(target_id)
+                continue
+            if key in keys:
+                continue
+            keys.append(key)
+            if target is None:
+                builtin[key] = self._get_builtin_molecules(key)[:limit]
+            else:
+                stored.setdefault(source.kind, (source, []))[1].append(key)
+        fetched = {}
+        for source, source_keys in stored.values():
+            fetched.update(source.actives_for_targets(source_keys, limit))
+        molecules = {key: builtin[key] if key in builtin else fetched.get(key, []) for key in keys}
+        return molecules, unresolved
+    
+    def known_actives(self, target_id: str, limit: int = 20) -> List[dict]:
+        """Most potent known actives for a target, used to seed analog generation"""
+        molecules = self._get_molecules_for_target(target_id, limit)
+        return sorted(molecules, key=lambda mol: mol["ic50"])[:limit]
+    
+    def _builtin_key(self, target_id: str) -> str:
+        """MOLECULE_DATABASE key serving a target"""
         target_upper = target_id.upper().strip()
         
         # Direct match
         if target_upper in MOLECULE_DATABASE:
-            return MOLECULE_DATABASE[target_upper]
+            return target_upper
         
         # Try common mappings
-        mappings = {
-            "1TUP": "TP53",
-            "P04637": "TP53",
-            "P00533": "EGFR",
-            "KDR": "VEGFR2",
-            "ERBB2": "HER2",
-        }
+        if target_upper in BUILTIN_TARGET_ALIASES and BUILTIN_TARGET_ALIASES[target_upper] in MOLECULE_DATABASE:
+            return BUILTIN_TARGET_ALIASES[target_upper]
         
-        if target_upper in mappings:
-            return MOLECULE_DATABASE.get(mappings[target_upper], MOLECULE_DATABASE["DEFAULT"])
+        # Fetched from the ChEMBL web API by ensure_target
+        if target_upper in self._remote:
+            return target_upper
         
-        return MOLECULE_DATABASE["DEFAULT"]
+        return "DEFAULT"
+    
+    def _get_builtin_molecules(self, target_id: str) -> List[dict]:
+        """Get pre-cached molecules for a target"""
+        key = self._builtin_key(target_id)
+        if key in self._remote:
+            return list(self._remote[key].molecules)
+        return list(_canonical_builtin(key))
+    
+    def _is_local(self, target_id: str) -> bool:
+        """Whether the store, the table or MOLECULE_DATABASE serves a target"""
+        if self._resolve_target(target_id)[1] is not None:
+            return True
+        target_upper = target_id.upper().strip()
+        return target_upper in MOLECULE_DATABASE or BUILTIN_TARGET_ALIASES.get(target_upper) in MOLECULE_DATABASE
+    
+    async def ensure_target(self, target_id: str) -> None:
+        """
+        Fetch a target nothing local covers from the ChEMBL web API, so lookups
+        serve its measured actives instead of DEFAULT. Waits at most
+        chembl_fallback_timeout; a fetch still running then finishes in the
+        background and later requests pick it up.
+        """
+        key = target_id.upper().strip()
+        if key in self._remote:
+            self._remote.move_to_end(key)
+            return
+        if not settings.chembl_live_fallback or not key or await self.run_lookup(self._is_local, target_id):
+            return
+        if time.monotonic() - self._remote_failures.get(key, float("-inf")) < REMOTE_RETRY_AFTER:
+            return
+        
+        task = self._remote_inflight.get(key)
+        if task is None:
+            task = self._remote_inflight[key] = asyncio.create_task(self._fetch_remote(key))
+            task.add_done_callback(lambda _: self._remote_inflight.pop(key, None))
+        try:
+            with stage_timer("remote"):
+                await asyncio.wait_for(asyncio.shield(task), settings.chembl_fallback_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"ChEMBL web API still fetching {key} after {settings.chembl_fallback_timeout}s")
+    
+    async def _fetch_remote(self, key: str) -> None:
+        try:
+            fetched = await chembl_client.target_activities(key, settings.chembl_max_records)
+            if fetched is None or not fetched["activities"]:
+                raise LookupError("no such target, or no IC50 activities for it")
+            rows = fetched["activities"]
+            identities = await canonicalize([row["smiles"] for row in rows])
+        except Exception as e:
+            logger.warning(f"ChEMBL web API fallback failed for {key}: {e!r}")
+            self._remote_failures[key] = time.monotonic()
+            return
+        
+        molecules = tuple(sorted(dedupe_molecules(rows, identities), key=lambda mol: mol["ic50"]))
+        payload = json.dumps(molecules, sort_keys=True).encode()
+        self._remote[key] = RemoteTarget(
+            fetched["target_chembl_id"],
+            fetched["pref_name"],
+            molecules,
+            f"chembl:{fetched['target_chembl_id']}:{hashlib.sha256(payload).hexdigest()[:12]}",
+        )
+        self._remote.move_to_end(key)
+        while len(self._remote) > REMOTE_TARGETS:
+            self._remote.popitem(last=False)
+        self._remote_failures.pop(key, None)
+        logger.info(f"Fetched {len(molecules)} actives for {key} ({fetched['target_chembl_id']}) from the ChEMBL web API")
+    
+    async def ensure_targets(self, target_ids: List[str]) -> None:
+        await asyncio.gather(*(self.ensure_target(target_id) for target_id in target_ids))
+    
+    def target_key(self, target_id: str) -> str:
+        """Identity of the dataset behind a target: its ChEMBL ID in the store, else its MOLECULE_DATABASE key"""
+        _, target = self._resolve_target(target_id)
+        if target is not None:
+            return target.target_chembl_id
+        return self._builtin_key(target_id)
+    
+    def data_version(self, target_id: str) -> str:
+        """Snapshot of the data behind a target; changes whenever its rows would"""
+        store, target = self._resolve_target(target_id)
+        if target is not None:
+            snapshot = store.activity_snapshot(target.target_chembl_id)
+            return f"{store.kind}:{target.target_chembl_id}:{'.'.join(str(part) for part in snapshot)}"
+        key = self._builtin_key(target_id)
+        if key in self._remote:
+            return self._remote[key].version
+        return _builtin_version(key)
+    
+    def cache_version(self, *target_ids: str) -> Optional[str]:
+        """
+        data_version of the targets, for keying cached responses, or None while
+        any of them waits on the ChEMBL web API. Those are answered from DEFAULT
+        until the fetch lands, and caching that answer would keep serving it
+        (and skip the retry after a failure) for the cache's whole TTL.
+        """
+        versions = []
+        for target_id in target_ids:
+            key = target_id.upper().strip()
+            if settings.chembl_live_fallback and key and key not in self._remote and not self._is_local(target_id):
+                return None
+            versions.append(self.data_version(target_id))
+        return ",".join(versions)
     
     def _get_protein_name(self, target_id: str) -> str:
         """Get protein name for a target"""
         target_upper = target_id.upper().strip()
-        return PROTEIN_NAMES.get(target_upper, "Target Protein")
+        if target_upper in PROTEIN_NAMES:
+            return PROTEIN_NAMES[target_upper]
+        
+        store, target = self._resolve_target(target_id)
+        if target is not None and target.pref_name:
+            return target.pref_name
+        remote = self._remote.get(target_upper)
+        if remote is not None and remote.pref_name:
+            return remote.pref_name
+        return "Target Protein"
     
-    async def fetch_bioactivity_data(self, pdb_id: str) -> List[dict]:
-        """Fetch bioactivity data - uses fast local cache"""
+    async def warm_depiction_cache(self) -> int:
+        """Pre-render every structure in MOLECULE_DATABASE"""
+        unique_smiles = {mol["smiles"] for mols in MOLECULE_DATABASE.values() for mol in mols}
+        warmed = await warm_depiction_cache(sorted(unique_smiles))
+        logger.info(f"Depiction cache warmed with {warmed}/{len(unique_smiles)} structures")
+        return warmed
+    
+    async def render_images(
+        self, smiles_list: List[str], image_mode: str
+    ) -> Tuple[List[Optional[str]], List[Optional[str]]]:
+        """(inline base64 images, image URLs) for a batch; only the list for image_mode is filled"""
+        # Render the whole batch at once so RDKit work fans out across the
+        # compute pool instead of blocking the event loop molecule by molecule
+        images = [None] * len(smiles_list)
+        image_urls = [None] * len(smiles_list)
+        if image_mode == "url":
+            with stage_timer("parse"):
+                for idx, smiles in enumerate(smiles_list):
+                    try:
+                        image_urls[idx] = smiles_to_image_url(smiles)
+                    except ValueError as e:
+                        logger.debug(f"Failed to build image URL: {e}")
+        else:
+            with stage_timer("depict"):
+                images = await smiles_to_base64_images(smiles_list)
+        return images, image_urls
+    
+    async def _build_results(
+        self, molecules: List[dict], pdb_id: str, protein_name: str, image_mode: str
+    ) -> List[dict]:
+        """Turn store/database rows into response objects, depicting each one"""
+        images, image_urls = await self.render_images([mol["smiles"] for mol in molecules], image_mode)
         
-        # ============ DEBUG STEP 1: Function Entry ============
-        print(f"\n{'='*60}")
-        print(f"[BACKEND SERVICE] fetch_bioactivity_data() CALLED")
-        print(f"[BACKEND SERVICE] Input PDB ID: '{pdb_id}'")
-        logger.info(f"ChEMBL Service called with PDB ID: {pdb_id}")
-        print(f"{'='*60}\n")
+        return [
+            {
+                "molecule": mol["smiles"],
+                "canonical_smiles": mol["smiles"],
+                "ic50": mol["ic50"],
+                "disease_name": "Cancer",
+                "disease_pid": pdb_id,
+                "disease_protien_name": protein_name,
+                "molecule_image": images[idx],
+                "molecule_image_url": image_urls[idx],
+                "molecular_weight": mol.get("molecular_weight"),
+                "similarity": mol.get("similarity"),
+                "inchikey": mol.get("inchikey"),
+                "measurement_count": mol.get("measurement_count"),
+            }
+            for idx, mol in enumerate(molecules)
+        ]
+    
+    async def fetch_bioactivity_data(
+        self, pdb_id: str, image_mode: str = "inline", limit: Optional[int] = None
+    ) -> List[dict]:
+        """Fetch bioactivity data - uses fast local cache
         
+        image_mode "inline" embeds a base64 PNG per molecule; "url" returns a
+        /molecule_image/ link instead so clients can fetch and cache images separately.
+        """
+        sampled = should_sample()
+        started = time.perf_counter()
         try:
-            # ============ DEBUG STEP 2: Data Source Call ============
-            print(f"[BACKEND SERVICE] Fetching molecules from local database...")
-            molecules = self._get_molecules_for_target(pdb_id)
-            protein_name = self._get_protein_name(pdb_id)
+            await self.ensure_target(pdb_id)
+            with stage_timer("lookup"):
+                molecules = await self.run_lookup(self._get_molecules_for_target, pdb_id, limit)
+                protein_name = await self.run_lookup(self._get_protein_name, pdb_id)
+            if sampled:
+                debug_event(
+                    "chembl.lookup", pdb_id=pdb_id, protein_name=protein_name, molecules=len(molecules),
+                    elapsed_ms=round(1000 * (time.perf_counter() - started), 3),
+                )
             
-            print(f"[BACKEND SERVICE] Raw molecules retrieved: {len(molecules)} molecules")
-            print(f"[BACKEND SERVICE] Protein name: '{protein_name}'")
-            print(f"[BACKEND SERVICE] First molecule SMILES: {molecules[0]['smiles'] if molecules else 'NONE'}")
-            
-            # ============ DEBUG STEP 3: Process Data ============
-            print(f"\n[BACKEND SERVICE] Starting to process {len(molecules)} molecules...")
-            results = []
-            for idx, mol in enumerate(molecules):
-                smiles = mol["smiles"]
-                print(f"[BACKEND SERVICE] Processing molecule {idx+1}/{len(molecules)}: {mol['name']}")
-                
-                # Generate molecule image
-                molecule_image = None
-                try:
-                    print(f"[BACKEND SERVICE]   → Generating image for SMILES: {smiles[:30]}...")
-                    molecule_image = smiles_to_base64_image(smiles)
-                    image_status = f"SUCCESS (length: {len(molecule_image)} chars)" if molecule_image else "FAILED"
-                    print(f"[BACKEND SERVICE]   → Image generation: {image_status}")
-                except Exception as e:
-                    print(f"[BACKEND SERVICE]   → Image generation FAILED: {e}")
-                    logger.debug(f"Failed to generate image: {e}")
-                
-                result_obj = {
-                    "molecule": smiles,
-                    "canonical_smiles": smiles,
-                    "ic50": mol["ic50"],
-                    "disease_name": "Cancer",
-                    "disease_pid": pdb_id,
-                    "disease_protien_name": protein_name,
-                    "molecule_image": molecule_image
-                }
-                results.append(result_obj)
-            
-            # ============ DEBUG STEP 4: Final Response ============
-            print(f"\n{'='*60}")
-            print(f"[BACKEND SERVICE] FINAL RESPONSE READY")
-            print(f"[BACKEND SERVICE] Total molecules: {len(results)}")
-            print(f"[BACKEND SERVICE] Sample response structure:")
-            if results:
-                sample = results[0].copy()
-                if sample.get('molecule_image'):
-                    sample['molecule_image'] = f"<base64 image {len(sample['molecule_image'])} chars>"
-                print(f"[BACKEND SERVICE] {sample}")
-            print(f"[BACKEND SERVICE] Returning data now...")
-            print(f"{'='*60}\n")
+            results = await self._build_results(molecules, pdb_id, protein_name, image_mode)
             
+            if sampled:
+                debug_event(
+                    "chembl.results", pdb_id=pdb_id, image_mode=image_mode, molecules=len(results),
+                    images=sum(1 for result in results if result["molecule_image"]),
+                    elapsed_ms=round(1000 * (time.perf_counter() - started), 3),
+                )
             logger.info(f"Returning {len(results)} molecules for {protein_name}")
             return results
             
         except Exception as e:
-            print(f"\n[BACKEND SERVICE] ❌ ERROR in fetch_bioactivity_data: {e}")
             logger.error(f"Error in fetch_bioactivity_data: {e}")
             raise
+    
+    async def _iter_molecule_chunks(self, pdb_id: str, limit: Optional[int]) -> AsyncIterator[List[dict]]:
+        """Molecules for a target in STREAM_BATCH-sized chunks, read lazily from the store"""
+        with stage_timer("lookup"):
+            store, target = await self.run_lookup(self._resolve_target, pdb_id)
+        
+        if target is None:
+            molecules = self._get_builtin_molecules(pdb_id)
+            molecules = molecules[:limit] if limit else molecules
+            for start in range(0, len(molecules), STREAM_BATCH):
+                yield molecules[start:start + STREAM_BATCH]
+            return
+        
+        remaining = limit or settings.max_hits_per_target
+        after = None
+        while remaining > 0:
+            with stage_timer("lookup"):
+                rows = await self.run_lookup(
+                    store.top_actives, target.target_chembl_id, min(STREAM_BATCH, remaining), after
+                )
+            if not rows:
+                return
+            yield rows
+            remaining -= len(rows)
+            after = (rows[-1]["pic50"], rows[-1]["id"])
+    
+    async def stream_bioactivity_data(
+        self, pdb_id: str, image_mode: str = "inline", limit: Optional[int] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Same rows as fetch_bioactivity_data, yielded as soon as each small chunk
+        is looked up and depicted, so nothing holds the full result list.
+        """
+        await self.ensure_target(pdb_id)
+        with stage_timer("lookup"):
+            protein_name = await self.run_lookup(self._get_protein_name, pdb_id)
+        async for chunk in self._iter_molecule_chunks(pdb_id, limit):
+            for result in await self._build_results(chunk, pdb_id, protein_name, image_mode):
+                yield result
+    
+    async def fetch_bioactivity_page(
+        self,
+        pdb_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        sort_by: str = "ic50",
+        sort_order: str = "asc",
+        image_mode: str = "inline",
+        reference_smiles: Optional[str] = None,
+    ) -> dict:
+        """
+        One page of hits for a target, sorted server-side.
+        
+        Only the rows on the requested page are depicted. Raises ValueError
+        for a cursor that was issued for a different query.
+        """
+        descending = sort_order == "desc"
+        await self.ensure_target(pdb_id)
+        with stage_timer("lookup"):
+            store, target = await self.run_lookup(self._resolve_target, pdb_id)
+            protein_name = await self.run_lookup(self._get_protein_name, pdb_id)
+        
+        # Table and store cursors aren't interchangeable (row index vs database id),
+        # so one issued before the table finished loading is rejected, not misread
+        source_kind = store.kind if target is not None else "builtin"
+        query_id = page_query_id(pdb_id, sort_by, sort_order, reference_smiles, source_kind)
+        state = decode_cursor(cursor, query_id) if cursor else {}
+        
+        if target is not None and sort_by == "ic50":
+            # Potency order is the store's index order: page straight from the database
+            after = tuple(state["after"]) if "after" in state else None
+            with stage_timer("lookup"):
+                rows = await self.run_lookup(
+                    store.top_actives, target.target_chembl_id, limit + 1, after, most_potent_first=not descending
+                )
+                total = await self.run_lookup(store.count_actives, target.target_chembl_id)
+            page = rows[:limit]
+            next_state = {"after": [page[-1]["pic50"], page[-1]["id"]]} if len(rows) > limit else None
+        else:
+            with stage_timer("lookup"):
+                if target is not None:
+                    candidates = await self.run_lookup(
+                        store.top_actives, target.target_chembl_id, settings.max_sort_candidates
+                    )
+                else:
+                    candidates = self._get_builtin_molecules(pdb_id)
+            offset = int(state.get("offset", 0))
+            # Sorting by weight or similarity parses every candidate
+            with stage_timer("parse"):
+                page = rank_page(candidates, sort_by, descending, offset, limit, reference_smiles)
+            total = len(candidates)
+            next_state = {"offset": offset + limit} if offset + limit < total else None
+        
+        items = await self._build_results(page, pdb_id, protein_name, image_mode)
+        return {
+            "items": items,
+            "next_cursor": encode_cursor(query_id, next_state) if next_state else None,
+            "total": total,
+            "limit": limit,
+            "sort_by": sort_by,
+            "sort_order": sort_order,
+        }
 
 
 # Singleton instance
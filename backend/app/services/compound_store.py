@@ -0,0 +1,401 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+import math
+import threading
+
+from sqlalchemy import (
+    Column, Float, Index, Integer, String, create_engine, delete, func, insert, inspect, or_, select, text,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from app.config import settings
+from app.utils.canonical import aggregate_ic50
+
+logger = logging.getLogger(__name__)
+
+Base = declarative_base()
+
+
+class Target(Base):
+    __tablename__ = "targets"
+
+    target_chembl_id = Column(String, primary_key=True)
+    gene_symbol = Column(String, index=True)
+    pref_name = Column(String)
+    uniprot_accession = Column(String, index=True)
+
+
+class TargetStructure(Base):
+    """PDB entries solved for a target, so a PDB ID can be used as the lookup key"""
+    __tablename__ = "target_structures"
+
+    pdb_id = Column(String, primary_key=True)
+    target_chembl_id = Column(String, primary_key=True, index=True)
+
+
+class Compound(Base):
+    """One distinct structure; the InChIKey is the identity every lookup and cache can key on"""
+    __tablename__ = "compounds"
+
+    inchikey = Column(String, primary_key=True)
+    canonical_smiles = Column(String, nullable=False)
+    name = Column(String)
+    molecule_chembl_id = Column(String)
+
+
+class Measurement(Base):
+    """
+    One raw IC50 measurement in nM, kept so aggregates can be recomputed as
+    data arrives. A compound has at most one per target and assay ("" when
+    the source has no assay IDs), so re-ingesting a file replaces its values.
+    """
+    __tablename__ = "measurements"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    target_chembl_id = Column(String, nullable=False)
+    inchikey = Column(String, nullable=False)
+    assay_chembl_id = Column(String, nullable=False, default="")
+    ic50_nm = Column(Float, nullable=False)
+
+
+MEASUREMENT_KEY = ("target_chembl_id", "inchikey", "assay_chembl_id")
+Index(
+    "ux_measurements_target_compound_assay",
+    Measurement.target_chembl_id, Measurement.inchikey, Measurement.assay_chembl_id,
+    unique=True,
+)
+
+
+class Activity(Base):
+    """
+    One compound against one target: its measurements collapsed to the median
+    IC50 (nM), with the geometric mean and measurement count alongside
+    """
+    __tablename__ = "activities"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    target_chembl_id = Column(String, nullable=False)
+    molecule_chembl_id = Column(String)
+    name = Column(String)
+    canonical_smiles = Column(String, nullable=False)
+    ic50_nm = Column(Float, nullable=False)
+    pic50 = Column(Float, nullable=False)
+    inchikey = Column(String, index=True)
+    ic50_geomean_nm = Column(Float)
+    measurement_count = Column(Integer)
+
+
+# Serves "top-k most potent actives for a target" and keyset pagination straight from the index
+Index("ix_activities_target_potency", Activity.target_chembl_id, Activity.pic50.desc(), Activity.id)
+
+
+class ActivityVersion(Base):
+    """
+    Bumped each time a target's activities are rebuilt. SQLite reuses the
+    row ids of deleted rows, so count and highest id alone can repeat.
+    """
+    __tablename__ = "activity_versions"
+
+    target_chembl_id = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+def ic50_to_pic50(ic50_nm: float) -> float:
+    return 9.0 - math.log10(ic50_nm)
+
+
+class CompoundStore:
+    """Local, indexed copy of ChEMBL IC50 bioactivities"""
+
+    kind = "store"
+
+    def __init__(self, database_url: str):
+        connect_args = {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+        self.engine = create_engine(database_url, connect_args=connect_args)
+        self.Session = sessionmaker(bind=self.engine)
+
+    def create_schema(self) -> None:
+        Base.metadata.create_all(self.engine)
+        # Stores created before compounds were deduplicated lack the aggregate columns
+        existing = {column["name"] for column in inspect(self.engine).get_columns("activities")}
+        added = {"inchikey": "VARCHAR", "ic50_geomean_nm": "FLOAT", "measurement_count": "INTEGER"}
+        with self.engine.begin() as conn:
+            for name, sql_type in added.items():
+                if name not in existing:
+                    conn.execute(text(f"ALTER TABLE activities ADD COLUMN {name} {sql_type}"))
+            if "inchikey" not in existing:
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_activities_inchikey ON activities (inchikey)"))
+
+        # Stores created before ingest upserted measurements may hold repeats of one
+        measurement_columns = {column["name"] for column in inspect(self.engine).get_columns("measurements")}
+        if "assay_chembl_id" not in measurement_columns:
+            with self.engine.begin() as conn:
+                conn.execute(text("ALTER TABLE measurements ADD COLUMN assay_chembl_id VARCHAR NOT NULL DEFAULT ''"))
+                conn.execute(text(
+                    "DELETE FROM measurements WHERE id NOT IN "
+                    "(SELECT MIN(id) FROM measurements GROUP BY target_chembl_id, inchikey, assay_chembl_id)"
+                ))
+                conn.execute(text(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS ux_measurements_target_compound_assay "
+                    "ON measurements (target_chembl_id, inchikey, assay_chembl_id)"
+                ))
+
+    def insert_compounds(self, session, compounds: Iterable[Dict]) -> None:
+        """Add compounds whose InChIKey is not stored yet; existing rows are left alone"""
+        rows = list(compounds)
+        if not rows:
+            return
+        dialect = self.engine.dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            upsert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+            session.execute(upsert(Compound).on_conflict_do_nothing(index_elements=["inchikey"]), rows)
+            return
+        known = set(session.execute(
+            select(Compound.inchikey).where(Compound.inchikey.in_([row["inchikey"] for row in rows]))
+        ).scalars())
+        fresh = [row for row in rows if row["inchikey"] not in known]
+        if fresh:
+            session.execute(insert(Compound), fresh)
+
+    def upsert_measurements(self, session, measurements: Iterable[Dict]) -> int:
+        """
+        Store measurements keyed by (target, compound, assay), replacing the
+        value of any already stored. Returns how many distinct keys were written.
+        """
+        # Last one wins within a batch too; one statement cannot touch a row twice
+        rows = list({tuple(row[key] for key in MEASUREMENT_KEY): row for row in measurements}.values())
+        if not rows:
+            return 0
+        dialect = self.engine.dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            upsert = (sqlite.insert if dialect == "sqlite" else postgresql.insert)(Measurement)
+            session.execute(
+                upsert.on_conflict_do_update(index_elements=list(MEASUREMENT_KEY), set_={"ic50_nm": upsert.excluded.ic50_nm}),
+                rows,
+            )
+            return len(rows)
+        for row in rows:
+            existing = session.execute(
+                select(Measurement).where(*(getattr(Measurement, key) == row[key] for key in MEASUREMENT_KEY))
+            ).scalar_one_or_none()
+            if existing is None:
+                session.add(Measurement(**row))
+            else:
+                existing.ic50_nm = row["ic50_nm"]
+        return len(rows)
+
+    def rebuild_activities(self, target_chembl_ids: Iterable[str]) -> int:
+        """
+        Recompute the per-compound activity rows of each target from its raw
+        measurements, one target at a time so memory stays bounded.
+        Only the rows of compounds with measurements are replaced; activities
+        stored before measurements were kept are left as they are.
+        Returns the number of activity rows written.
+        """
+        written = 0
+        with self.Session() as session:
+            for target_id in target_chembl_ids:
+                values: Dict[str, List[float]] = {}
+                for inchikey, ic50_nm in session.execute(
+                    select(Measurement.inchikey, Measurement.ic50_nm)
+                    .where(Measurement.target_chembl_id == target_id)
+                ):
+                    values.setdefault(inchikey, []).append(ic50_nm)
+
+                compounds = {}
+                keys = list(values)
+                for start in range(0, len(keys), 500):
+                    for compound in session.execute(
+                        select(Compound).where(Compound.inchikey.in_(keys[start:start + 500]))
+                    ).scalars():
+                        compounds[compound.inchikey] = compound
+
+                rows = []
+                for inchikey, measurements in values.items():
+                    summary = aggregate_ic50(measurements)
+                    compound = compounds[inchikey]
+                    rows.append({
+                        "target_chembl_id": target_id,
+                        "molecule_chembl_id": compound.molecule_chembl_id,
+                        "name": compound.name,
+                        "canonical_smiles": compound.canonical_smiles,
+                        "ic50_nm": summary["ic50"],
+                        "pic50": ic50_to_pic50(summary["ic50"]),
+                        "inchikey": inchikey,
+                        "ic50_geomean_nm": summary["ic50_geomean"],
+                        "measurement_count": summary["measurement_count"],
+                    })
+                for start in range(0, len(rows), 500):
+                    chunk = rows[start:start + 500]
+                    # Older rows may lack an InChIKey; match those by structure instead
+                    session.execute(delete(Activity).where(
+                        Activity.target_chembl_id == target_id,
+                        or_(
+                            Activity.inchikey.in_([row["inchikey"] for row in chunk]),
+                            Activity.canonical_smiles.in_([row["canonical_smiles"] for row in chunk]),
+                        ),
+                    ))
+                if rows:
+                    session.execute(insert(Activity), rows)
+                version = session.get(ActivityVersion, target_id)
+                if version is None:
+                    session.add(ActivityVersion(target_chembl_id=target_id, version=1))
+                else:
+                    version.version += 1
+                written += len(rows)
+            session.commit()
+        return written
+
+    def compound_by_inchikey(self, inchikey: str) -> Optional[Dict]:
+        with self.Session() as session:
+            compound = session.get(Compound, inchikey.strip().upper())
+            if compound is None:
+                return None
+            return {
+                "inchikey": compound.inchikey,
+                "smiles": compound.canonical_smiles,
+                "name": compound.name,
+                "molecule_chembl_id": compound.molecule_chembl_id,
+            }
+
+    def resolve_target(self, identifier: str) -> Optional[Target]:
+        """Map a ChEMBL ID, gene symbol, UniProt accession or PDB ID to a target"""
+        key = identifier.upper().strip()
+        with self.Session() as session:
+            target = session.execute(
+                select(Target).where(
+                    or_(
+                        Target.target_chembl_id == key,
+                        Target.gene_symbol == key,
+                        Target.uniprot_accession == key,
+                    )
+                ).limit(1)
+            ).scalar_one_or_none()
+            if target is not None:
+                return target
+            return session.execute(
+                select(Target)
+                .join(TargetStructure, TargetStructure.target_chembl_id == Target.target_chembl_id)
+                .where(TargetStructure.pdb_id == key)
+                .limit(1)
+            ).scalar_one_or_none()
+
+    def top_actives(
+        self,
+        target_chembl_id: str,
+        limit: int,
+        after: Optional[Tuple[float, int]] = None,
+        most_potent_first: bool = True,
+    ) -> List[dict]:
+        """
+        Actives for a target ordered by potency, best first unless most_potent_first is False.
+
+        `after` is the (pic50, id) of the last row of the previous page; paging
+        by key instead of OFFSET keeps deep pages as cheap as the first one.
+        """
+        query = select(Activity).where(Activity.target_chembl_id == target_chembl_id)
+        if most_potent_first:
+            if after is not None:
+                last_pic50, last_id = after
+                query = query.where(
+                    or_(
+                        Activity.pic50 < last_pic50,
+                        (Activity.pic50 == last_pic50) & (Activity.id > last_id),
+                    )
+                )
+            query = query.order_by(Activity.pic50.desc(), Activity.id)
+        else:
+            # Exact reverse of the index order, so the same index serves it backwards
+            if after is not None:
+                last_pic50, last_id = after
+                query = query.where(
+                    or_(
+                        Activity.pic50 > last_pic50,
+                        (Activity.pic50 == last_pic50) & (Activity.id < last_id),
+                    )
+                )
+            query = query.order_by(Activity.pic50, Activity.id.desc())
+        query = query.limit(limit)
+
+        with self.Session() as session:
+            rows = session.execute(query).scalars().all()
+        return [_activity_row(row) for row in rows]
+
+    def actives_for_targets(self, target_chembl_ids: List[str], limit_per_target: int) -> Dict[str, List[dict]]:
+        """
+        The most potent actives of several targets in one query, each target
+        cut to limit_per_target by a window over the potency index order.
+        """
+        potency_rank = func.row_number().over(
+            partition_by=Activity.target_chembl_id, order_by=(Activity.pic50.desc(), Activity.id)
+        ).label("potency_rank")
+        ranked = (
+            select(Activity.id, potency_rank)
+            .where(Activity.target_chembl_id.in_(target_chembl_ids))
+            .subquery()
+        )
+        query = (
+            select(Activity)
+            .join(ranked, ranked.c.id == Activity.id)
+            .where(ranked.c.potency_rank <= limit_per_target)
+            .order_by(Activity.target_chembl_id, Activity.pic50.desc(), Activity.id)
+        )
+        grouped: Dict[str, List[dict]] = {target_id: [] for target_id in target_chembl_ids}
+        with self.Session() as session:
+            for row in session.execute(query).scalars():
+                grouped[row.target_chembl_id].append(_activity_row(row))
+        return grouped
+
+    def count_actives(self, target_chembl_id: str) -> int:
+        with self.Session() as session:
+            return session.execute(
+                select(func.count()).select_from(Activity).where(Activity.target_chembl_id == target_chembl_id)
+            ).scalar_one()
+
+    def activity_snapshot(self, target_chembl_id: str) -> Tuple[int, int, int]:
+        """
+        (row count, highest id, rebuild version) of a target's activities.
+        Every rebuild_activities run bumps the version, so any re-ingest
+        changes it even when SQLite hands the deleted rows' ids out again.
+        """
+        with self.Session() as session:
+            count, max_id = session.execute(
+                select(func.count(), func.max(Activity.id)).where(Activity.target_chembl_id == target_chembl_id)
+            ).one()
+            version = session.get(ActivityVersion, target_chembl_id)
+        return count, max_id or 0, version.version if version is not None else 0
+
+
+def _activity_row(row: Activity) -> dict:
+    return {
+        "id": row.id,
+        "smiles": row.canonical_smiles,
+        "name": row.name or row.molecule_chembl_id,
+        "molecule_chembl_id": row.molecule_chembl_id,
+        # Same scale as MOLECULE_DATABASE, which lists IC50 in µM
+        "ic50": row.ic50_nm / 1000.0,
+        "ic50_nm": row.ic50_nm,
+        "pic50": row.pic50,
+        "inchikey": row.inchikey,
+        "ic50_geomean": row.ic50_geomean_nm / 1000.0 if row.ic50_geomean_nm else None,
+        "measurement_count": row.measurement_count,
+    }
+
+
+_store: Optional[CompoundStore] = None
+_store_lock = threading.Lock()
+
+
+def get_compound_store() -> Optional[CompoundStore]:
+    """Return the shared store, or None when no database_url is configured"""
+    global _store
+    if _store is None and settings.database_url:
+        # Lookups run in worker threads, so the first few can race to open it
+        with _store_lock:
+            if _store is None:
+                store = CompoundStore(settings.database_url)
+                store.create_schema()
+                _store = store
+                logger.info("Compound store opened")
+    return _store
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import json
+import logging
+import mmap
+import os
+import zlib
+
+from app.config import settings
+from app.services.compound_store import ic50_to_pic50
+from app.utils.descriptors import DESCRIPTOR_COLUMNS
+from app.utils.lazy_imports import lazy_module
+
+np = lazy_module("numpy")
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AUCTBL01"
+# Every array starts on a cache-line boundary so it can be viewed in place
+ALIGN = 64
+INCHIKEY_LENGTH = 27
+STRING_COLUMNS = ("smiles", "name", "molecule_chembl_id")
+
+
+class TableTarget(NamedTuple):
+    """The fields of compound_store.Target that lookups use"""
+    target_chembl_id: str
+    pref_name: Optional[str]
+
+
+def _pad(length: int) -> int:
+    return -length % ALIGN
+
+
+def _encode_strings(values: Sequence[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Contiguous UTF-8 buffer plus n+1 offsets; None is stored as the empty string"""
+    encoded = [(value or "").encode() for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+    np.cumsum(np.array([len(value) for value in encoded], dtype="<i8"), out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+class CompoundTable:
+    """
+    All activities as columns instead of one dict per molecule.
+
+    Rows are grouped by target and ordered by potency within each target, so
+    a target's actives are the contiguous slice target_offsets[t]:target_offsets[t + 1]
+    and "top k" is a slice. Numbers live in NumPy arrays, targets are
+    dictionary-encoded, and SMILES, names and ChEMBL IDs are UTF-8 buffers
+    with offsets. A saved table is one file that load() memory-maps, so every
+    worker process shares the same pages. Rows become dicts only when a
+    response is built from them.
+
+    Serves the same lookups as CompoundStore (resolve_target, top_actives,
+    count_actives, activity_snapshot); a row's id is its index in the table.
+    """
+
+    kind = "table"
+
+    def __init__(
+        self,
+        columns: Dict[str, np.ndarray],
+        targets: List[str],
+        pref_names: List[Optional[str]],
+        aliases: Dict[str, int],
+    ):
+        self.columns = columns
+        self.targets = targets
+        self.pref_names = pref_names
+        self.aliases = aliases
+        self._target_index = {target: code for code, target in enumerate(targets)}
+        self._mmap: Optional[mmap.mmap] = None
+
+    def __len__(self) -> int:
+        return len(self.columns["pic50"])
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows_by_target: Dict[str, Sequence[dict]],
+        pref_names: Optional[Dict[str, str]] = None,
+        aliases: Optional[Dict[str, str]] = None,
+        descriptors: Optional[Dict[str, Sequence[float]]] = None,
+    ) -> "CompoundTable":
+        """
+        Build from activity dicts ("smiles", "ic50" in µM, optional "name",
+        "molecule_chembl_id", "inchikey", "ic50_geomean", "measurement_count")
+        keyed by target. aliases maps other identifiers (gene symbols, PDB IDs)
+        to target keys; descriptors maps SMILES to a DESCRIPTOR_COLUMNS row.
+        """
+        targets = sorted(rows_by_target)
+        rows: List[dict] = []
+        codes: List[int] = []
+        target_offsets = [0]
+        checksums = []
+        for code, target in enumerate(targets):
+            ranked = sorted(
+                (row for row in rows_by_target[target] if row.get("ic50") and row["ic50"] > 0),
+                key=lambda row: -ic50_to_pic50(row["ic50"] * 1000.0),
+            )
+            rows.extend(ranked)
+            codes.extend([code] * len(ranked))
+            target_offsets.append(len(rows))
+            # Changes whenever the target's rows do; the table's counterpart of a row-id snapshot
+            checksums.append(zlib.crc32(json.dumps(ranked, sort_keys=True, default=str).encode()))
+
+        columns = {
+            "target_code": np.array(codes, dtype="<u2" if len(targets) < 2 ** 16 else "<u4"),
+            "target_offsets": np.array(target_offsets, dtype="<i8"),
+            "target_checksums": np.array(checksums, dtype="<u4"),
+            "ic50": np.array([row["ic50"] for row in rows], dtype="<f8"),
+            "ic50_geomean": np.array(
+                [row.get("ic50_geomean") if row.get("ic50_geomean") is not None else np.nan for row in rows], dtype="<f8"
+            ),
+            "measurement_count": np.array([row.get("measurement_count") or 1 for row in rows], dtype="<i4"),
+            "inchikey": np.array([(row.get("inchikey") or "").encode() for row in rows], dtype=f"S{INCHIKEY_LENGTH}"),
+        }
+        columns["pic50"] = 6.0 - np.log10(columns["ic50"])
+        if descriptors is not None:
+            missing = [np.nan] * len(DESCRIPTOR_COLUMNS)
+            columns["descriptors"] = np.array(
+                [descriptors.get(row["smiles"]) or missing for row in rows], dtype="<f8"
+            ).reshape(len(rows), len(DESCRIPTOR_COLUMNS))
+        for name in STRING_COLUMNS:
+            columns[f"{name}_data"], columns[f"{name}_offsets"] = _encode_strings([row.get(name) for row in rows])
+
+        index = {target: code for code, target in enumerate(targets)}
+        alias_codes = {target: code for target, code in index.items()}
+        for alias, target in (aliases or {}).items():
+            if target in index:
+                alias_codes.setdefault(alias.upper().strip(), index[target])
+        names = [(pref_names or {}).get(target) for target in targets]
+        return cls(columns, targets, names, alias_codes)
+
+    def save(self, path: str) -> str:
+        """Header (JSON) then every column, each aligned so load() can view it in place"""
+        layout = {}
+        offset = 0
+        for name, array in self.columns.items():
+            array = np.ascontiguousarray(array)
+            layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset += array.nbytes + _pad(array.nbytes)
+        header = json.dumps({
+            "rows": len(self),
+            "targets": self.targets,
+            "pref_names": self.pref_names,
+            "aliases": self.aliases,
+            "columns": layout,
+        }).encode()
+        prefix = len(MAGIC) + 8 + len(header)
+        header += b" " * _pad(prefix)
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as fh:
+            fh.write(MAGIC)
+            fh.write(len(header).to_bytes(8, "little"))
+            fh.write(header)
+            for name, array in self.columns.items():
+                data = np.ascontiguousarray(array).tobytes()
+                fh.write(data)
+                fh.write(b"\0" * _pad(len(data)))
+        # Readers mapping the old file keep their pages; new loads see the complete new one
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "CompoundTable":
+        """Memory-map a saved table; columns are read-only views of the file"""
+        with open(path, "rb") as fh:
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:len(MAGIC)] != MAGIC:
+            mapped.close()
+            raise ValueError(f"{path} is not a compound table")
+        header_length = int.from_bytes(mapped[len(MAGIC):len(MAGIC) + 8], "little")
+        data_start = len(MAGIC) + 8 + header_length
+        header = json.loads(mapped[len(MAGIC) + 8:data_start])
+
+        columns = {}
+        for name, spec in header["columns"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"])) if spec["shape"] else 1
+            columns[name] = np.frombuffer(
+                mapped, dtype=dtype, count=count, offset=data_start + spec["offset"]
+            ).reshape(spec["shape"])
+        table = cls(columns, header["targets"], header["pref_names"], header["aliases"])
+        table._mmap = mapped
+        return table
+
+    def _string(self, name: str, row: int) -> str:
+        offsets = self.columns[f"{name}_offsets"]
+        return self.columns[f"{name}_data"][offsets[row]:offsets[row + 1]].tobytes().decode()
+
+    def _code(self, target_chembl_id: str) -> Optional[int]:
+        return self._target_index.get(target_chembl_id)
+
+    def _bounds(self, target_chembl_id: str) -> Tuple[int, int]:
+        code = self._code(target_chembl_id)
+        if code is None:
+            return 0, 0
+        offsets = self.columns["target_offsets"]
+        return int(offsets[code]), int(offsets[code + 1])
+
+    def row(self, index: int) -> dict:
+        """One row as the dict CompoundStore.top_actives produces"""
+        columns = self.columns
+        ic50 = float(columns["ic50"][index])
+        geomean = float(columns["ic50_geomean"][index])
+        row = {
+            "id": index,
+            "smiles": self._string("smiles", index),
+            "name": self._string("name", index) or self._string("molecule_chembl_id", index),
+            "molecule_chembl_id": self._string("molecule_chembl_id", index) or None,
+            "ic50": ic50,
+            "ic50_nm": ic50 * 1000.0,
+            "pic50": float(columns["pic50"][index]),
+            "inchikey": columns["inchikey"][index].decode() or None,
+            "ic50_geomean": None if np.isnan(geomean) else geomean,
+            "measurement_count": int(columns["measurement_count"][index]),
+        }
+        if "descriptors" in columns:
+            weight = float(columns["descriptors"][index, DESCRIPTOR_COLUMNS.index("mol_wt")])
+            row["molecular_weight"] = None if np.isnan(weight) else weight
+        return row
+
+    def resolve_target(self, identifier: str) -> Optional[TableTarget]:
+        code = self.aliases.get(identifier.upper().strip())
+        if code is None:
+            return None
+        return TableTarget(self.targets[code], self.pref_names[code])
+
+    def top_actives(
+        self,
+        target_chembl_id: str,
+        limit: int,
+        after: Optional[Tuple[float, int]] = None,
+        most_potent_first: bool = True,
+    ) -> List[dict]:
+        """Same contract as CompoundStore.top_actives; `after` only needs the previous row's id"""
+        start, end = self._bounds(target_chembl_id)
+        if most_potent_first:
+            first = start if after is None else max(start, after[1] + 1)
+            indices = range(first, min(end, first + limit))
+        else:
+            last = end - 1 if after is None else min(end - 1, after[1] - 1)
+            indices = range(last, max(start - 1, last - limit), -1)
+        return [self.row(index) for index in indices]
+
+    def actives_for_targets(self, target_chembl_ids: List[str], limit_per_target: int) -> Dict[str, List[dict]]:
+        return {target: self.top_actives(target, limit_per_target) for target in target_chembl_ids}
+
+    def count_actives(self, target_chembl_id: str) -> int:
+        start, end = self._bounds(target_chembl_id)
+        return end - start
+
+    def activity_snapshot(self, target_chembl_id: str) -> Tuple[int, int]:
+        code = self._code(target_chembl_id)
+        if code is None:
+            return 0, 0
+        return self.count_actives(target_chembl_id), int(self.columns["target_checksums"][code])
+
+    def memory_bytes(self) -> int:
+        return sum(array.nbytes for array in self.columns.values())
+
+
+def builtin_rows() -> Tuple[Dict[str, List[dict]], Dict[str, str], Dict[str, str]]:
+    """MOLECULE_DATABASE (canonicalized) as table input: rows, protein names and aliases"""
+    from app.services.chembl_service import BUILTIN_TARGET_ALIASES, MOLECULE_DATABASE, PROTEIN_NAMES, _canonical_builtin
+
+    # DEFAULT is the fallback for unknown targets, not a target of its own
+    rows = {key: list(_canonical_builtin(key)) for key in MOLECULE_DATABASE if key != "DEFAULT"}
+    return rows, {key: PROTEIN_NAMES.get(key) for key in rows}, dict(BUILTIN_TARGET_ALIASES)
+
+
+_table: Optional[CompoundTable] = None
+_checked = False
+
+
+def load_compound_table() -> Optional[CompoundTable]:
+    global _table, _checked
+    _checked = True
+    path = settings.compound_table_path
+    if path and os.path.exists(path):
+        _table = CompoundTable.load(path)
+        logger.info(
+            f"Compound table mapped from {path} ({len(_table)} rows, "
+            f"{len(_table.targets)} targets, {_table.memory_bytes() / 1e6:.1f} MB)"
+        )
+    return _table
+
+
+def get_compound_table() -> Optional[CompoundTable]:
+    """The shared memory-mapped table, or None when COMPOUND_TABLE_PATH is unset or missing"""
+    if not _checked:
+        return load_compound_table()
+    return _table
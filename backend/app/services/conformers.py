@@ -0,0 +1,184 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+
+from app.config import settings
+from app.utils import compute_pool
+from app.utils.canonical import canonicalize
+from app.utils.depiction_cache import DepictionCache
+from app.utils.lazy_imports import lazy_module, silence_rdkit_log
+
+Chem = lazy_module("rdkit.Chem", on_load=silence_rdkit_log)
+AllChem = lazy_module("rdkit.Chem.AllChem")
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARAMS = {
+    "num_conformers": 10,
+    "random_seed": 42,
+    # Conformers closer than this heavy-atom RMSD (Å) to a kept one are dropped
+    "prune_rms": 0.5,
+    "max_iters": 500,
+}
+CACHE_FORMAT = "conf.json"
+
+# Same two-tier (memory LRU + files) byte cache the depictions use
+conformer_cache = DepictionCache(
+    max_entries=settings.conformer_cache_size,
+    disk_dir=settings.conformer_cache_dir,
+)
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+def conformer_params(**overrides) -> Dict:
+    return {**DEFAULT_PARAMS, **{key: value for key, value in overrides.items() if value is not None}}
+
+
+def conformer_key(inchikey: str, params: Dict) -> str:
+    """InChIKey plus a digest of the embedding parameters"""
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:12]
+    return f"{inchikey}-{digest}"
+
+
+def embed_conformers(smiles: str, params: Dict, num_threads: int) -> Optional[Dict]:
+    """
+    ETKDG embedding then MMFF94 optimization (UFF when MMFF lacks parameters),
+    conformers sorted by energy and written as one SDF. None if the molecule
+    cannot be parsed or embedded.
+    """
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None:
+        return None
+    mol = Chem.AddHs(mol)
+
+    embed_params = AllChem.ETKDGv3()
+    embed_params.randomSeed = params["random_seed"]
+    embed_params.pruneRmsThresh = params["prune_rms"]
+    embed_params.numThreads = num_threads
+    conformer_ids = list(AllChem.EmbedMultipleConfs(mol, params["num_conformers"], embed_params))
+    if not conformer_ids:
+        # Strained or large ring systems often only embed from random coordinates
+        embed_params.useRandomCoords = True
+        conformer_ids = list(AllChem.EmbedMultipleConfs(mol, params["num_conformers"], embed_params))
+    if not conformer_ids:
+        return None
+
+    if AllChem.MMFFHasAllMoleculeParams(mol):
+        force_field = "MMFF94"
+        outcomes = AllChem.MMFFOptimizeMoleculeConfs(mol, numThreads=num_threads, maxIters=params["max_iters"])
+    else:
+        force_field = "UFF"
+        outcomes = AllChem.UFFOptimizeMoleculeConfs(mol, numThreads=num_threads, maxIters=params["max_iters"])
+
+    ranked = sorted(zip(conformer_ids, outcomes), key=lambda item: item[1][1])
+    buffer = io.StringIO()
+    writer = Chem.SDWriter(buffer)
+    for rank, (conformer_id, (not_converged, energy)) in enumerate(ranked):
+        mol.SetProp("_Name", f"{smiles} conformer {rank}")
+        mol.SetDoubleProp("energy_kcal_mol", energy)
+        mol.SetIntProp("converged", int(not_converged == 0))
+        writer.write(mol, confId=conformer_id)
+    writer.close()
+    return {
+        "force_field": force_field,
+        "energies": [energy for _, (_, energy) in ranked],
+        "converged": [not_converged == 0 for _, (not_converged, _) in ranked],
+        "sdf": buffer.getvalue(),
+    }
+
+
+def embed_batch(smiles_list: List[str], params: Dict, num_threads: int) -> List[Optional[Dict]]:
+    """
+    embed_conformers for each SMILES.
+    Runs inside compute pool workers, so it must stay a module-level function.
+    """
+    return [embed_conformers(smiles, params, num_threads) for smiles in smiles_list]
+
+
+def _threads_per_worker() -> int:
+    """RDKit threads per embedding, so pool workers together use every core once"""
+    if settings.conformer_threads > 0:
+        return settings.conformer_threads
+    return max(1, (os.cpu_count() or 1) // max(compute_pool.pool_size(), 1))
+
+
+def cached_conformers(key: str) -> Optional[Dict]:
+    data = conformer_cache.get(key, CACHE_FORMAT)
+    return json.loads(data) if data is not None else None
+
+
+async def _embed_missing(missing: Dict[str, Tuple[str, str]], params: Dict) -> Dict[str, Optional[Dict]]:
+    """
+    Embed every (canonical SMILES, InChIKey) under its key. Keys another
+    request is already embedding are awaited instead of embedded twice.
+    """
+    loop = asyncio.get_running_loop()
+    shared = {key: _inflight[key] for key in missing if key in _inflight}
+    owned = {key: value for key, value in missing.items() if key not in shared}
+    for key in owned:
+        _inflight[key] = loop.create_future()
+
+    records: Dict[str, Optional[Dict]] = {}
+    try:
+        if owned:
+            keys = list(owned)
+            results = await compute_pool.map_batches(
+                embed_batch, [owned[key][0] for key in keys], params, _threads_per_worker(), min_batch=1
+            )
+            for key, result in zip(keys, results):
+                smiles, inchikey = owned[key]
+                record = None
+                if result is not None:
+                    record = {"key": key, "smiles": smiles, "inchikey": inchikey, "params": params, **result}
+                    conformer_cache.put(key, CACHE_FORMAT, json.dumps(record).encode())
+                records[key] = record
+                _inflight[key].set_result(record)
+    except BaseException as e:
+        for key in owned:
+            if not _inflight[key].done():
+                _inflight[key].set_exception(e)
+                # Nobody else may be waiting; don't warn about an unretrieved exception
+                _inflight[key].exception()
+        raise
+    finally:
+        for key in owned:
+            _inflight.pop(key, None)
+
+    for key, future in shared.items():
+        records[key] = await asyncio.shield(future)
+    return records
+
+
+async def generate_conformers(smiles_list: Sequence[str], params: Optional[Dict] = None) -> List[Optional[Dict]]:
+    """
+    Conformer sets for a batch, in input order: {"key", "smiles", "inchikey",
+    "params", "force_field", "energies", "converged", "sdf", "cached"}, or
+    None for SMILES that do not parse or embed.
+
+    Results are cached by InChIKey plus parameters, so a molecule is embedded
+    once however it is written and however many requests ask for it.
+    """
+    params = params or conformer_params()
+    identities = await canonicalize(smiles_list)
+    keys = [conformer_key(identity[1], params) if identity else None for identity in identities]
+
+    found: Dict[str, Optional[Dict]] = {}
+    missing: Dict[str, Tuple[str, str]] = {}
+    for key, identity in zip(keys, identities):
+        if key is None or key in found or key in missing:
+            continue
+        record = cached_conformers(key)
+        if record is not None:
+            found[key] = {**record, "cached": True}
+        else:
+            missing[key] = identity
+
+    if missing:
+        for key, record in (await _embed_missing(missing, params)).items():
+            found[key] = {**record, "cached": False} if record is not None else None
+    logger.info(f"Conformers for {len(smiles_list)} molecules: {len(missing)} embedded, {len(found) - len(missing)} cached")
+    return [found.get(key) if key is not None else None for key in keys]
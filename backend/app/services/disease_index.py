@@ -0,0 +1,263 @@
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+import csv
+import gzip
+import json
+import logging
+import os
+import re
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+# Below this a fuzzy match is more likely noise than a typo
+MIN_MATCH_SCORE = 0.4
+# Names rescored with edit distance after the trigram pass
+RERANK_CANDIDATES = 8
+# Diseases this close to the best match contribute targets too (e.g. "lung" -> lung cancer, NSCLC)
+MATCH_SCORE_WINDOW = 0.1
+
+# Built-in associations used when no TSV/serialized index is configured:
+# (disease, synonyms, target symbol, protein name, target id, association score, pathways).
+# Target ids are keys /fetch_chambl_data/ understands. Scores are curated
+# approximations of Open Targets overall association scores.
+BUILTIN_ASSOCIATIONS = [
+    ("Cancer", "neoplasm|tumor|tumour|carcinoma|malignancy", "TP53", "Tumor Protein P53", "1TUP", 0.68, "p53 ras"),
+    ("Cancer", "neoplasm|tumor|tumour|carcinoma|malignancy", "EGFR", "Epidermal growth factor receptor", "EGFR", 0.52, "EGFR signaling|MAPK"),
+    ("Cancer", "neoplasm|tumor|tumour|carcinoma|malignancy", "KDR", "Vascular endothelial growth factor receptor 2", "VEGFR2", 0.47, "VEGF signaling|Angiogenesis"),
+    ("Breast cancer", "breast carcinoma|mammary cancer", "ERBB2", "Receptor tyrosine-protein kinase erbB-2", "HER2", 0.82, "ERBB2 signaling|PI3K-Akt"),
+    ("Breast cancer", "breast carcinoma|mammary cancer", "TP53", "Tumor Protein P53", "1TUP", 0.64, "p53 signaling"),
+    ("Breast cancer", "breast carcinoma|mammary cancer", "EGFR", "Epidermal growth factor receptor", "EGFR", 0.41, "EGFR signaling"),
+    ("Non-small cell lung cancer", "lung cancer|lung carcinoma|nsclc|lung adenocarcinoma", "EGFR", "Epidermal growth factor receptor", "EGFR", 0.86, "EGFR tyrosine kinase inhibitor resistance|MAPK"),
+    ("Non-small cell lung cancer", "lung cancer|lung carcinoma|nsclc|lung adenocarcinoma", "TP53", "Tumor Protein P53", "1TUP", 0.61, "p53 signaling"),
+    ("Non-small cell lung cancer", "lung cancer|lung carcinoma|nsclc|lung adenocarcinoma", "BRAF", "Serine/threonine-protein kinase B-raf", "BRAF", 0.35, "MAPK signaling"),
+    ("Melanoma", "cutaneous melanoma|skin melanoma|malignant melanoma", "BRAF", "Serine/threonine-protein kinase B-raf", "BRAF", 0.88, "MAPK signaling|RAS-RAF-MEK-ERK"),
+    ("Melanoma", "cutaneous melanoma|skin melanoma|malignant melanoma", "TP53", "Tumor Protein P53", "1TUP", 0.37, "p53 signaling"),
+    ("Colorectal cancer", "colon cancer|rectal cancer|crc|colorectal carcinoma", "TP53", "Tumor Protein P53", "1TUP", 0.66, "p53 signaling|Wnt"),
+    ("Colorectal cancer", "colon cancer|rectal cancer|crc|colorectal carcinoma", "EGFR", "Epidermal growth factor receptor", "EGFR", 0.58, "EGFR signaling|MAPK"),
+    ("Colorectal cancer", "colon cancer|rectal cancer|crc|colorectal carcinoma", "BRAF", "Serine/threonine-protein kinase B-raf", "BRAF", 0.52, "MAPK signaling"),
+    ("Glioblastoma", "glioblastoma multiforme|gbm|brain cancer", "EGFR", "Epidermal growth factor receptor", "EGFR", 0.71, "EGFR signaling|PI3K-Akt"),
+    ("Glioblastoma", "glioblastoma multiforme|gbm|brain cancer", "TP53", "Tumor Protein P53", "1TUP", 0.62, "p53 signaling"),
+    ("Renal cell carcinoma", "kidney cancer|rcc|clear cell renal carcinoma", "KDR", "Vascular endothelial growth factor receptor 2", "VEGFR2", 0.74, "VEGF signaling|Angiogenesis|HIF-1"),
+    ("Hepatocellular carcinoma", "liver cancer|hcc|hepatoma", "KDR", "Vascular endothelial growth factor receptor 2", "VEGFR2", 0.63, "VEGF signaling|Angiogenesis"),
+    ("Hepatocellular carcinoma", "liver cancer|hcc|hepatoma", "TP53", "Tumor Protein P53", "1TUP", 0.58, "p53 signaling"),
+    ("Gastric cancer", "stomach cancer|gastric adenocarcinoma", "ERBB2", "Receptor tyrosine-protein kinase erbB-2", "HER2", 0.61, "ERBB2 signaling"),
+    ("Gastric cancer", "stomach cancer|gastric adenocarcinoma", "TP53", "Tumor Protein P53", "1TUP", 0.55, "p53 signaling"),
+    ("Thyroid cancer", "papillary thyroid carcinoma|thyroid carcinoma", "BRAF", "Serine/threonine-protein kinase B-raf", "BRAF", 0.79, "MAPK signaling"),
+    ("Ovarian cancer", "ovarian carcinoma|high grade serous ovarian cancer", "TP53", "Tumor Protein P53", "1TUP", 0.77, "p53 signaling|DNA damage response"),
+]
+
+TSV_COLUMNS = ["disease_id", "disease_name", "synonyms", "target_symbol", "target_name", "target_id", "score", "pathways"]
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", name.lower()).split())
+
+
+def trigrams(text: str) -> set:
+    """Character trigrams with pg_trgm-style padding, so short words and word starts still match"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_similarity(a: str, b: str) -> float:
+    """1 - Levenshtein distance / longer length"""
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        previous = current
+    return 1.0 - previous[-1] / max(len(a), len(b))
+
+
+class DiseaseTargetIndex:
+    """
+    Disease -> target associations with an inverted trigram index over every
+    disease name and synonym. A query only touches the postings of its own
+    trigrams; the few best candidates are then rescored by edit distance.
+    """
+
+    def __init__(
+        self,
+        diseases: List[dict],
+        names: List[Tuple[str, int]],
+        associations: List[List[dict]],
+        postings: Optional[Dict[str, List[int]]] = None,
+    ):
+        self.diseases = diseases
+        # (normalized name, disease row) for names and synonyms alike
+        self.names = names
+        # Per disease, sorted by association score, best first
+        self.associations = associations
+        self.postings = postings if postings is not None else self._build_postings(names)
+        self._exact = {name: disease for name, disease in names}
+        self._trigram_counts = [len(trigrams(name)) for name, _ in names]
+
+    def __len__(self) -> int:
+        return len(self.diseases)
+
+    @staticmethod
+    def _build_postings(names: List[Tuple[str, int]]) -> Dict[str, List[int]]:
+        postings: Dict[str, List[int]] = {}
+        for name_id, (name, _) in enumerate(names):
+            for gram in trigrams(name):
+                postings.setdefault(gram, []).append(name_id)
+        return postings
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict]) -> "DiseaseTargetIndex":
+        """Build from association rows with the TSV_COLUMNS fields"""
+        disease_rows: Dict[str, int] = {}
+        diseases: List[dict] = []
+        names: Dict[str, int] = {}
+        associations: List[Dict[str, dict]] = []
+        for row in rows:
+            disease_key = row.get("disease_id") or normalize_name(row["disease_name"])
+            if disease_key not in disease_rows:
+                disease_rows[disease_key] = len(diseases)
+                diseases.append({"id": disease_key, "name": row["disease_name"]})
+                associations.append({})
+            disease = disease_rows[disease_key]
+            for name in [row["disease_name"], *(row.get("synonyms") or "").split("|")]:
+                if normalize_name(name):
+                    names.setdefault(normalize_name(name), disease)
+
+            symbol = row["target_symbol"].strip().upper()
+            score = float(row["score"])
+            known = associations[disease].get(symbol)
+            if known is not None and known["score"] >= score:
+                continue
+            associations[disease][symbol] = {
+                "symbol": symbol,
+                "name": row.get("target_name") or symbol,
+                "target_id": row.get("target_id") or symbol,
+                "score": score,
+                "pathways": [p.strip() for p in re.split(r"[|;]", row.get("pathways") or "") if p.strip()],
+            }
+        return cls(
+            diseases,
+            sorted(names.items()),
+            [sorted(targets.values(), key=lambda t: -t["score"]) for targets in associations],
+        )
+
+    @classmethod
+    def from_tsv(cls, path: str) -> "DiseaseTargetIndex":
+        with open(path, newline="") as fh:
+            return cls.from_rows(csv.DictReader(fh, delimiter="\t"))
+
+    @classmethod
+    def builtin(cls) -> "DiseaseTargetIndex":
+        return cls.from_rows(dict(zip(TSV_COLUMNS, ("", *row))) for row in BUILTIN_ASSOCIATIONS)
+
+    def save(self, path: str) -> None:
+        """Gzipped JSON including the trigram postings, so loading skips the rebuild"""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = {
+            "version": INDEX_VERSION,
+            "diseases": self.diseases,
+            "names": self.names,
+            "associations": self.associations,
+            "postings": self.postings,
+        }
+        with gzip.open(path, "wt") as fh:
+            json.dump(payload, fh, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> "DiseaseTargetIndex":
+        with gzip.open(path, "rt") as fh:
+            payload = json.load(fh)
+        if payload.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported disease index version in {path}")
+        return cls(
+            payload["diseases"],
+            [(name, disease) for name, disease in payload["names"]],
+            payload["associations"],
+            payload["postings"],
+        )
+
+    def match_diseases(self, query: str, limit: int = 5) -> List[Tuple[int, float]]:
+        """(disease row, match score) for the closest disease names, best first"""
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+        if normalized in self._exact:
+            return [(self._exact[normalized], 1.0)]
+
+        query_grams = trigrams(normalized)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self.postings.get(gram, ()))
+        # Jaccard over trigram sets picks the shortlist cheaply
+        shortlist = sorted(
+            shared.items(),
+            key=lambda item: -item[1] / (len(query_grams) + self._trigram_counts[item[0]] - item[1]),
+        )[:RERANK_CANDIDATES]
+
+        best: Dict[int, float] = {}
+        for name_id, common in shortlist:
+            name, disease = self.names[name_id]
+            jaccard = common / (len(query_grams) + self._trigram_counts[name_id] - common)
+            # Containment rewards partial names ("breast" for "breast cancer")
+            containment = common / len(query_grams) if normalized in name else 0.0
+            score = max(jaccard, edit_similarity(normalized, name), 0.9 * containment)
+            if score >= MIN_MATCH_SCORE and score > best.get(disease, 0.0):
+                best[disease] = score
+        return sorted(best.items(), key=lambda item: -item[1])[:limit]
+
+    def find_targets(self, query: str, limit: int = 10) -> List[dict]:
+        """Targets of the best-matching diseases ranked by association score"""
+        matches = self.match_diseases(query)
+        if not matches:
+            return []
+        top_score = matches[0][1]
+        targets: Dict[str, dict] = {}
+        for disease, match_score in matches:
+            if match_score < top_score - MATCH_SCORE_WINDOW:
+                break
+            for association in self.associations[disease]:
+                known = targets.get(association["symbol"])
+                if known is None or association["score"] > known["score"]:
+                    targets[association["symbol"]] = {
+                        **association,
+                        "disease": self.diseases[disease]["name"],
+                        "match_score": match_score,
+                    }
+        return sorted(targets.values(), key=lambda t: (-t["score"], t["symbol"]))[:limit]
+
+
+_index: Optional[DiseaseTargetIndex] = None
+
+
+def load_disease_index() -> DiseaseTargetIndex:
+    """Load the serialized index, else build it from the TSV (saving it for next time), else use built-ins"""
+    global _index
+    path = settings.disease_index_path
+    tsv = settings.disease_associations_tsv
+    if path and os.path.exists(path):
+        _index = DiseaseTargetIndex.load(path)
+        logger.info(f"Disease index loaded from {path} ({len(_index)} diseases)")
+    elif tsv and os.path.exists(tsv):
+        _index = DiseaseTargetIndex.from_tsv(tsv)
+        if path:
+            _index.save(path)
+        logger.info(f"Disease index built from {tsv} ({len(_index)} diseases)")
+    else:
+        _index = DiseaseTargetIndex.builtin()
+        logger.info(f"Disease index built from built-in associations ({len(_index)} diseases)")
+    return _index
+
+
+def get_disease_index() -> DiseaseTargetIndex:
+    return _index if _index is not None else load_disease_index()
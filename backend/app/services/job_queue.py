@@ -0,0 +1,312 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+# Running jobs are heartbeated this often (seconds); one not heartbeated for
+# STALE_AFTER belongs to a process that died and is put back on the queue
+HEARTBEAT_INTERVAL = 10.0
+STALE_AFTER = 60.0
+# Idle workers also poll this often, for jobs other processes submit or requeue
+POLL_INTERVAL = 5.0
+# Event streams re-read the database this often, for events other processes record
+EVENT_POLL_INTERVAL = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT,
+    owner TEXT,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_status_created ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    stage TEXT NOT NULL,
+    progress REAL NOT NULL,
+    message TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_job_events_job ON job_events (job_id, id);
+"""
+
+
+class JobContext:
+    """Handed to a running pipeline so it can report stage progress"""
+
+    def __init__(self, queue: "JobQueue", job_id: str, params: Dict):
+        self.queue = queue
+        self.job_id = job_id
+        self.params = params
+
+    async def report(self, stage: str, progress: float, message: str = "", data: Any = None) -> None:
+        await self.queue.add_event(self.job_id, stage, progress, message, data)
+
+
+Pipeline = Callable[[JobContext], Awaitable[Any]]
+
+
+class JobQueue:
+    """
+    Persistent local job queue: jobs and their progress events live in SQLite,
+    and a fixed number of asyncio workers drain it. Several processes (e.g.
+    uvicorn workers) can share one file: jobs are claimed atomically, each
+    running job records its owner and a heartbeat, and only jobs whose owner
+    stopped heartbeating are put back on the queue.
+
+    SQLite calls block, so the async methods run them in a worker thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pipelines: Dict[str, Pipeline] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        # Notified whenever any job records an event; SSE streams wait on it
+        self._changed: Optional[asyncio.Condition] = None
+        self._version = 0
+        self._workers: List[asyncio.Task] = []
+        self._heartbeat: Optional[asyncio.Task] = None
+        # Identifies this process's claims among everyone sharing the file
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def register(self, kind: str, pipeline: Pipeline) -> None:
+        self.pipelines[kind] = pipeline
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            rows = cursor.fetchall()
+            self._conn.commit()
+            return rows
+
+    async def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        return await asyncio.to_thread(self._execute, sql, params)
+
+    def open(self) -> None:
+        if self._conn is not None:
+            return
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        # Queues created before jobs had owners
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for name, sql_type in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+            if name not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {sql_type}")
+        self._conn.commit()
+
+    async def requeue_stale(self) -> int:
+        """Put back running jobs whose owner has not heartbeated for STALE_AFTER seconds"""
+        requeued = len(await self._query(
+            "UPDATE jobs SET status = 'queued', started_at = NULL, owner = NULL, heartbeat_at = NULL "
+            "WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?) RETURNING id",
+            (time.time() - STALE_AFTER,),
+        ))
+        if requeued:
+            logger.info(f"Requeued {requeued} jobs abandoned by a stopped worker")
+            if self._wakeup is not None:
+                self._wakeup.set()
+        return requeued
+
+    async def _keep_alive(self) -> None:
+        """Heartbeat this process's running jobs and requeue other processes' abandoned ones"""
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            try:
+                await self._query(
+                    "UPDATE jobs SET heartbeat_at = ? WHERE status = 'running' AND owner = ?",
+                    (time.time(), self.owner),
+                )
+                await self.requeue_stale()
+            except sqlite3.Error as e:
+                logger.warning(f"Job heartbeat failed: {e}")
+
+    async def start(self, workers: int) -> None:
+        await asyncio.to_thread(self.open)
+        self._wakeup = asyncio.Event()
+        self._changed = asyncio.Condition()
+        await self.requeue_stale()
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(max(workers, 1))]
+        self._heartbeat = asyncio.create_task(self._keep_alive())
+        self._wakeup.set()
+        logger.info(f"Job queue started with {len(self._workers)} workers")
+
+    async def stop(self) -> None:
+        tasks = self._workers + ([self._heartbeat] if self._heartbeat is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._heartbeat = None
+        if self._conn is not None:
+            # Our jobs were cancelled mid-run; hand them straight back instead of waiting to go stale
+            requeued = len(await self._query(
+                "UPDATE jobs SET status = 'queued', started_at = NULL, owner = NULL, heartbeat_at = NULL "
+                "WHERE status = 'running' AND owner = ? RETURNING id",
+                (self.owner,),
+            ))
+            if requeued:
+                logger.info(f"Requeued {requeued} jobs interrupted by shutdown")
+            await asyncio.to_thread(self._conn.close)
+            self._conn = None
+
+    async def submit(self, kind: str, params: Dict) -> str:
+        if kind not in self.pipelines:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex
+        await self._query(
+            "INSERT INTO jobs (id, kind, params, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+            (job_id, kind, json.dumps(params), time.time()),
+        )
+        await self.add_event(job_id, "queued", 0.0, "Job queued")
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        rows = await self._query("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        if not rows:
+            return None
+        job = dict(rows[0])
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    async def add_event(self, job_id: str, stage: str, progress: float, message: str = "", data: Any = None) -> None:
+        await self._query(
+            "INSERT INTO job_events (job_id, created_at, stage, progress, message, data) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, time.time(), stage, progress, message, json.dumps(data) if data is not None else None),
+        )
+        self._version += 1
+        if self._changed is not None:
+            async with self._changed:
+                self._changed.notify_all()
+
+    async def events_since(self, job_id: str, after_id: int = 0) -> List[Dict]:
+        rows = await self._query(
+            "SELECT * FROM job_events WHERE job_id = ? AND id > ? ORDER BY id", (job_id, after_id)
+        )
+        events = []
+        for row in rows:
+            event = dict(row)
+            event["data"] = json.loads(event["data"]) if event["data"] is not None else None
+            events.append(event)
+        return events
+
+    async def stream_events(self, job_id: str, after_id: int = 0, heartbeat: float = 15.0) -> AsyncIterator[Optional[Dict]]:
+        """
+        Replay stored events after after_id, then follow new ones until the job
+        finishes. Yields None when nothing happened for `heartbeat` seconds so
+        the caller can keep the connection alive.
+
+        Events recorded in this process wake the stream at once; those a worker
+        in another process records are found by re-reading the database every
+        EVENT_POLL_INTERVAL seconds.
+        """
+        idle_since = time.monotonic()
+        while True:
+            seen_version = self._version
+            events = await self.events_since(job_id, after_id)
+            for event in events:
+                after_id = event["id"]
+                yield event
+            job = await self.get(job_id)
+            if job is None or (job["status"] in TERMINAL_STATUSES and not events):
+                return
+            if events:
+                idle_since = time.monotonic()
+                continue
+            try:
+                async with self._changed:
+                    await asyncio.wait_for(
+                        self._changed.wait_for(lambda: self._version != seen_version), timeout=EVENT_POLL_INTERVAL
+                    )
+            except asyncio.TimeoutError:
+                if time.monotonic() - idle_since >= heartbeat:
+                    idle_since = time.monotonic()
+                    yield None
+
+    async def _claim_next(self) -> Optional[Dict]:
+        """
+        Take the oldest queued job in one statement, so two processes polling
+        the same file can never both claim it (needs SQLite 3.35+ for RETURNING)
+        """
+        now = time.time()
+        rows = await self._query(
+            "UPDATE jobs SET status = 'running', started_at = ?, owner = ?, heartbeat_at = ? "
+            "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1) "
+            "AND status = 'queued' RETURNING id, kind, params",
+            (now, self.owner, now),
+        )
+        if not rows:
+            return None
+        row = rows[0]
+        return {"id": row["id"], "kind": row["kind"], "params": json.loads(row["params"])}
+
+    async def _worker(self, number: int) -> None:
+        while True:
+            job = await self._claim_next()
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            # More work may be waiting; let an idle sibling pick it up
+            self._wakeup.set()
+            await self._run(job)
+
+    async def _run(self, job: Dict) -> None:
+        job_id = job["id"]
+        context = JobContext(self, job_id, job["params"])
+        await self.add_event(job_id, "started", 0.0, f"Running {job['kind']}")
+        try:
+            result = await self.pipelines[job["kind"]](context)
+        except asyncio.CancelledError:
+            # Shutting down: stop() puts the job back on the queue
+            raise
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            await self._query(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, error = ? WHERE id = ? AND owner = ?",
+                (time.time(), str(e), job_id, self.owner),
+            )
+            await self.add_event(job_id, "failed", 1.0, str(e))
+            return
+        # A job requeued from under us (missed heartbeats) now belongs to whoever reclaimed it
+        await self._query(
+            "UPDATE jobs SET status = 'succeeded', finished_at = ?, result = ? WHERE id = ? AND owner = ?",
+            (time.time(), json.dumps(result), job_id, self.owner),
+        )
+        await self.add_event(job_id, "succeeded", 1.0, "Job finished")
+
+
+# Singleton instance
+job_queue = JobQueue(settings.job_store_path)
@@ -1,43 +1,81 @@
-from typing import List
+from typing import List, Optional
 import logging
 
+from app.config import settings
+from app.services.analog_generator import generate_analogs
+from app.services.chembl_service import chembl_service
+from app.services.protein_service import find_target_proteins
+from app.services.qsar import predict_ic50
+from app.utils.canonical import canonicalize, dedupe_molecules
+
 logger = logging.getLogger(__name__)
 
-async def generate_alternate_molecules(disease: str) -> List[dict]:
+async def seed_target(disease: str, target_id: Optional[str] = None) -> Optional[str]:
+    """The target analogs are seeded from: target_id, else the disease's top-ranked target (None if it has none)"""
+    if target_id is not None:
+        return target_id
+    targets = await find_target_proteins(disease, limit=1)
+    return targets[0]["protien_id"] if targets else None
+
+
+async def generate_alternate_molecules(
+    disease: str,
+    target_id: Optional[str] = None,
+    top_k: Optional[int] = None,
+    random_seed: Optional[int] = None,
+) -> List[dict]:
     """
     Generate alternate molecules for a given disease.
     
-    TODO: Implement logic to:
-    1. Retrieve known active compounds for the disease target
-    2. Apply molecular generation algorithms (e.g., REINVENT, ChemVAE)
-    3. Score generated molecules for drug-likeness
-    4. Return top candidates
+    The known actives of the disease's top target (or target_id) seed an
+    analog search: MMP-style reaction SMARTS edits and aromatic fragment
+    replacement, filtered for drug-likeness and ranked by similarity to the
+    seeds and QED. The same random_seed always gives the same molecules,
+    as long as the time budget is not the limiting factor.
     """
-    
     logger.info(f"Generating alternate molecules for disease: {disease}")
     
-    # Mock implementation - replace with actual ML-based generation
-    mock_results = [
-        {
-            "molecule": "CCO",
-            "molecule_name": "Compound_A",
-            "smile_string": "CCO",
-            "ic50": 0.45,
-            "disease_name": disease,
-            "disease_pid": "1TUP",
-            "disease_protien_name": "TP53",
-            "molecule_image": None
-        },
+    target_id = await seed_target(disease, target_id)
+    if target_id is None:
+        return []
+    await chembl_service.ensure_target(target_id)
+    protein_name = await chembl_service.run_lookup(chembl_service._get_protein_name, target_id)
+    seeds = await chembl_service.run_lookup(chembl_service.known_actives, target_id, settings.analog_seed_count)
+    
+    generated = await generate_analogs(
+        seeds,
+        k=top_k or settings.analog_top_k,
+        random_seed=settings.analog_random_seed if random_seed is None else random_seed,
+        time_budget=settings.analog_time_budget,
+        max_candidates=settings.analog_max_candidates,
+    )
+    
+    analogs = generated["analogs"]
+    # One batched prediction for every analog; falls back to the parent's IC50 without a model
+    predicted = await predict_ic50(target_id, [analog["smiles"] for analog in analogs])
+    if predicted is None:
+        predicted = [None] * len(analogs)
+    
+    results = [
         {
-            "molecule": "CC(=O)O",
-            "molecule_name": "Compound_B",
-            "smile_string": "CC(=O)O",
-            "ic50": 0.52,
+            "molecule": analog["smiles"],
+            "molecule_name": f"{analog['parent_name'] or 'Seed'} analog {rank}",
+            "smile_string": analog["smiles"],
+            "ic50": ic50 if ic50 is not None else analog["parent_ic50"],
+            "ic50_source": "qsar" if ic50 is not None else "parent",
             "disease_name": disease,
-            "disease_pid": "1TUP",
-            "disease_protien_name": "TP53",
-            "molecule_image": None
+            "disease_pid": target_id,
+            "disease_protien_name": protein_name,
+            "molecule_image": None,
+            "parent_smiles": analog["parent_smiles"],
+            "transformations": analog["transformations"],
+            "similarity": analog["similarity"],
+            "qed": analog["qed"],
+            "score": analog["score"],
         }
+        for rank, (analog, ic50) in enumerate(zip(analogs, predicted), 1)
     ]
     
-    return mock_results
+    # Different edits can reach the same compound; collapse by InChIKey
+    identities = await canonicalize([mol["smile_string"] for mol in results])
+    return dedupe_molecules(results, identities, smiles_field="smile_string")
@@ -0,0 +1,64 @@
+from typing import Dict, List
+import logging
+
+from app.services.chembl_service import chembl_service
+from app.services.job_queue import JobContext, job_queue
+from app.services.ml_service import evaluate_molecule
+from app.services.molecule_service import generate_alternate_molecules
+from app.services.protein_service import find_target_proteins
+
+logger = logging.getLogger(__name__)
+
+
+async def run_discovery_pipeline(context: JobContext) -> Dict:
+    """
+    Full product flow as one background job:
+    disease -> targets -> hits -> generated analogs -> evaluation.
+    
+    params: disease, optional target_id (defaults to the top-ranked target)
+    and evaluate_top (how many analogs get a full evaluation report).
+    """
+    disease = context.params["disease"]
+    evaluate_top = int(context.params.get("evaluate_top", 5))
+    
+    await context.report("targets", 0.05, f"Finding targets for {disease}")
+    targets = await find_target_proteins(disease)
+    if not targets:
+        raise ValueError(f"No targets found for {disease}")
+    target_id = context.params.get("target_id") or targets[0]["protien_id"]
+    await context.report("targets", 0.2, f"Found {len(targets)} targets", {"targets": len(targets)})
+    
+    await context.report("hits", 0.25, f"Fetching bioactivity data for {target_id}")
+    # Images are served by URL so stored job results stay small
+    hits = await chembl_service.fetch_bioactivity_data(target_id, image_mode="url")
+    await context.report("hits", 0.45, f"Retrieved {len(hits)} hits", {"hits": len(hits)})
+    
+    await context.report("generation", 0.5, "Generating alternate molecules")
+    analogs = await generate_alternate_molecules(disease, target_id)
+    await context.report("generation", 0.7, f"Generated {len(analogs)} analogs", {"analogs": len(analogs)})
+    
+    evaluations: List[Dict] = []
+    to_evaluate = analogs[:evaluate_top]
+    for idx, analog in enumerate(to_evaluate):
+        smiles = analog["smile_string"]
+        try:
+            evaluations.append(await evaluate_molecule(smiles, target_id))
+        except ValueError as e:
+            logger.debug(f"Skipping evaluation of {smiles}: {e}")
+        await context.report(
+            "evaluation",
+            0.7 + 0.3 * (idx + 1) / len(to_evaluate),
+            f"Evaluated {idx + 1}/{len(to_evaluate)} molecules",
+        )
+    
+    return {
+        "disease": disease,
+        "target_id": target_id,
+        "targets": targets,
+        "hits": hits,
+        "analogs": analogs,
+        "evaluations": evaluations,
+    }
+
+
+job_queue.register("discovery", run_discovery_pipeline)
@@ -1,30 +1,30 @@
 from typing import List
 import logging
 
+from app.services.disease_index import get_disease_index
+
 logger = logging.getLogger(__name__)
 
-async def find_target_proteins(disease: str) -> List[dict]:
+async def find_target_proteins(disease: str, limit: int = 10) -> List[dict]:
     """
     Find target proteins associated with a disease.
     
-    TODO: Implement logic to:
-    1. Query disease databases (DisGeNET, OMIM, etc.)
-    2. Map disease to relevant proteins/targets
-    3. Calculate confidence scores
-    4. Identify associated pathways
+    The disease name is fuzzy-matched (typos and partial names resolve)
+    against the disease-target association index, and targets come back
+    ranked by association score with their pathways.
     """
-    
-    # Mock implementation - replace with actual logic
     logger.info(f"Finding proteins for disease: {disease}")
-    
-    # Example: Query your database or external APIs
-    mock_results = [
+    targets = get_disease_index().find_targets(disease, limit)
+    return [
         {
-            "disease_protien": "TP53 (Tumor Protein P53)",
-            "protien_id": "1TUP",
-            "percentage_contro": 0.68,
-            "Associated_pathway": "p53 ras"
+            "disease_protien": f"{target['symbol']} ({target['name']})",
+            "protien_id": target["target_id"],
+            "percentage_contro": target["score"],
+            "Associated_pathway": ", ".join(target["pathways"]),
+            "target_symbol": target["symbol"],
+            "matched_disease": target["disease"],
+            "match_score": round(target["match_score"], 4),
+            "pathways": target["pathways"],
         }
+        for target in targets
     ]
-    
-    return mock_results
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+import asyncio
+import json
+import logging
+import math
+import os
+
+from app.config import settings
+from app.services.chembl_service import chembl_service
+from app.services.similarity_index import FP_BITS, fingerprint_batch
+from app.utils import compute_pool
+from app.utils.lazy_imports import lazy_module
+
+np = lazy_module("numpy")
+
+logger = logging.getLogger(__name__)
+
+# Targets with fewer measured actives than this get no model
+MIN_TRAINING_SAMPLES = 30
+RIDGE_ALPHA = 1.0
+# Share of a target's actives held out to validate a fit, and the R² the
+# model must reach on them before it is served
+HOLDOUT_FRACTION = 0.2
+MIN_HOLDOUT_R2 = 0.3
+
+
+def pic50_from_ic50_um(ic50_um: float) -> float:
+    return 6.0 - math.log10(ic50_um)
+
+
+def ic50_um_from_pic50(pic50: np.ndarray) -> np.ndarray:
+    return np.power(10.0, 6.0 - pic50)
+
+
+def features_from_packed(packed: Sequence[Optional[bytes]]) -> np.ndarray:
+    """
+    (n, FP_BITS) float32 bit matrix from packed Morgan fingerprints; rows for
+    unparseable molecules are all zero and must be masked by the caller.
+    """
+    row_bytes = FP_BITS // 8
+    buffer = b"".join(fp if fp is not None else bytes(row_bytes) for fp in packed)
+    bits = np.unpackbits(np.frombuffer(buffer, dtype=np.uint8).reshape(len(packed), row_bytes), axis=1, bitorder="little")
+    return bits.astype(np.float32)
+
+
+async def featurize(smiles_list: Sequence[str]) -> np.ndarray:
+    """Fingerprint a batch across the compute pool into one feature matrix; invalid rows are NaN"""
+    packed = await compute_pool.map_batches(fingerprint_batch, list(smiles_list), min_batch=256)
+    features = features_from_packed(packed)
+    features[np.array([fp is None for fp in packed], dtype=bool)] = np.nan
+    return features
+
+
+class QSARModel:
+    """
+    Ridge regression from Morgan fingerprint bits to pIC50.
+
+    Prediction is one matrix-vector product for the whole batch. Fitting uses
+    the dual form when there are fewer molecules than features, which is the
+    usual case for a single target.
+    """
+
+    def __init__(self, target: str, weights: np.ndarray, intercept: float, metadata: Optional[Dict] = None):
+        self.target = target
+        self.weights = weights.astype(np.float32)
+        self.intercept = float(intercept)
+        self.metadata = metadata or {}
+
+    @classmethod
+    def fit(cls, target: str, features: np.ndarray, pic50: np.ndarray, alpha: float = RIDGE_ALPHA) -> "QSARModel":
+        X = features.astype(np.float64)
+        y = pic50.astype(np.float64)
+        x_mean = X.mean(axis=0)
+        y_mean = y.mean()
+        Xc = X - x_mean
+        yc = y - y_mean
+        n, d = Xc.shape
+        if n < d:
+            weights = Xc.T @ np.linalg.solve(Xc @ Xc.T + alpha * np.eye(n), yc)
+        else:
+            weights = np.linalg.solve(Xc.T @ Xc + alpha * np.eye(d), Xc.T @ yc)
+        intercept = y_mean - x_mean @ weights
+
+        residuals = y - (X @ weights + intercept)
+        total = float(((y - y_mean) ** 2).sum())
+        metadata = {
+            "n_train": int(n),
+            "alpha": alpha,
+            "train_rmse": float(np.sqrt((residuals ** 2).mean())),
+            "train_r2": 1.0 - float((residuals ** 2).sum()) / total if total > 0 else 0.0,
+        }
+        return cls(target, weights, intercept, metadata)
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """pIC50 for every row; NaN rows (invalid molecules) stay NaN"""
+        return features @ self.weights + self.intercept
+
+    def save(self, directory: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = model_path(directory, self.target)
+        np.savez(
+            path,
+            weights=self.weights,
+            intercept=np.array(self.intercept),
+            metadata=np.array(json.dumps(self.metadata)),
+        )
+        return path
+
+    @classmethod
+    def load(cls, directory: str, target: str) -> "QSARModel":
+        with np.load(model_path(directory, target)) as data:
+            return cls(target, data["weights"], float(data["intercept"]), json.loads(str(data["metadata"])))
+
+
+def model_path(directory: str, target: str) -> str:
+    return os.path.join(directory, f"{target}.npz")
+
+
+def fit_validated(target: str, features: np.ndarray, pic50: np.ndarray) -> Optional[QSARModel]:
+    """
+    Fit on a fixed random split, score R² on the held-out HOLDOUT_FRACTION,
+    and only if it reaches MIN_HOLDOUT_R2 refit on every row. None otherwise.
+    """
+    order = np.random.default_rng(0).permutation(len(pic50))
+    n_holdout = max(1, int(len(order) * HOLDOUT_FRACTION))
+    holdout, train = order[:n_holdout], order[n_holdout:]
+    predicted = QSARModel.fit(target, features[train], pic50[train]).predict(features[holdout])
+    total = float(((pic50[holdout] - pic50[holdout].mean()) ** 2).sum())
+    holdout_r2 = 1.0 - float(((pic50[holdout] - predicted) ** 2).sum()) / total if total > 0 else 0.0
+    if holdout_r2 < MIN_HOLDOUT_R2:
+        logger.info(f"Rejected QSAR model for {target}: held-out R² {holdout_r2:.3f} < {MIN_HOLDOUT_R2}")
+        return None
+    model = QSARModel.fit(target, features, pic50)
+    model.metadata.update(n_holdout=int(n_holdout), holdout_r2=holdout_r2)
+    return model
+
+
+async def train_model(target: str, molecules: Sequence[dict]) -> Optional[QSARModel]:
+    """
+    Fit a model from molecules with "smiles" and "ic50" (µM). None if there
+    is too little data or the fit fails its held-out validation.
+    """
+    rows = [mol for mol in molecules if mol.get("ic50") and mol["ic50"] > 0]
+    if len(rows) < MIN_TRAINING_SAMPLES:
+        return None
+    features = await featurize([mol["smiles"] for mol in rows])
+    valid = ~np.isnan(features[:, 0])
+    if valid.sum() < MIN_TRAINING_SAMPLES:
+        return None
+    pic50 = np.array([pic50_from_ic50_um(mol["ic50"]) for mol in rows])
+    # The solve is seconds of NumPy work for a large target; keep it off the event loop
+    return await asyncio.to_thread(fit_validated, target, features[valid], pic50[valid])
+
+
+class ModelRegistry:
+    """
+    Per-target models loaded lazily and kept in an LRU. A target without a
+    saved model is trained on demand from its known actives, in a worker
+    thread, and saved when a model directory is configured;
+    scripts/train_qsar.py trains them ahead of time instead.
+    """
+
+    def __init__(self, directory: str, capacity: int = 32):
+        self.directory = directory
+        self.capacity = capacity
+        self._models: "OrderedDict[str, Optional[QSARModel]]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def get(self, target_id: str) -> Optional[QSARModel]:
+        await chembl_service.ensure_target(target_id)
+        target = await chembl_service.run_lookup(chembl_service.target_key, target_id)
+        if target == "DEFAULT":
+            # Placeholder compounds for a target nothing covers; no model describes it
+            return None
+        if target in self._models:
+            self._models.move_to_end(target)
+            return self._models[target]
+
+        lock = self._locks.setdefault(target, asyncio.Lock())
+        async with lock:
+            if target not in self._models:
+                self._remember(target, await self._load_or_train(target))
+        return self._models.get(target)
+
+    async def _load_or_train(self, target: str) -> Optional[QSARModel]:
+        if self.directory and os.path.exists(model_path(self.directory, target)):
+            return await asyncio.to_thread(QSARModel.load, self.directory, target)
+        # The whole store for this target, not just the first page of hits
+        actives = await chembl_service.run_lookup(chembl_service.known_actives, target, settings.max_sort_candidates)
+        model = await train_model(target, actives)
+        if model is not None:
+            logger.info(f"Trained QSAR model for {target} on {model.metadata['n_train']} molecules")
+            if self.directory:
+                await asyncio.to_thread(model.save, self.directory)
+        return model
+
+    def _remember(self, target: str, model: Optional[QSARModel]) -> None:
+        # Targets without a model are remembered too, so they are not retrained on every call
+        self._models[target] = model
+        self._models.move_to_end(target)
+        while len(self._models) > self.capacity:
+            self._models.popitem(last=False)
+
+
+model_registry = ModelRegistry(settings.qsar_model_dir, settings.qsar_cache_size)
+
+
+async def predict_ic50(target_id: str, smiles_list: Sequence[str]) -> Optional[List[Optional[float]]]:
+    """
+    Predicted IC50 (µM) for a batch of SMILES against a target: one
+    featurization pass and one matrix product. None when the target has no
+    model; None entries mark SMILES that do not parse.
+    """
+    model = await model_registry.get(target_id)
+    if model is None or not smiles_list:
+        return None
+    ic50 = ic50_um_from_pic50(model.predict(await featurize(smiles_list)))
+    return [None if np.isnan(value) else float(value) for value in ic50]
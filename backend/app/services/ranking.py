@@ -0,0 +1,58 @@
+from typing import Dict, List, Optional
+import hashlib
+
+from app.utils.mol_props import molecular_weight, tanimoto_to_reference
+from app.utils.pagination import sort_value, top_k_page
+
+SORT_FIELDS = ("ic50", "molecular_weight", "similarity")
+
+
+def page_query_id(*parts: Optional[str]) -> str:
+    """Stable id for a sorted listing, used to bind cursors to the query that issued them"""
+    normalized = "|".join((part or "").upper().strip() for part in parts)
+    return hashlib.sha256(normalized.encode()).hexdigest()[:16]
+
+
+def _sort_values(
+    rows: List[dict], sort_by: str, smiles_field: str, reference_smiles: Optional[str]
+) -> Dict[str, Optional[float]]:
+    """SMILES -> computed value for the non-potency sort fields"""
+    smiles_list = [row[smiles_field] for row in rows]
+    if sort_by == "molecular_weight":
+        # Rows from the compound table carry it precomputed
+        return {
+            row[smiles_field]: row["molecular_weight"] if row.get("molecular_weight") is not None
+            else molecular_weight(row[smiles_field])
+            for row in rows
+        }
+    if sort_by == "similarity" and rows:
+        if reference_smiles is None:
+            # Without an explicit query, rank by similarity to the most potent row
+            reference_smiles = min(rows, key=lambda row: row["ic50"])[smiles_field]
+        return dict(zip(smiles_list, tanimoto_to_reference(smiles_list, reference_smiles)))
+    return {}
+
+
+def rank_page(
+    rows: List[dict],
+    sort_by: str,
+    descending: bool,
+    offset: int,
+    limit: int,
+    reference_smiles: Optional[str] = None,
+    smiles_field: str = "smiles",
+) -> List[dict]:
+    """
+    Sort rows by ic50, molecular weight or similarity and return one page.
+
+    Pages sorted on a computed field come back as copies annotated with that
+    field; the input rows are never mutated.
+    """
+    if sort_by == "ic50":
+        return top_k_page(rows, lambda row: sort_value(row["ic50"], descending), descending, offset, limit)
+
+    values = _sort_values(rows, sort_by, smiles_field, reference_smiles)
+    page = top_k_page(
+        rows, lambda row: sort_value(values.get(row[smiles_field]), descending), descending, offset, limit
+    )
+    return [{**row, sort_by: values.get(row[smiles_field])} for row in page]
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+
+from app.config import settings
+from app.services.chembl_service import chembl_service
+from app.services.ranking import page_query_id
+from app.utils.instrumentation import stage_timer
+from app.utils.lazy_imports import lazy_module
+from app.utils.materialized import normalize_key
+from app.utils.pagination import decode_cursor, encode_cursor
+
+np = lazy_module("numpy")
+
+logger = logging.getLogger(__name__)
+
+SCREEN_SORT_FIELDS = ("potency", "selectivity", "coverage")
+
+
+def potency_matrix(molecules_by_target: Dict[str, List[dict]]) -> Tuple[List[dict], np.ndarray]:
+    """
+    Unique compounds (by InChIKey, else SMILES) in first-seen order and their
+    (compounds x targets) pIC50 matrix, NaN where a compound has no measurement.
+    """
+    compounds: List[dict] = []
+    index: Dict[str, int] = {}
+    rows, columns, ic50 = [], [], []
+    for column, molecules in enumerate(molecules_by_target.values()):
+        for mol in molecules:
+            identity = mol.get("inchikey") or mol["smiles"]
+            row = index.get(identity)
+            if row is None:
+                row = index[identity] = len(compounds)
+                compounds.append(mol)
+            rows.append(row)
+            columns.append(column)
+            ic50.append(mol["ic50"])
+
+    matrix = np.full((len(compounds), len(molecules_by_target)), np.nan)
+    if rows:
+        # fmax keeps the most potent value if a target lists a compound twice
+        np.fmax.at(matrix, (np.array(rows), np.array(columns)), 6.0 - np.log10(np.array(ic50, dtype=float)))
+    return compounds, matrix
+
+
+def score_matrix(matrix: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Per-compound summaries of a pIC50 matrix: best value and its target, the
+    mean over measured targets, how many targets were measured, and
+    selectivity (best minus second-best pIC50; NaN when only one was measured).
+    """
+    measured = ~np.isnan(matrix)
+    coverage = measured.sum(axis=1)
+    filled = np.where(measured, matrix, -np.inf)
+    descending = -np.sort(-filled, axis=1)
+    best = descending[:, 0]
+    if matrix.shape[1] > 1:
+        second = descending[:, 1]
+        selectivity = np.where(np.isfinite(second), best - second, np.nan)
+    else:
+        selectivity = np.full(len(matrix), np.nan)
+    return {
+        "best_pic50": best,
+        "best_column": filled.argmax(axis=1),
+        "mean_pic50": np.where(measured, matrix, 0.0).sum(axis=1) / np.maximum(coverage, 1),
+        "coverage": coverage,
+        "selectivity": selectivity,
+    }
+
+
+def rank_order(scores: Dict[str, np.ndarray], sort_by: str) -> np.ndarray:
+    """Row order for a sort field; ties fall back to potency, then first-seen order"""
+    position = np.arange(len(scores["best_pic50"]))
+    best = scores["best_pic50"]
+    if sort_by == "selectivity":
+        # Compounds measured on a single target have no selectivity and sort last
+        selectivity = np.nan_to_num(scores["selectivity"], nan=-np.inf)
+        return np.lexsort((position, -best, -selectivity))
+    if sort_by == "coverage":
+        return np.lexsort((position, -best, -scores["coverage"]))
+    return np.lexsort((position, -best))
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+async def screen_targets(
+    target_ids: Sequence[str],
+    limit: int,
+    cursor: Optional[str] = None,
+    sort_by: str = "potency",
+    image_mode: str = "inline",
+    per_target_limit: Optional[int] = None,
+) -> Dict:
+    """
+    One ranked, paginated list of the compounds active on any of the targets.
+
+    Each compound appears once with its IC50 against every requested target,
+    the target it is most potent on and its selectivity across them. Only the
+    requested page is depicted. Identifiers that match no target are listed
+    under unresolved_targets and contribute no compounds. Raises ValueError
+    for a cursor from another query and LookupError when no target resolves.
+    """
+    await chembl_service.ensure_targets(list(target_ids))
+    with stage_timer("lookup"):
+        molecules, unresolved = await chembl_service.run_lookup(
+            chembl_service._get_molecules_for_targets, list(target_ids), per_target_limit or settings.max_hits_per_target
+        )
+    if not molecules:
+        raise LookupError(f"No known targets among: {', '.join(target_ids)}")
+    keys = list(molecules)
+    # Bound to the resolved targets, folded like the response cache key, so a
+    # cached page's cursor works for every spelling of the same request
+    query_id = page_query_id(",".join(normalize_key(key) for key in keys), sort_by, str(per_target_limit or ""))
+    offset = int(decode_cursor(cursor, query_id).get("offset", 0)) if cursor else 0
+    with stage_timer("rank"):
+        compounds, matrix = potency_matrix(molecules)
+        scores = score_matrix(matrix)
+        order = rank_order(scores, sort_by)[offset:offset + limit]
+
+    page = [compounds[row] for row in order]
+    images, image_urls = await chembl_service.render_images([mol["smiles"] for mol in page], image_mode)
+    items = []
+    for idx, row in enumerate(order):
+        mol = compounds[row]
+        potencies = matrix[row]
+        best_ic50 = float(10.0 ** (6.0 - scores["best_pic50"][row]))
+        items.append({
+            "molecule": mol["smiles"],
+            "canonical_smiles": mol["smiles"],
+            "name": mol.get("name"),
+            "inchikey": mol.get("inchikey"),
+            "best_target": keys[int(scores["best_column"][row])],
+            "best_ic50": best_ic50,
+            "best_pic50": float(scores["best_pic50"][row]),
+            "mean_pic50": float(scores["mean_pic50"][row]),
+            "selectivity": _optional(scores["selectivity"][row]),
+            "targets_measured": int(scores["coverage"][row]),
+            # µM per target, None where the compound was not measured
+            "ic50_by_target": {
+                key: None if np.isnan(value) else float(10.0 ** (6.0 - value))
+                for key, value in zip(keys, potencies)
+            },
+            "molecule_image": images[idx],
+            "molecule_image_url": image_urls[idx],
+        })
+
+    total = len(compounds)
+    protein_names = {key: await chembl_service.run_lookup(chembl_service._get_protein_name, key) for key in keys}
+    logger.info(f"Screened {total} compounds across {len(keys)} targets")
+    return {
+        "targets": [
+            {"target_id": key, "protein_name": protein_names[key], "compounds": len(molecules[key])}
+            for key in keys
+        ],
+        "unresolved_targets": unresolved,
+        "items": items,
+        "next_cursor": encode_cursor(query_id, {"offset": offset + limit}) if offset + limit < total else None,
+        "total": total,
+        "limit": limit,
+        "sort_by": sort_by,
+    }
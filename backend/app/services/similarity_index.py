@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import math
+import os
+
+from app.config import settings
+from app.services.chembl_service import MOLECULE_DATABASE
+from app.utils import compute_pool
+from app.utils.lazy_imports import lazy_module
+from app.utils.mol_props import morgan_fingerprint
+
+np = lazy_module("numpy")
+DataStructs = lazy_module("rdkit.DataStructs")
+
+logger = logging.getLogger(__name__)
+
+FP_BITS = 2048
+FP_WORDS = FP_BITS // 64
+# Rows scored per step; bounds the temporary (rows x FP_WORDS) AND-matrix to ~16 MB
+SCAN_CHUNK = 65536
+
+FINGERPRINTS_FILE = "fingerprints.npy"
+COUNTS_FILE = "bit_counts.npy"
+COMPOUNDS_FILE = "compounds.json"
+
+
+def pack_bitvect(fp, n_bits: int = FP_BITS) -> bytes:
+    """RDKit ExplicitBitVect -> little-endian packed bytes (bit i lives in word i // 64)"""
+    bits = np.zeros(n_bits, dtype=np.uint8)
+    DataStructs.ConvertToNumpyArray(fp, bits)
+    return np.packbits(bits, bitorder="little").tobytes()
+
+
+def words_from_bytes(packed: bytes) -> np.ndarray:
+    return np.frombuffer(packed, dtype="<u8")
+
+
+def matrix_from_packed(packed: List[bytes], n_words: int = FP_WORDS) -> np.ndarray:
+    if not packed:
+        return np.zeros((0, n_words), dtype="<u8")
+    return np.frombuffer(b"".join(packed), dtype="<u8").reshape(len(packed), n_words)
+
+
+def fingerprint_batch(smiles_list: List[str]) -> List[Optional[bytes]]:
+    """
+    Packed Morgan fingerprints (radius 2, 2048 bits) as raw little-endian bytes.
+    Runs inside compute pool workers, so it must stay a module-level function.
+    """
+    packed = []
+    for smiles in smiles_list:
+        fp = morgan_fingerprint(smiles, 2, FP_BITS)
+        packed.append(pack_bitvect(fp) if fp is not None else None)
+    return packed
+
+
+class SimilarityIndex:
+    """
+    Tanimoto search over fingerprints packed into a (n, 32) uint64 matrix.
+
+    Rows are kept sorted by bit count, so the similarity bound
+    T(a, b) <= min(|a|, |b|) / max(|a|, |b|) turns a threshold into one
+    contiguous slice of rows; everything outside it is never touched.
+    """
+
+    def __init__(self, fingerprints: np.ndarray, bit_counts: np.ndarray, compounds: List[dict]):
+        self.fingerprints = fingerprints
+        self.bit_counts = bit_counts
+        self.compounds = compounds
+
+    def __len__(self) -> int:
+        return len(self.compounds)
+
+    @classmethod
+    def from_packed(cls, packed: List[bytes], compounds: List[dict]) -> "SimilarityIndex":
+        fingerprints = matrix_from_packed(packed)
+        bit_counts = np.bitwise_count(fingerprints).sum(axis=1, dtype=np.uint16)
+        order = np.argsort(bit_counts, kind="stable")
+        return cls(
+            np.ascontiguousarray(fingerprints[order]),
+            bit_counts[order],
+            [compounds[i] for i in order],
+        )
+
+    def save(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, FINGERPRINTS_FILE), self.fingerprints)
+        np.save(os.path.join(directory, COUNTS_FILE), self.bit_counts)
+        with open(os.path.join(directory, COMPOUNDS_FILE), "w") as fh:
+            json.dump(self.compounds, fh, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, directory: str) -> "SimilarityIndex":
+        """Memory-map a saved index; pages are shared between worker processes"""
+        fingerprints = np.load(os.path.join(directory, FINGERPRINTS_FILE), mmap_mode="r")
+        bit_counts = np.load(os.path.join(directory, COUNTS_FILE), mmap_mode="r")
+        with open(os.path.join(directory, COMPOUNDS_FILE)) as fh:
+            compounds = json.load(fh)
+        return cls(fingerprints, bit_counts, compounds)
+
+    def candidate_range(self, query_count: int, threshold: float) -> Tuple[int, int]:
+        """Rows whose bit count can still reach the threshold"""
+        if threshold <= 0 or query_count == 0:
+            return 0, len(self.bit_counts)
+        low = math.ceil(threshold * query_count)
+        high = math.floor(query_count / threshold)
+        start = int(np.searchsorted(self.bit_counts, low, side="left"))
+        stop = int(np.searchsorted(self.bit_counts, high, side="right"))
+        return start, stop
+
+    def search_words(self, query: np.ndarray, k: int = 10, threshold: float = 0.0) -> Dict:
+        """Top-k rows by Tanimoto similarity to a packed query fingerprint"""
+        query_count = int(np.bitwise_count(query).sum())
+        start, stop = self.candidate_range(query_count, threshold)
+
+        best_rows = np.zeros(0, dtype=np.int64)
+        best_scores = np.zeros(0, dtype=np.float64)
+        for chunk_start in range(start, stop, SCAN_CHUNK):
+            chunk_stop = min(chunk_start + SCAN_CHUNK, stop)
+            block = self.fingerprints[chunk_start:chunk_stop]
+            common = np.bitwise_count(block & query).sum(axis=1, dtype=np.uint16)
+            union = self.bit_counts[chunk_start:chunk_stop].astype(np.int32) + query_count - common
+            scores = np.divide(common, union, out=np.zeros(len(common)), where=union > 0)
+
+            keep = np.flatnonzero(scores >= threshold) if threshold > 0 else np.arange(len(scores))
+            if len(keep) > k:
+                keep = keep[np.argpartition(-scores[keep], k - 1)[:k]]
+            best_rows = np.concatenate([best_rows, keep + chunk_start])
+            best_scores = np.concatenate([best_scores, scores[keep]])
+            if len(best_rows) > k:
+                top = np.argpartition(-best_scores, k - 1)[:k]
+                best_rows, best_scores = best_rows[top], best_scores[top]
+
+        order = np.argsort(-best_scores, kind="stable")
+        return {
+            "rows": best_rows[order],
+            "scores": best_scores[order],
+            "screened": stop - start,
+            "total": len(self.bit_counts),
+        }
+
+    def search(self, smiles: str, k: int = 10, threshold: float = 0.0) -> List[dict]:
+        """Most similar stored compounds to a query SMILES, best first"""
+        packed = fingerprint_batch([smiles])[0]
+        if packed is None:
+            raise ValueError(f"Invalid SMILES: {smiles}")
+        found = self.search_words(words_from_bytes(packed), k, threshold)
+        return [
+            {**self.compounds[row], "similarity": float(score)}
+            for row, score in zip(found["rows"], found["scores"])
+        ]
+
+
+async def build_similarity_index(compounds: List[dict]) -> SimilarityIndex:
+    """Fingerprint compounds across the compute pool; rows that fail to parse are dropped"""
+    packed = await compute_pool.map_batches(
+        fingerprint_batch, [compound["smiles"] for compound in compounds], min_batch=256
+    )
+    kept = [(fp, compound) for fp, compound in zip(packed, compounds) if fp is not None]
+    return SimilarityIndex.from_packed([fp for fp, _ in kept], [compound for _, compound in kept])
+
+
+def builtin_compounds() -> List[dict]:
+    """Unique MOLECULE_DATABASE structures, used when no prebuilt index is on disk"""
+    seen = {}
+    for target, molecules in MOLECULE_DATABASE.items():
+        if target == "DEFAULT":
+            continue
+        for mol in molecules:
+            seen.setdefault(mol["smiles"], {
+                "smiles": mol["smiles"], "name": mol["name"], "ic50": mol["ic50"], "target": target,
+            })
+    return list(seen.values())
+
+
+_index: Optional[SimilarityIndex] = None
+# Startup warm-up and early requests share one load instead of each building the index
+_load_lock = asyncio.Lock()
+
+
+async def load_similarity_index() -> SimilarityIndex:
+    """Memory-map the prebuilt index if one exists, otherwise index the built-in compounds"""
+    global _index
+    directory = settings.similarity_index_dir
+    if directory and os.path.exists(os.path.join(directory, FINGERPRINTS_FILE)):
+        _index = SimilarityIndex.load(directory)
+        logger.info(f"Similarity index mapped from {directory} ({len(_index)} compounds)")
+    else:
+        _index = await build_similarity_index(builtin_compounds())
+        logger.info(f"Similarity index built from built-in compounds ({len(_index)} compounds)")
+    return _index
+
+
+async def get_similarity_index() -> SimilarityIndex:
+    if _index is None:
+        async with _load_lock:
+            if _index is None:
+                await load_similarity_index()
+    return _index
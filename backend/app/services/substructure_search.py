@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from typing import AsyncIterator, List, Optional
+import asyncio
+import logging
+import os
+import time
+
+from app.config import settings
+from app.services.similarity_index import (
+    SCAN_CHUNK,
+    get_similarity_index,
+    matrix_from_packed,
+    pack_bitvect,
+    words_from_bytes,
+)
+from app.utils import compute_pool
+from app.utils.lazy_imports import lazy_module
+
+np = lazy_module("numpy")
+Chem = lazy_module("rdkit.Chem")
+
+logger = logging.getLogger(__name__)
+
+PATTERN_BITS = 2048
+PATTERN_FINGERPRINTS_FILE = "pattern_fingerprints.npy"
+# Candidates verified per worker task; small enough that the first matches stream out quickly
+MATCH_BATCH = 256
+
+
+def pattern_fingerprint_batch(smiles_list: List[str]) -> List[Optional[bytes]]:
+    """
+    Packed RDKit pattern fingerprints, None for SMILES that do not parse.
+    Runs inside compute pool workers, so it must stay a module-level function.
+    """
+    packed = []
+    for smiles in smiles_list:
+        mol = Chem.MolFromSmiles(smiles)
+        packed.append(pack_bitvect(Chem.PatternFingerprint(mol, fpSize=PATTERN_BITS), PATTERN_BITS) if mol else None)
+    return packed
+
+
+def parse_query(pattern: str, pattern_type: str = "smarts") -> Chem.Mol:
+    """Parse a SMARTS or SMILES substructure query, raising ValueError if it is invalid"""
+    query = Chem.MolFromSmiles(pattern) if pattern_type == "smiles" else Chem.MolFromSmarts(pattern)
+    if query is None:
+        raise ValueError(f"Invalid {pattern_type.upper()} pattern: {pattern}")
+    if pattern_type == "smarts":
+        # Pattern fingerprints need ring information that SMARTS parsing does not compute
+        query.UpdatePropertyCache(strict=False)
+        Chem.FastFindRings(query)
+    return query
+
+
+def query_fingerprint(query: Chem.Mol) -> np.ndarray:
+    return words_from_bytes(pack_bitvect(Chem.PatternFingerprint(query, fpSize=PATTERN_BITS), PATTERN_BITS))
+
+
+def match_batch(smiles_list: List[str], pattern: str, pattern_type: str) -> List[bool]:
+    """
+    Full substructure match for each candidate SMILES.
+    Runs inside compute pool workers, so it must stay a module-level function.
+    """
+    query = parse_query(pattern, pattern_type)
+    matches = []
+    for smiles in smiles_list:
+        mol = Chem.MolFromSmiles(smiles)
+        matches.append(mol is not None and mol.HasSubstructMatch(query))
+    return matches
+
+
+class SubstructureIndex:
+    """
+    Pattern fingerprints for every indexed compound, row-aligned with the
+    similarity index. A molecule can only contain the query if it has every
+    bit the query's pattern fingerprint sets, so most rows are rejected with
+    a vectorized AND before RDKit is involved.
+    """
+
+    def __init__(self, fingerprints: np.ndarray, compounds: List[dict]):
+        self.fingerprints = fingerprints
+        self.compounds = compounds
+
+    def __len__(self) -> int:
+        return len(self.compounds)
+
+    def screen(self, query: np.ndarray) -> np.ndarray:
+        """Rows whose pattern fingerprint is a superset of the query's"""
+        survivors = []
+        for start in range(0, len(self.fingerprints), SCAN_CHUNK):
+            block = self.fingerprints[start:start + SCAN_CHUNK]
+            survivors.append(np.flatnonzero(np.all((block & query) == query, axis=1)) + start)
+        return np.concatenate(survivors) if survivors else np.zeros(0, dtype=np.int64)
+
+    def save(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, PATTERN_FINGERPRINTS_FILE), self.fingerprints)
+
+    @classmethod
+    def load(cls, directory: str, compounds: List[dict]) -> "SubstructureIndex":
+        fingerprints = np.load(os.path.join(directory, PATTERN_FINGERPRINTS_FILE), mmap_mode="r")
+        return cls(fingerprints, compounds)
+
+
+async def build_substructure_index(compounds: List[dict]) -> SubstructureIndex:
+    packed = await compute_pool.map_batches(
+        pattern_fingerprint_batch, [compound["smiles"] for compound in compounds], min_batch=256
+    )
+    # Compounds come from the similarity index, which only holds parseable structures
+    return SubstructureIndex(matrix_from_packed(packed, PATTERN_BITS // 64), compounds)
+
+
+_index: Optional[SubstructureIndex] = None
+_load_lock = asyncio.Lock()
+
+
+async def load_substructure_index() -> SubstructureIndex:
+    """Map saved pattern fingerprints next to the similarity index, or compute them"""
+    global _index
+    compounds = (await get_similarity_index()).compounds
+    directory = settings.similarity_index_dir
+    if directory and os.path.exists(os.path.join(directory, PATTERN_FINGERPRINTS_FILE)):
+        _index = SubstructureIndex.load(directory, compounds)
+    else:
+        _index = await build_substructure_index(compounds)
+    logger.info(f"Substructure index ready ({len(_index)} compounds)")
+    return _index
+
+
+async def get_substructure_index() -> SubstructureIndex:
+    if _index is None:
+        async with _load_lock:
+            if _index is None:
+                await load_substructure_index()
+    return _index
+
+
+async def search_substructure(
+    pattern: str, pattern_type: str = "smarts", max_results: int = 100
+) -> AsyncIterator[dict]:
+    """
+    Yield matching compounds as soon as each verification batch finishes,
+    then one summary record with pruning ratio and timings.
+    """
+    started = time.perf_counter()
+    index = await get_substructure_index()
+    # The RDKit parse and the NumPy screen run in a thread so the event loop stays free
+    survivors = await asyncio.to_thread(
+        lambda: index.screen(query_fingerprint(parse_query(pattern, pattern_type)))
+    )
+    screened_at = time.perf_counter()
+
+    batches = [survivors[i:i + MATCH_BATCH] for i in range(0, len(survivors), MATCH_BATCH)]
+
+    async def verify(rows: np.ndarray):
+        smiles = [index.compounds[row]["smiles"] for row in rows]
+        return rows, await compute_pool.run_in_pool(match_batch, smiles, pattern, pattern_type)
+
+    tasks = [asyncio.ensure_future(verify(rows)) for rows in batches]
+    matched = 0
+    truncated = False
+    try:
+        for finished in asyncio.as_completed(tasks):
+            rows, hits = await finished
+            for row, hit in zip(rows, hits):
+                if not hit:
+                    continue
+                if matched >= max_results:
+                    truncated = True
+                    break
+                matched += 1
+                yield {"type": "match", **index.compounds[row]}
+            if matched >= max_results:
+                truncated = truncated or any(not task.done() for task in tasks)
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    total = len(index)
+    yield {
+        "type": "summary",
+        "total": total,
+        "candidates": int(len(survivors)),
+        "matches": matched,
+        "pruning_ratio": 1 - len(survivors) / total if total else 0.0,
+        "screen_ms": 1000 * (screened_at - started),
+        "match_ms": 1000 * (time.perf_counter() - screened_at),
+        "truncated": truncated,
+    }
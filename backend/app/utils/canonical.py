@@ -0,0 +1,93 @@
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+import math
+import statistics
+
+from app.utils import compute_pool
+from app.utils.lazy_imports import lazy_module, silence_rdkit_log
+
+# Unparseable input is reported as None, not through RDKit's stderr
+Chem = lazy_module("rdkit.Chem", on_load=silence_rdkit_log)
+
+Identity = Tuple[str, str]
+
+
+def _identity(smiles: str) -> Optional[Identity]:
+    mol = Chem.MolFromSmiles(smiles) if smiles else None
+    if mol is None:
+        return None
+    inchikey = Chem.MolToInchiKey(mol)
+    if not inchikey:
+        return None
+    return Chem.MolToSmiles(mol), inchikey
+
+
+def canonicalize_batch(smiles_list: List[str]) -> List[Optional[Identity]]:
+    """
+        (canonical SMILES, InChIKey) for each SMILES, None if it does not parse.
+        Runs inside compute pool workers, so it must stay a module-level function.
+    """
+    return [_identity(smiles) for smiles in smiles_list]
+
+
+@lru_cache(maxsize=16384)
+def canonical_identity(smiles: str) -> Optional[Identity]:
+    """
+        In-process, memoized counterpart of canonicalize_batch for single lookups.
+    """
+    return _identity(smiles)
+
+
+async def canonicalize(smiles_list: Sequence[str]) -> List[Optional[Identity]]:
+    """
+        Bulk canonicalization fanned out across the compute pool, in input order.
+    """
+    return await compute_pool.map_batches(canonicalize_batch, list(smiles_list), min_batch=256)
+
+
+def aggregate_ic50(values: Sequence[float]) -> Dict:
+    """
+        Summarize repeated IC50 measurements of one compound (any single unit).
+        The median is the representative value; the geometric mean is reported
+        alongside because potencies are log-normally distributed.
+    """
+    positive = [value for value in values if value is not None and value > 0]
+    if not positive:
+        return {"ic50": None, "ic50_geomean": None, "measurement_count": 0}
+    return {
+        "ic50": statistics.median(positive),
+        "ic50_geomean": math.exp(statistics.fmean(math.log(value) for value in positive)),
+        "measurement_count": len(positive),
+    }
+
+
+def dedupe_molecules(
+    molecules: Sequence[dict],
+    identities: Sequence[Optional[Identity]],
+    smiles_field: str = "smiles",
+    ic50_field: str = "ic50",
+) -> List[dict]:
+    """
+        Collapse molecules that share an InChIKey, keeping the first record of
+        each in input order with its IC50 replaced by the aggregate of all of
+        them. Molecules that do not parse are dropped.
+    """
+    groups: Dict[str, List[dict]] = {}
+    canonical: Dict[str, str] = {}
+    for mol, identity in zip(molecules, identities):
+        if identity is None:
+            continue
+        smiles, inchikey = identity
+        groups.setdefault(inchikey, []).append(mol)
+        canonical.setdefault(inchikey, smiles)
+
+    deduped = []
+    for inchikey, group in groups.items():
+        merged = {**group[0], smiles_field: canonical[inchikey], "inchikey": inchikey}
+        summary = aggregate_ic50([mol.get(ic50_field) for mol in group])
+        if summary["measurement_count"]:
+            merged[ic50_field] = summary["ic50"]
+            merged[f"{ic50_field}_geomean"] = summary["ic50_geomean"]
+        merged["measurement_count"] = summary["measurement_count"]
+        deduped.append(merged)
+    return deduped
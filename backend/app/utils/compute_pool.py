@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Process pool for CPU-bound RDKit work (depiction, descriptors) so it never
+# runs on the event loop. None means work runs inline in the calling process.
+_executor: Optional[ProcessPoolExecutor] = None
+_workers = 0
+
+
+def start_compute_pool(workers: int) -> None:
+    """Create the shared process pool; workers <= 0 keeps everything inline"""
+    global _executor, _workers
+    if _executor is not None or workers <= 0:
+        return
+    # spawn avoids forking a process that already runs the event loop and its threads
+    _executor = ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+    _workers = workers
+    logger.info(f"Compute pool started with {workers} worker processes")
+
+
+def shutdown_compute_pool() -> None:
+    """Stop the pool, dropping work that has not started yet"""
+    global _executor, _workers
+    if _executor is None:
+        return
+    _executor.shutdown(wait=True, cancel_futures=True)
+    _executor = None
+    _workers = 0
+    logger.info("Compute pool shut down")
+
+
+def pool_size() -> int:
+    return _workers
+
+
+async def run_in_pool(fn: Callable, *args):
+    """Run a picklable module-level function in the pool and await its result"""
+    if _executor is None:
+        return fn(*args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(fn, *args))
+
+
+async def map_batches(fn: Callable[..., List], items: Sequence, *args, min_batch: int = 4) -> List:
+    """
+    Split items into one batch per worker, run fn(batch, *args) on each and
+    concatenate the results in input order.
+
+    fn must take a list as its first argument and return a list of equal length.
+    Batching keeps per-task pickling overhead low for the many small molecules
+    a single request produces.
+    """
+    items = list(items)
+    if not items:
+        return []
+    if _executor is None:
+        return fn(items, *args)
+    if len(items) <= min_batch:
+        return await run_in_pool(fn, items, *args)
+
+    batch_size = max(min_batch, -(-len(items) // _workers))
+    batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(
+        *(loop.run_in_executor(_executor, partial(fn, batch, *args)) for batch in batches)
+    )
+    return [value for batch_result in results for value in batch_result]
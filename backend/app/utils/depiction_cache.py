@@ -0,0 +1,147 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def depiction_key(canonical_smiles: str, size: Tuple[int, int] = (300, 300)) -> str:
+    """
+        Content address for a depiction of a canonical SMILES at a given size.
+    """
+    payload = f"{canonical_smiles}|{size[0]}x{size[1]}".encode()
+    return hashlib.sha256(payload).hexdigest()[:32]
+
+
+class DepictionCache:
+    """Bounded in-memory LRU of rendered depictions with an optional on-disk tier"""
+
+    def __init__(self, max_entries: int = 2048, disk_dir: str = ""):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        # key -> (canonical SMILES, size) so a depiction can be rendered from its URL alone
+        self._sources: "OrderedDict[str, Tuple[str, Tuple[int, int]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _disk_path(self, key: str, fmt: str) -> str:
+        # Namespaced keys ("grid:<hex>") get their own directory, since ':' is not portable in file names
+        namespace, _, digest = key.rpartition(":")
+        # Fan out on the first two hex chars so no directory grows too large
+        return os.path.join(self.disk_dir, namespace, digest[:2], f"{digest}.{fmt}")
+
+    def _read_disk(self, key: str, fmt: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key, fmt), "rb") as fh:
+                return fh.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, fmt: str, data: bytes) -> None:
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key, fmt)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so concurrent workers never see a partial file
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to persist depiction {key}.{fmt}: {e}")
+
+    def _remember(self, entry: Tuple[str, str], data: bytes) -> None:
+        """Insert into the LRU; caller must hold the lock"""
+        self._entries[entry] = data
+        self._entries.move_to_end(entry)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str, fmt: str = "png") -> Optional[bytes]:
+        """Look up a depiction in memory, then on disk"""
+        entry = (key, fmt)
+        with self._lock:
+            data = self._entries.get(entry)
+            if data is not None:
+                self._entries.move_to_end(entry)
+                self.hits += 1
+                return data
+
+        data = self._read_disk(key, fmt)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(entry, data)
+        return data
+
+    def put(self, key: str, fmt: str, data: bytes) -> None:
+        """Store a rendered depiction in memory and on disk"""
+        with self._lock:
+            self._remember((key, fmt), data)
+        self._write_disk(key, fmt, data)
+
+    def register_source(self, key: str, canonical_smiles: str, size: Tuple[int, int]) -> None:
+        """Remember which structure a key was minted for"""
+        with self._lock:
+            known = key in self._sources
+            self._sources[key] = (canonical_smiles, size)
+            self._sources.move_to_end(key)
+            # Sources are tiny, so keep many more of them than rendered images
+            while len(self._sources) > self.max_entries * 8:
+                self._sources.popitem(last=False)
+        if known or not self.disk_dir:
+            return
+        self._write_disk(key, "smi", f"{canonical_smiles}\t{size[0]}\t{size[1]}".encode())
+
+    def source(self, key: str) -> Optional[Tuple[str, Tuple[int, int]]]:
+        """Return the (canonical SMILES, size) a key was minted for, if known"""
+        with self._lock:
+            found = self._sources.get(key)
+        if found is not None:
+            return found
+        raw = self._read_disk(key, "smi")
+        if raw is None:
+            return None
+        try:
+            smiles, width, height = raw.decode().split("\t")
+            found = (smiles, (int(width), int(height)))
+        except ValueError:
+            return None
+        with self._lock:
+            self._sources[key] = found
+        return found
+
+    def clear(self) -> None:
+        """Drop the in-memory tier; the disk tier is left untouched"""
+        with self._lock:
+            self._entries.clear()
+            self._sources.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "disk_enabled": bool(self.disk_dir),
+            }
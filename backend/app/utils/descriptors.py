@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+from app.utils import compute_pool
+from app.utils.lazy_imports import lazy_module, silence_rdkit_log
+
+# Imported on first use so the API starts without loading RDKit or pandas.
+# Parse failures are reported through the "valid" column, not RDKit's stderr
+Chem = lazy_module("rdkit.Chem", on_load=silence_rdkit_log)
+Crippen = lazy_module("rdkit.Chem.Crippen")
+Descriptors = lazy_module("rdkit.Chem.Descriptors")
+Lipinski = lazy_module("rdkit.Chem.Lipinski")
+rdMolDescriptors = lazy_module("rdkit.Chem.rdMolDescriptors")
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+
+# Fixed descriptor set, in the order each row tuple is produced
+DESCRIPTOR_COLUMNS = [
+    "mol_wt",
+    "logp",
+    "tpsa",
+    "hbd",
+    "hba",
+    "rotatable_bonds",
+    "heavy_atoms",
+    "ring_count",
+    "aromatic_rings",
+    "fraction_csp3",
+]
+
+RULE_COLUMNS = ["lipinski_violations", "lipinski_pass", "veber_pass", "lead_like"]
+
+
+def mol_descriptor_row(mol: Chem.Mol) -> Tuple[float, ...]:
+    """
+        DESCRIPTOR_COLUMNS values for an already parsed molecule.
+    """
+    return (
+        Descriptors.MolWt(mol),
+        Crippen.MolLogP(mol),
+        rdMolDescriptors.CalcTPSA(mol),
+        Lipinski.NumHDonors(mol),
+        Lipinski.NumHAcceptors(mol),
+        rdMolDescriptors.CalcNumRotatableBonds(mol),
+        mol.GetNumHeavyAtoms(),
+        rdMolDescriptors.CalcNumRings(mol),
+        rdMolDescriptors.CalcNumAromaticRings(mol),
+        rdMolDescriptors.CalcFractionCSP3(mol),
+    )
+
+
+def _descriptor_row(smiles: str) -> Optional[Tuple[float, ...]]:
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None:
+        return None
+    return mol_descriptor_row(mol)
+
+
+def compute_descriptor_rows(smiles_list: List[str]) -> List[Optional[Tuple[float, ...]]]:
+    """
+        Parse each SMILES once and compute the full descriptor set, None for invalid input.
+        Runs inside compute pool workers, so it must stay a module-level function.
+    """
+    return [_descriptor_row(smiles) for smiles in smiles_list]
+
+
+def apply_rule_filters(table: pd.DataFrame) -> pd.DataFrame:
+    """
+        Evaluate drug-likeness rules as vectorized boolean masks over the whole table.
+    """
+    violations = (
+        (table["mol_wt"] > 500).astype(np.int8)
+        + (table["logp"] > 5).astype(np.int8)
+        + (table["hbd"] > 5).astype(np.int8)
+        + (table["hba"] > 10).astype(np.int8)
+    )
+    valid = table["valid"].to_numpy()
+    table["lipinski_violations"] = violations.where(valid, other=0).astype(np.int8)
+    # One violation is tolerated, as in the original Rule of Five
+    table["lipinski_pass"] = valid & (violations <= 1).to_numpy()
+    table["veber_pass"] = valid & ((table["rotatable_bonds"] <= 10) & (table["tpsa"] <= 140)).to_numpy()
+    table["lead_like"] = valid & (
+        (table["mol_wt"] <= 350) & (table["logp"] <= 3.5) & (table["rotatable_bonds"] <= 7)
+    ).to_numpy()
+    return table
+
+
+def build_descriptor_table(smiles_list: List[str], rows: List[Optional[Tuple[float, ...]]]) -> pd.DataFrame:
+    """
+        Assemble per-molecule rows into a columnar table with rule masks.
+        Invalid SMILES keep their position with NaN descriptors and valid=False.
+    """
+    values = np.full((len(rows), len(DESCRIPTOR_COLUMNS)), np.nan, dtype=np.float64)
+    valid = np.zeros(len(rows), dtype=bool)
+    for i, row in enumerate(rows):
+        if row is not None:
+            values[i] = row
+            valid[i] = True
+
+    table = pd.DataFrame(values, columns=DESCRIPTOR_COLUMNS)
+    table.insert(0, "smiles", smiles_list)
+    table.insert(1, "valid", valid)
+    return apply_rule_filters(table)
+
+
+async def descriptor_table(smiles_list: List[str]) -> pd.DataFrame:
+    """
+        Descriptor table for a batch of SMILES, computed across the compute pool.
+    """
+    smiles_list = list(smiles_list)
+    rows = await compute_pool.map_batches(compute_descriptor_rows, smiles_list, min_batch=64)
+    return build_descriptor_table(smiles_list, rows)
+
+
+def table_to_records(table: pd.DataFrame) -> List[dict]:
+    """
+        Convert a descriptor table to plain dicts, with NaN turned into None for JSON.
+    """
+    return table.astype(object).where(table.notna(), None).to_dict(orient="records")
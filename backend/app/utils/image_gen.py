@@ -1,25 +1,353 @@
-from rdkit import Chem
-from rdkit.Chem import Draw
 import base64
+import hashlib
+import json
+import math
+from functools import lru_cache
 from io import BytesIO
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+from app.config import settings
+from app.utils import compute_pool
+from app.utils.depiction_cache import DepictionCache, depiction_key
+from app.utils.lazy_imports import lazy_module
+
+# RDKit's drawing stack is the slowest import in the app; load it on first render
+Chem = lazy_module("rdkit.Chem")
+Draw = lazy_module("rdkit.Chem.Draw")
+rdMolDraw2D = lazy_module("rdkit.Chem.Draw.rdMolDraw2D")
+
+DEPICTION_MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+# Edge lengths (px) a depiction URL may ask for; the same bounds as /depict_batch/ panels
+MIN_DEPICTION_SIZE = 50
+MAX_DEPICTION_SIZE = 600
+
+# Shared across requests; every caller rendering the same structure at the same
+# size gets the same bytes back without touching RDKit or Pillow again
+depiction_cache = DepictionCache(
+    max_entries=settings.depiction_cache_size,
+    disk_dir=settings.depiction_cache_dir,
+)
+
+
+@lru_cache(maxsize=8192)
+def canonicalize_smiles(smiles: str) -> str:
+    """
+        Return the RDKit canonical form of a SMILES string.
+    """
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None:
+        raise ValueError(f"Invalid SMILES: {smiles}")
+    return Chem.MolToSmiles(mol)
+
+
+def render_png(smiles: str, size=(300, 300)) -> bytes:
+    """
+        Render a SMILES string to PNG bytes, bypassing the cache.
+    """
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None:
+        raise ValueError(f"Invalid SMILES: {smiles}")
+
+    img = Draw.MolToImage(mol, size=size)
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+def render_svg(smiles: str, size=(300, 300)) -> bytes:
+    """
+        Render a SMILES string to SVG bytes, bypassing the cache.
+    """
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None:
+        raise ValueError(f"Invalid SMILES: {smiles}")
+
+    drawer = rdMolDraw2D.MolDraw2DSVG(size[0], size[1])
+    rdMolDraw2D.PrepareAndDrawMolecule(drawer, mol)
+    drawer.FinishDrawing()
+    return drawer.GetDrawingText().encode()
+
+
+RENDERERS = {"png": render_png, "svg": render_svg}
+
+
+def render_batch(smiles_list: List[str], size=(300, 300), fmt: str = "png") -> List[Optional[bytes]]:
+    """
+        Render many SMILES in one call, None for any that fail.
+        Runs inside compute pool workers, so it must stay a module-level function.
+    """
+    renderer = RENDERERS[fmt]
+    rendered = []
+    for smiles in smiles_list:
+        try:
+            rendered.append(renderer(smiles, size))
+        except Exception:
+            rendered.append(None)
+    return rendered
+
+
+def render_grid(
+    smiles_list: List[str],
+    mols_per_row: int = 5,
+    sub_size=(200, 200),
+    fmt: str = "png",
+    legends: Optional[List[str]] = None,
+    layout: str = "grid",
+) -> bytes:
+    """
+        Render a batch into one image in a single drawing pass.
+        "grid" goes through MolsToGridImage (legends allowed); "sprite" draws
+        bare panels with one multi-panel drawer so every cell is an exact tile.
+        Invalid SMILES leave an empty cell. Runs inside compute pool workers.
+    """
+    mols = []
+    for smiles in smiles_list:
+        mol = Chem.MolFromSmiles(smiles)
+        mols.append(mol if mol is not None else Chem.Mol())
+
+    if layout == "grid":
+        image = Draw.MolsToGridImage(
+            mols, molsPerRow=mols_per_row, subImgSize=tuple(sub_size),
+            legends=legends, useSVG=fmt == "svg", returnPNG=True,
+        )
+        return image.encode() if isinstance(image, str) else image
+
+    columns, rows = grid_shape(len(mols), mols_per_row)
+    width, height = columns * sub_size[0], rows * sub_size[1]
+    if fmt == "svg":
+        drawer = rdMolDraw2D.MolDraw2DSVG(width, height, sub_size[0], sub_size[1])
+    else:
+        drawer = rdMolDraw2D.MolDraw2DCairo(width, height, sub_size[0], sub_size[1])
+    drawer.DrawMolecules(mols)
+    drawer.FinishDrawing()
+    data = drawer.GetDrawingText()
+    return data.encode() if isinstance(data, str) else data
+
+
+def grid_shape(count: int, mols_per_row: int) -> Tuple[int, int]:
+    """(columns, rows) of the panel layout; matches MolsToGridImage, which always fills full rows"""
+    return mols_per_row, max(1, math.ceil(count / mols_per_row))
+
+
+def _cached_depiction(key: str, canonical: str, size, fmt: str) -> bytes:
+    data = depiction_cache.get(key, fmt)
+    if data is None:
+        data = RENDERERS[fmt](canonical, size)
+        depiction_cache.put(key, fmt, data)
+    return data
+
+
+def smiles_to_depiction(smiles: str, size=(300, 300), fmt: str = "png") -> bytes:
+    """
+        Return depiction bytes for a SMILES string, served from the depiction cache when possible.
+    """
+    if fmt not in RENDERERS:
+        raise ValueError(f"Unsupported depiction format: {fmt}")
+    canonical = canonicalize_smiles(smiles)
+    return _cached_depiction(depiction_key(canonical, size), canonical, size, fmt)
+
+
+def smiles_to_png(smiles: str, size=(300, 300)) -> bytes:
+    """
+        Return PNG bytes for a SMILES string, served from the depiction cache when possible.
+    """
+    return smiles_to_depiction(smiles, size, "png")
+
+
+def smiles_to_image_url(smiles: str, size=(300, 300), fmt: str = "png") -> str:
+    """
+        Mint a content-addressed URL for a depiction without rendering it.
+        The image is rendered lazily the first time the URL is fetched.
+        The URL carries its own source, so any worker can render it, even
+        one that never saw this call or has since evicted the source.
+    """
+    canonical = canonicalize_smiles(smiles)
+    key = depiction_key(canonical, size)
+    depiction_cache.register_source(key, canonical, size)
+    return f"/molecule_image/{key}.{fmt}?smiles={quote(canonical, safe='')}&size={size[0]}x{size[1]}"
+
+
+def parse_size(size: str) -> Tuple[int, int]:
+    """
+        Parse a "300x300" size parameter. Raises ValueError if it is malformed
+        or either edge is outside MIN_DEPICTION_SIZE..MAX_DEPICTION_SIZE.
+    """
+    width, _, height = size.partition("x")
+    try:
+        parsed = int(width), int(height)
+    except ValueError:
+        raise ValueError(f"Malformed size: {size}") from None
+    if not all(MIN_DEPICTION_SIZE <= edge <= MAX_DEPICTION_SIZE for edge in parsed):
+        raise ValueError(f"Size must be between {MIN_DEPICTION_SIZE} and {MAX_DEPICTION_SIZE} px per edge")
+    return parsed
+
+
+async def depiction_by_key(
+    key: str,
+    fmt: str = "png",
+    smiles: Optional[str] = None,
+    size: Optional[Tuple[int, int]] = None,
+) -> Optional[bytes]:
+    """
+        Resolve a depiction from its content key, rendering it if only the source is known.
+        smiles and size come from the URL; they are used only if they hash to key
+        and smiles is already canonical, the form smiles_to_image_url mints.
+        Raises ValueError for a SMILES RDKit cannot parse.
+    """
+    if fmt not in RENDERERS:
+        return None
+    data = depiction_cache.get(key, fmt)
+    if data is not None:
+        return data
+    source = depiction_cache.source(key)
+    if (
+        source is None and smiles is not None and size is not None
+        and depiction_key(smiles, size) == key and canonicalize_smiles(smiles) == smiles
+    ):
+        source = (smiles, size)
+    if source is None:
+        return None
+    canonical, size = source
+    data = await compute_pool.run_in_pool(RENDERERS[fmt], canonical, size)
+    depiction_cache.put(key, fmt, data)
+    return data
+
+
+async def prerender_depictions(smiles_list: List[str], size=(300, 300), fmt: str = "png") -> List[Optional[bytes]]:
+    """
+        Return depictions for a batch of SMILES in input order, None for invalid ones.
+        Cache hits are answered in-process; misses are rendered once each,
+        fanned out across the compute pool.
+    """
+    keys: List[Optional[str]] = []
+    to_render = {}
+    results: List[Optional[bytes]] = []
+    for smiles in smiles_list:
+        try:
+            canonical = canonicalize_smiles(smiles)
+        except ValueError:
+            keys.append(None)
+            results.append(None)
+            continue
+        key = depiction_key(canonical, size)
+        keys.append(key)
+        data = depiction_cache.get(key, fmt) if key not in to_render else None
+        if data is None:
+            to_render[key] = canonical
+        results.append(data)
+
+    if to_render:
+        pending = list(to_render.items())
+        rendered = await compute_pool.map_batches(
+            render_batch, [canonical for _, canonical in pending], size, fmt
+        )
+        fresh = {}
+        for (key, _), data in zip(pending, rendered):
+            if data is not None:
+                depiction_cache.put(key, fmt, data)
+                fresh[key] = data
+        results = [
+            data if data is not None or key is None else fresh.get(key)
+            for key, data in zip(keys, results)
+        ]
+    return results
+
+
+async def smiles_to_base64_images(smiles_list: List[str], size=(300, 300)) -> List[Optional[str]]:
+    """
+        Batch counterpart of smiles_to_base64_image; None marks SMILES that failed to render.
+    """
+    rendered = await prerender_depictions(smiles_list, size, "png")
+    return [base64.b64encode(data).decode() if data is not None else None for data in rendered]
+
 
 def smiles_to_base64_image(smiles: str, size=(300, 300)) -> str:
     """
         Convert SMILES string to base64 encoded PNG image.
     """
     try:
-        mol = Chem.MolFromSmiles(smiles)
-        if mol is None:
-            raise ValueError(f"Invalid SMILES: {smiles}")
-        
-        img = Draw.MolToImage(mol, size=size)
-        
-        # Convert to base64
-        buffered = BytesIO()
-        img.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode()
-        
-        return img_str
-        
+        return base64.b64encode(smiles_to_png(smiles, size)).decode()
+
     except Exception as e:
                 raise ValueError(f"Error generating image: {e}")
+
+
+async def warm_depiction_cache(smiles_list: Iterable[str], size=(300, 300)) -> int:
+    """
+        Pre-render depictions so the first requests are served from cache.
+        Returns the number of structures that rendered successfully.
+    """
+    rendered = await prerender_depictions(list(smiles_list), size, "png")
+    return sum(1 for data in rendered if data is not None)
+
+
+async def depict_batch(
+    smiles_list: List[str],
+    layout: str = "grid",
+    fmt: str = "png",
+    mols_per_row: int = 5,
+    sub_size=(200, 200),
+    legends: Optional[List[str]] = None,
+) -> Dict:
+    """
+        One grid image or sprite sheet for a batch of SMILES, plus the pixel
+        rectangle of every input so clients can crop or position sprites.
+        Identical batches are answered from the depiction cache.
+    """
+    if fmt not in RENDERERS:
+        raise ValueError(f"Unsupported depiction format: {fmt}")
+    if legends is not None and len(legends) != len(smiles_list):
+        raise ValueError("legends must have one entry per SMILES")
+    if layout == "sprite":
+        legends = None
+
+    # Canonical forms make the key independent of how each SMILES was written
+    canonical = []
+    valid = []
+    for smiles in smiles_list:
+        try:
+            canonical.append(canonicalize_smiles(smiles))
+            valid.append(True)
+        except ValueError:
+            canonical.append(smiles)
+            valid.append(False)
+    # Structured, so no split between SMILES and legends can collide with another batch
+    payload = json.dumps({
+        "layout": layout,
+        "per_row": mols_per_row,
+        "size": list(sub_size),
+        "smiles": canonical,
+        "legends": legends,
+    })
+    # Prefixed so grid keys never share a namespace with single depictions
+    key = f"grid:{hashlib.sha256(payload.encode()).hexdigest()[:32]}"
+
+    data = depiction_cache.get(key, fmt)
+    if data is None:
+        data = await compute_pool.run_in_pool(
+            render_grid, canonical, mols_per_row, tuple(sub_size), fmt, legends, layout
+        )
+        depiction_cache.put(key, fmt, data)
+
+    columns, rows = grid_shape(len(smiles_list), mols_per_row)
+    cells = [
+        {
+            "index": idx,
+            "smiles": smiles,
+            "x": (idx % mols_per_row) * sub_size[0],
+            "y": (idx // mols_per_row) * sub_size[1],
+            "width": sub_size[0],
+            "height": sub_size[1],
+            "valid": valid[idx],
+        }
+        for idx, smiles in enumerate(smiles_list)
+    ]
+    return {
+        "image": base64.b64encode(data).decode() if fmt == "png" else data.decode(),
+        "media_type": DEPICTION_MEDIA_TYPES[fmt],
+        "layout": layout,
+        "width": columns * sub_size[0],
+        "height": rows * sub_size[1],
+        "cells": cells,
+    }
@@ -0,0 +1,137 @@
+import bisect
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers cached lookups (sub-millisecond) through cold batch depiction
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram with a single label"""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        # label value -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[str, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        for label_value, counts, total, count in sorted(snapshot):
+            labels = f'{self.label}="{label_value}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+route_latency = Histogram(
+    "aushadhi_request_duration_seconds", "Request latency by route template.", "route"
+)
+stage_latency = Histogram(
+    "aushadhi_stage_duration_seconds", "Latency of request-path stages (lookup, remote, parse, depict, serialize).", "stage"
+)
+
+
+@contextmanager
+def _timed(stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_latency.observe(stage, time.perf_counter() - started)
+
+
+_DISABLED = nullcontext()
+
+
+def stage_timer(stage: str):
+    """Time a block into the per-stage histogram; a shared no-op when metrics are off"""
+    return _timed(stage) if settings.metrics_enabled else _DISABLED
+
+
+def should_sample() -> bool:
+    """Decide once per request whether its debug events are logged"""
+    rate = settings.debug_sample_rate
+    return rate > 0 and random.random() < rate
+
+
+def debug_event(event: str, **fields) -> None:
+    """One structured (JSON) debug line; callers gate it on should_sample()"""
+    logger.info(json.dumps({"event": event, **fields}, default=str))
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency per route template, so
+    /molecule_image/{filename} is one series rather than one per image.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.metrics_enabled:
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # FastAPI stores the matched route in the scope while routing
+            route = scope.get("route")
+            route_latency.observe(getattr(route, "path", "unmatched"), time.perf_counter() - started)
+
+
+def _counter_lines(name: str, help_text: str, metric_type: str, label: str, values: Dict[str, float]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    lines.extend(f'{name}{{{label}="{key}"}} {value}' for key, value in sorted(values.items()))
+    return lines
+
+
+def render_metrics(response_caches: Dict[str, Dict], depiction_stats: Dict) -> str:
+    """Prometheus text exposition of latency histograms and cache counters"""
+    lines = route_latency.render() + stage_latency.render()
+    for field, metric_type in (
+        ("hits", "counter"), ("misses", "counter"), ("coalesced", "counter"),
+        ("evictions", "counter"), ("entries", "gauge"),
+    ):
+        suffix = "_total" if metric_type == "counter" else ""
+        lines += _counter_lines(
+            f"aushadhi_response_cache_{field}{suffix}", f"Response cache {field} by route.", metric_type, "route",
+            {route: stats[field] for route, stats in response_caches.items()},
+        )
+    for field in ("hits", "disk_hits", "misses", "evictions"):
+        lines += [
+            f"# TYPE aushadhi_depiction_cache_{field}_total counter",
+            f"aushadhi_depiction_cache_{field}_total {depiction_stats[field]}",
+        ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,51 @@
+import importlib
+import sys
+import threading
+from types import ModuleType
+from typing import Callable, Dict, Optional
+
+# Heavy dependencies whose import state /ready reports
+TRACKED_MODULES = ("rdkit.Chem", "numpy", "pandas")
+
+_lock = threading.RLock()
+
+
+class LazyModule(ModuleType):
+    """
+    Stand-in bound in place of a module; the real import happens on first
+    attribute access, after which its namespace is copied in so later
+    lookups are ordinary module attribute hits.
+    """
+
+    def __init__(self, name: str, on_load: Optional[Callable[[ModuleType], None]] = None):
+        super().__init__(name)
+        self._lazy_on_load = on_load
+
+    def __getattr__(self, attr: str):
+        with _lock:
+            module = importlib.import_module(self.__name__)
+            if self.__dict__.get("_lazy_on_load") is not None:
+                on_load, self._lazy_on_load = self._lazy_on_load, None
+                on_load(module)
+            self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_module(name: str, on_load: Optional[Callable[[ModuleType], None]] = None) -> ModuleType:
+    """`np = lazy_module("numpy")` instead of `import numpy as np`; on_load runs once, right after the import"""
+    module = sys.modules.get(name)
+    if module is not None:
+        if on_load is not None:
+            on_load(module)
+        return module
+    return LazyModule(name, on_load)
+
+
+def silence_rdkit_log(_module: ModuleType = None) -> None:
+    """on_load hook: invalid SMILES are reported by the caller, not on RDKit's stderr"""
+    from rdkit import RDLogger
+    RDLogger.DisableLog("rdApp.*")
+
+
+def imported_modules() -> Dict[str, bool]:
+    return {name: name in sys.modules for name in TRACKED_MODULES}
@@ -0,0 +1,114 @@
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Iterable, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MaterializedView(NamedTuple):
+    body: bytes
+    version: str
+    etag: str
+    built_at: float
+
+
+def normalize_key(key: str) -> str:
+    """Same folding the response cache applies to identifier fields"""
+    return " ".join(key.split()).upper()
+
+
+class MaterializedViews:
+    """
+    Finished response bodies for a fixed set of hot keys, built ahead of any
+    request. Each key has a data version; a background loop polls it and
+    rebuilds the key's bodies only when the version changes, swapping the new
+    ones in whole so readers never see a partial refresh.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        build: Callable[[str, str], Awaitable[bytes]],
+        version: Callable[[str], str],
+        variants: Sequence[str],
+    ):
+        self.name = name
+        self._build = build
+        self._version = version
+        self.variants = tuple(variants)
+        self.keys: Tuple[str, ...] = ()
+        self._views: Dict[Tuple[str, str], MaterializedView] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+        self.failures = 0
+
+    def get(self, key: str, variant: str) -> Optional[MaterializedView]:
+        view = self._views.get((normalize_key(key), variant))
+        if view is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return view
+
+    async def _refresh_key(self, key: str) -> bool:
+        # Versions may come from a database query; keep it off the event loop
+        version = await asyncio.to_thread(self._version, key)
+        if all(
+            (view := self._views.get((key, variant))) is not None and view.version == version
+            for variant in self.variants
+        ):
+            return False
+        built = {}
+        for variant in self.variants:
+            body = await self._build(key, variant)
+            etag = hashlib.sha256(f"{version}:{variant}".encode() + body).hexdigest()[:32]
+            built[(key, variant)] = MaterializedView(body, version, f'"{etag}"', time.time())
+        self._views.update(built)
+        self.builds += 1
+        logger.info(f"Materialized {self.name} for {key} at version {version}")
+        return True
+
+    async def refresh(self) -> int:
+        """Rebuild every key whose data version moved; returns how many were rebuilt"""
+        rebuilt = 0
+        for key in self.keys:
+            try:
+                rebuilt += await self._refresh_key(key)
+            except Exception as e:
+                # Keep serving the previous bodies; the next poll retries
+                self.failures += 1
+                logger.error(f"Materializing {self.name} for {key} failed: {e}")
+        return rebuilt
+
+    async def _poll(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.refresh()
+
+    async def start(self, keys: Iterable[str], interval: float) -> None:
+        self.keys = tuple(dict.fromkeys(normalize_key(key) for key in keys if key.strip()))
+        await self.refresh()
+        if interval > 0 and self.keys:
+            self._task = asyncio.create_task(self._poll(interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            "keys": list(self.keys),
+            "views": len(self._views),
+            "versions": {key: view.version for (key, _), view in sorted(self._views.items())},
+            "bytes": sum(len(view.body) for view in self._views.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "builds": self.builds,
+            "failures": self.failures,
+        }
@@ -0,0 +1,45 @@
+from functools import lru_cache
+from typing import List, Optional
+
+from app.utils.lazy_imports import lazy_module
+
+Chem = lazy_module("rdkit.Chem")
+DataStructs = lazy_module("rdkit.DataStructs")
+AllChem = lazy_module("rdkit.Chem.AllChem")
+Descriptors = lazy_module("rdkit.Chem.Descriptors")
+
+
+@lru_cache(maxsize=16384)
+def molecular_weight(smiles: str) -> Optional[float]:
+    """
+        Average molecular weight of a SMILES string, None if it does not parse.
+    """
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None:
+        return None
+    return Descriptors.MolWt(mol)
+
+
+@lru_cache(maxsize=16384)
+def morgan_fingerprint(smiles: str, radius: int = 2, n_bits: int = 2048):
+    """
+        ECFP4-style Morgan bit vector, None if the SMILES does not parse.
+    """
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None:
+        return None
+    return AllChem.GetMorganFingerprintAsBitVect(mol, radius, nBits=n_bits)
+
+
+def tanimoto_to_reference(smiles_list: List[str], reference_smiles: str) -> List[Optional[float]]:
+    """
+        Tanimoto similarity of each SMILES to a reference structure.
+    """
+    reference = morgan_fingerprint(reference_smiles)
+    if reference is None:
+        raise ValueError(f"Invalid reference SMILES: {reference_smiles}")
+
+    fingerprints = [morgan_fingerprint(smiles) for smiles in smiles_list]
+    valid = [fp for fp in fingerprints if fp is not None]
+    scores = iter(DataStructs.BulkTanimotoSimilarity(reference, valid))
+    return [next(scores) if fp is not None else None for fp in fingerprints]
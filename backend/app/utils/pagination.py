@@ -0,0 +1,53 @@
+import base64
+import heapq
+import json
+import math
+from typing import Callable, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+def encode_cursor(query_id: str, state: dict) -> str:
+    """Opaque cursor carrying paging state, bound to the query that produced it"""
+    payload = json.dumps({"q": query_id, **state}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, query_id: str) -> dict:
+    """Decode a cursor, raising ValueError if it is malformed or from another query"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(state, dict) or state.pop("q", None) != query_id:
+        raise ValueError("Cursor does not belong to this query")
+    return state
+
+
+def sort_value(value: Optional[float], descending: bool) -> float:
+    """Sort key that puts missing values last in either direction"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return -math.inf if descending else math.inf
+    return value
+
+
+def top_k_page(
+    items: Sequence[T],
+    key: Callable[[T], float],
+    descending: bool,
+    offset: int,
+    limit: int,
+) -> List[T]:
+    """
+    Return items[offset:offset + limit] of the stably sorted sequence.
+
+    Only the first offset + limit entries are ever ordered (a bounded heap),
+    so asking for page one of a few thousand candidates stays cheap.
+    """
+    k = offset + limit
+    if descending:
+        ranked = heapq.nlargest(k, enumerate(items), key=lambda pair: (key(pair[1]), -pair[0]))
+    else:
+        ranked = heapq.nsmallest(k, enumerate(items), key=lambda pair: (key(pair[1]), pair[0]))
+    return [item for _, item in ranked[offset:]]
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """
+    Warm-up steps run as background tasks during the app lifespan, so the
+    server accepts connections (and /health answers) while indexes load.
+    Each step reports pending -> loading -> ready | failed for /ready.
+    """
+
+    def __init__(self):
+        self._components: Dict[str, Dict] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def start(self, name: str, factory: Callable[[], Awaitable], after: Sequence[str] = ()) -> asyncio.Task:
+        """Run factory() in the background once the steps named in `after` have finished"""
+        self._components[name] = {"state": "pending", "seconds": None, "error": None}
+        prerequisites = [self._tasks[step] for step in after]
+        task = asyncio.create_task(self._run(name, factory, prerequisites))
+        self._tasks[name] = task
+        return task
+
+    async def _run(self, name: str, factory: Callable[[], Awaitable], prerequisites: Sequence[asyncio.Task]) -> None:
+        # A failed prerequisite shows up in its own entry; later steps still try
+        await asyncio.gather(*prerequisites, return_exceptions=True)
+        component = self._components[name]
+        component["state"] = "loading"
+        started = time.perf_counter()
+        try:
+            await factory()
+        except Exception as e:
+            component.update(state="failed", error=str(e))
+            logger.error(f"Warm-up step {name} failed: {e}")
+        else:
+            component["state"] = "ready"
+            logger.info(f"Warm-up step {name} ready in {time.perf_counter() - started:.2f}s")
+        finally:
+            component["seconds"] = round(time.perf_counter() - started, 3)
+
+    @property
+    def ready(self) -> bool:
+        return all(component["state"] == "ready" for component in self._components.values())
+
+    def status(self) -> Dict[str, Dict]:
+        return {name: dict(component) for name, component in self._components.items()}
+
+    async def wait(self) -> None:
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def stop(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        await self.wait()
+        self._tasks.clear()
+
+
+readiness = Readiness()
@@ -0,0 +1,161 @@
+import asyncio
+import functools
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from pydantic import BaseModel
+
+from app.config import settings
+
+
+def _normalize(value: Any, case_insensitive: Tuple[str, ...], field: str = "") -> Any:
+    if isinstance(value, BaseModel):
+        value = value.model_dump()
+    if isinstance(value, dict):
+        return {key: _normalize(item, case_insensitive, key) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item, case_insensitive, field) for item in value]
+    if isinstance(value, str):
+        value = " ".join(value.split())
+        return value.upper() if field in case_insensitive else value
+    return value
+
+
+def request_key(route: str, body: Any, case_insensitive: Iterable[str] = ()) -> str:
+    """
+        Stable key for a request body: whitespace collapsed, identifier fields
+        case-folded and keys sorted, so equivalent requests share one entry.
+    """
+    normalized = _normalize(body, tuple(case_insensitive))
+    payload = json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+    return f"{route}:{hashlib.sha256(payload.encode()).hexdigest()[:32]}"
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache of endpoint results with singleflight: concurrent misses
+    for the same key await one shared computation instead of each running it.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def _lookup(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _store(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for key, or compute it once. Errors are not
+        cached; they propagate to every request waiting on that computation.
+        """
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return await compute()
+
+        found, value = self._lookup(key)
+        if found:
+            self.hits += 1
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            # Shielded so one client disconnecting does not cancel the others' result
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        task = asyncio.ensure_future(compute())
+        self._inflight[key] = task
+
+        def _finished(done: asyncio.Future) -> None:
+            self._inflight.pop(key, None)
+            if not done.cancelled() and done.exception() is None:
+                self._store(key, done.result())
+
+        task.add_done_callback(_finished)
+        return await asyncio.shield(task)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        requests = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "in_flight": len(self._inflight),
+            # Coalesced requests were served without their own computation too
+            "hit_rate": (self.hits + self.coalesced) / requests if requests else 0.0,
+        }
+
+
+# Route name -> cache, so all of them can be reported together
+response_caches: Dict[str, ResponseCache] = {}
+
+
+def cached_response(
+    route: str,
+    case_insensitive: Iterable[str] = (),
+    version: Optional[Callable[..., Awaitable[Optional[str]]]] = None,
+):
+    """
+        Cache an endpoint's result keyed on its normalized arguments.
+        functools.wraps keeps the signature FastAPI inspects for the request body.
+        version, called with the endpoint's arguments, returns the version of
+        the data they read; it is part of the key, so a result is not served
+        once that data has changed. None leaves that request uncached.
+    """
+    cache = response_caches.setdefault(
+        route, ResponseCache(settings.response_cache_size, settings.response_cache_ttl)
+    )
+
+    def decorator(endpoint: Callable[..., Awaitable[Any]]):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            body = {"args": list(args), "kwargs": kwargs}
+            if version is not None:
+                body["version"] = await version(*args, **kwargs)
+                if body["version"] is None:
+                    return await endpoint(*args, **kwargs)
+            key = request_key(route, body, case_insensitive)
+            return await cache.get_or_compute(key, lambda: endpoint(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+def response_cache_stats() -> Dict[str, Dict]:
+    return {route: cache.stats() for route, cache in response_caches.items()}
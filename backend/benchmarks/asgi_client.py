@@ -0,0 +1,82 @@
+import asyncio
+import json
+from typing import Dict, List, Optional, Tuple
+
+
+class ASGIResponse:
+    """Status, headers and body of one in-process request"""
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+async def asgi_request(
+    app,
+    method: str,
+    path: str,
+    body: bytes = b"",
+    headers: Optional[Dict[str, str]] = None,
+) -> ASGIResponse:
+    """
+    Drive one HTTP request through an ASGI app without a server or socket,
+    so benchmarks measure the application rather than the network stack.
+    """
+    path, _, query = path.partition("?")
+    raw_headers: List[Tuple[bytes, bytes]] = [(b"host", b"bench")]
+    for name, value in (headers or {}).items():
+        raw_headers.append((name.lower().encode(), value.encode()))
+    if body:
+        raw_headers.append((b"content-length", str(len(body)).encode()))
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+
+    body_sent = False
+    never = asyncio.Event()
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Block like a client that stays connected; streaming responses watch for disconnects
+        await never.wait()
+        return {"type": "http.disconnect"}
+
+    status = 0
+    response_headers: Dict[str, str] = {}
+    chunks: List[bytes] = []
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            for name, value in message.get("headers", []):
+                response_headers[name.decode().lower()] = value.decode()
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return ASGIResponse(status, response_headers, b"".join(chunks))
+
+
+async def post_json(app, path: str, payload: dict, headers: Optional[Dict[str, str]] = None) -> ASGIResponse:
+    merged = {"content-type": "application/json", **(headers or {})}
+    return await asgi_request(app, "POST", path, json.dumps(payload).encode(), merged)
@@ -0,0 +1,34 @@
+from typing import Dict, List
+
+# Metric -> True when a larger value is better
+COMPARED_METRICS = {"throughput_rps": True, "p50_ms": False, "p99_ms": False}
+
+
+def compare_reports(current: Dict, baseline: Dict, tolerance_pct: float) -> List[Dict]:
+    """
+    Every metric of every benchmark present in both reports, with its change
+    against the baseline. A change worse than tolerance_pct is a regression.
+    Reports are {section: {benchmark: {metric: value}}}.
+    """
+    comparisons = []
+    for section, benchmarks in current.items():
+        if not isinstance(benchmarks, dict) or not isinstance(baseline.get(section), dict):
+            continue
+        for name, stats in benchmarks.items():
+            previous = baseline[section].get(name)
+            if not isinstance(stats, dict) or not isinstance(previous, dict):
+                continue
+            for metric, higher_is_better in COMPARED_METRICS.items():
+                if not previous.get(metric) or metric not in stats:
+                    continue
+                change = 100 * (stats[metric] / previous[metric] - 1)
+                worse_by = -change if higher_is_better else change
+                comparisons.append({
+                    "benchmark": f"{section}.{name}",
+                    "metric": metric,
+                    "baseline": previous[metric],
+                    "current": stats[metric],
+                    "change_pct": round(change, 2),
+                    "regression": worse_by > tolerance_pct,
+                })
+    return comparisons
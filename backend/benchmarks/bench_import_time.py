@@ -0,0 +1,96 @@
+"""
+Cold import time of the API module, from `python -X importtime`.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_import_time --runs 5 --json import_time.json
+
+Each run imports the module in a fresh interpreter; the report takes the
+median per module across runs. It lists the slowest imports and whether any
+of the heavy scientific stack (RDKit, pandas, numpy) was loaded, which should
+not happen until the first request that needs it. With --baseline, the run
+fails when the total grows by more than --max-regression percent.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+HEAVY_MODULES = ("rdkit", "rdkit.Chem", "pandas", "numpy")
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """module -> (self µs, cumulative µs) from `-X importtime` output"""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = [part.strip() for part in line[len("import time:"):].split("|")]
+        if len(fields) != 3 or not fields[0].isdigit():
+            continue  # the header row
+        timings[fields[2]] = (int(fields[0]), int(fields[1]))
+    return timings
+
+
+def import_once(module: str) -> Dict[str, Tuple[int, int]]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+    return parse_importtime(completed.stderr)
+
+
+def bench(module: str, runs: int, top: int) -> Dict:
+    samples = [import_once(module) for _ in range(runs)]
+    names = set.intersection(*(set(sample) for sample in samples))
+    cumulative = {name: statistics.median(sample[name][1] for sample in samples) for name in names}
+    self_time = {name: statistics.median(sample[name][0] for sample in samples) for name in names}
+    slowest: List[Tuple[str, float]] = sorted(self_time.items(), key=lambda item: -item[1])[:top]
+    return {
+        "module": module,
+        "runs": runs,
+        "total_ms": cumulative.get(module, 0) / 1000,
+        "modules_imported": len(names),
+        "heavy_modules_loaded": {name: name in names for name in HEAVY_MODULES},
+        "slowest_self_ms": [{"module": name, "ms": value / 1000} for name, value in slowest],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    parser.add_argument("--baseline", help="report from an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="allowed growth of total_ms, in percent")
+    args = parser.parse_args()
+
+    # Warm the bytecode cache so the runs measure imports rather than compilation
+    import_once(args.module)
+    report = bench(args.module, args.runs, args.top)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        change = 100 * (report["total_ms"] / baseline["total_ms"] - 1) if baseline["total_ms"] else 0.0
+        report["baseline_total_ms"] = baseline["total_ms"]
+        report["change_pct"] = change
+        report["regression"] = change > args.max_regression
+        status = 1 if report["regression"] else 0
+
+    print(json.dumps(report, indent=2))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
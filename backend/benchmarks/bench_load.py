@@ -0,0 +1,125 @@
+"""
+In-process load generator for the four discovery routes, driven through the
+ASGI app without a server or sockets.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_load --concurrency 16 --requests 200 --workers 4
+
+Each route is loaded on its own, cycling through a fixed set of payloads, after
+one untimed warm-up request per payload. --no-response-cache makes every
+request do the full work instead of hitting the per-route response cache.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+from app.main import app
+from app.utils import compute_pool
+from app.utils.response_cache import response_caches
+from benchmarks.asgi_client import post_json
+from benchmarks.stats import summarize_latencies
+
+DISEASES = ["Lung cancer", "Breast cancer", "Melanoma", "Colorectal cancer", "Glioblastoma"]
+TARGETS = ["TP53", "EGFR", "VEGFR2", "HER2", "BRAF"]
+SMILES = [
+    "CC(=O)Oc1ccccc1C(=O)O",
+    "COc1cc2ncnc(Nc3ccc(F)c(Cl)c3)c2cc1OCCCN4CCOCC4",
+    "CC(C)Cc1ccc(cc1)C(C)C(=O)O",
+    "Cc1cc(nc(n1)Nc2ccc(cc2)S(=O)(=O)NC)c3cccc(F)c3",
+    "CN1C=NC2=C1C(=O)N(C(=O)N2C)C",
+]
+
+# Route name -> (path, payloads cycled through by the load)
+ROUTES: Dict[str, Tuple[str, List[dict]]] = {
+    "find_protien": ("/find_protien/", [{"disease": disease} for disease in DISEASES]),
+    "fetch_chambl_data": ("/fetch_chambl_data/", [{"pdb_id_input": target} for target in TARGETS]),
+    "alternate_molecule_generator": (
+        "/alternate_molecule_generator/",
+        [{"disease": disease, "target_id": target, "random_seed": 0} for disease, target in zip(DISEASES, TARGETS)],
+    ),
+    "find_data_evaluation_report": ("/find_data_evaluation_report/", [{"smiles": smiles} for smiles in SMILES]),
+}
+
+
+async def load_route(path: str, payloads: Sequence[dict], concurrency: int, total_requests: int) -> Dict:
+    """Throughput and latency percentiles of total_requests requests, at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = Counter()
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await post_json(app, path, payloads[i % len(payloads)])
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status] += 1
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total_requests)))
+    summary = summarize_latencies(latencies, time.perf_counter() - wall_start)
+    summary["errors"] = sum(count for status, count in statuses.items() if status >= 400)
+    summary["statuses"] = {str(status): count for status, count in sorted(statuses.items())}
+    return summary
+
+
+async def run(
+    routes: Sequence[str] = tuple(ROUTES),
+    concurrency: int = 16,
+    total_requests: int = 200,
+    workers: int = 2,
+    response_cache: bool = True,
+) -> Dict[str, Dict]:
+    if not response_cache:
+        for cache in response_caches.values():
+            cache.max_entries = 0
+    compute_pool.start_compute_pool(workers)
+    report = {}
+    try:
+        for name in routes:
+            path, payloads = ROUTES[name]
+            # Lazy imports, index loads and pool start-up stay out of the measurement
+            for payload in payloads:
+                await post_json(app, path, payload)
+            report[name] = {
+                "concurrency": concurrency,
+                **await load_route(path, payloads, concurrency, total_requests),
+            }
+    finally:
+        compute_pool.shutdown_compute_pool()
+    return report
+
+
+def print_report(report: Dict[str, Dict]) -> None:
+    for name, stats in report.items():
+        print(
+            f"{name:>28}: {stats['throughput_rps']:8.1f} req/s  "
+            f"p50 {stats['p50_ms']:8.1f} ms  p99 {stats['p99_ms']:8.1f} ms  errors {stats['errors']}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--routes", nargs="+", choices=list(ROUTES), default=list(ROUTES))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--no-response-cache", action="store_true")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(
+        args.routes, args.concurrency, args.requests, args.workers, not args.no_response_cache
+    ))
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
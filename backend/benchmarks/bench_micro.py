@@ -0,0 +1,112 @@
+"""
+Per-operation cost of the request-path building blocks: SMILES parsing and
+canonicalization, depiction, descriptor computation and response
+serialization.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_micro --repeat 20 --json micro.json
+
+Every operation runs inline (no compute pool, no depiction cache) over the
+built-in compound set, so the numbers isolate RDKit, pandas and pydantic.
+"""
+import argparse
+import base64
+import json
+import time
+from typing import Callable, Dict, List, Sequence
+
+from app.api.routes.chembl import _serialize
+from app.services.chembl_service import MOLECULE_DATABASE
+from app.utils.canonical import canonicalize_batch
+from app.utils.descriptors import build_descriptor_table, compute_descriptor_rows
+from app.utils.image_gen import render_png
+from app.utils.lazy_imports import lazy_module
+from benchmarks.stats import summarize_latencies
+
+Chem = lazy_module("rdkit.Chem")
+
+BENCHMARKS = ("parse", "canonicalize", "depict", "descriptors", "descriptor_table", "serialize")
+
+
+def corpus() -> List[str]:
+    return sorted({mol["smiles"] for mols in MOLECULE_DATABASE.values() for mol in mols})
+
+
+def response_rows(smiles_list: Sequence[str], rows: int) -> List[dict]:
+    """A /fetch_chambl_data/ result list with inline images of realistic size"""
+    image = base64.b64encode(render_png(smiles_list[0])).decode()
+    return [
+        {
+            "molecule": smiles_list[i % len(smiles_list)],
+            "canonical_smiles": smiles_list[i % len(smiles_list)],
+            "ic50": 0.05 + i / 1000,
+            "disease_name": "Cancer",
+            "disease_pid": "TP53",
+            "disease_protien_name": "Cellular tumor antigen p53",
+            "molecule_image": image,
+            "molecular_weight": 300.0 + i,
+            "inchikey": "A" * 27,
+            "measurement_count": 1,
+        }
+        for i in range(rows)
+    ]
+
+
+def time_each(fn: Callable, items: Sequence, repeat: int) -> Dict:
+    """Latency of fn(item) for every item, over `repeat` passes"""
+    latencies = []
+    wall_start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            start = time.perf_counter()
+            fn(item)
+            latencies.append(time.perf_counter() - start)
+    return summarize_latencies(latencies, time.perf_counter() - wall_start)
+
+
+def run(names: Sequence[str] = BENCHMARKS, repeat: int = 20, serialize_rows: int = 100) -> Dict[str, Dict]:
+    smiles_list = corpus()
+    cases = {
+        "parse": lambda: time_each(Chem.MolFromSmiles, smiles_list, repeat),
+        "canonicalize": lambda: time_each(lambda smiles: canonicalize_batch([smiles]), smiles_list, repeat),
+        "depict": lambda: time_each(render_png, smiles_list, max(1, repeat // 4)),
+        "descriptors": lambda: time_each(lambda smiles: compute_descriptor_rows([smiles]), smiles_list, repeat),
+        # Whole-batch table build and rule filters, one operation per batch
+        "descriptor_table": lambda: time_each(
+            lambda batch: build_descriptor_table(batch, compute_descriptor_rows(batch)), [smiles_list], repeat
+        ),
+        "serialize": lambda: time_each(_serialize, [response_rows(smiles_list, serialize_rows)], repeat),
+    }
+    # One untimed pass pays for lazy imports and first-call setup
+    Chem.MolFromSmiles(smiles_list[0])
+    render_png(smiles_list[0])
+    build_descriptor_table(smiles_list[:1], compute_descriptor_rows(smiles_list[:1]))
+    return {name: {"items": len(smiles_list), **cases[name]()} for name in names}
+
+
+def print_report(report: Dict[str, Dict]) -> None:
+    for name, stats in report.items():
+        print(
+            f"{name:>18}: {stats['throughput_rps']:10.1f} ops/s  "
+            f"p50 {stats['p50_ms']:8.3f} ms  p99 {stats['p99_ms']:8.3f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--benchmarks", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--serialize-rows", type=int, default=100)
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = run(args.benchmarks, args.repeat, args.serialize_rows)
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Latency of /fetch_chambl_data/ under concurrent load, with RDKit rendering
+inline on the event loop versus fanned out to the compute pool.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_render_pool --concurrency 16 --requests 200 --workers 4
+
+--cold disables the depiction cache so every request pays for rendering,
+which is the case the process pool exists for. The per-route response cache
+is always off: both modes post the same targets, so otherwise the second
+mode would only measure cache hits.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from app.main import app
+from app.utils import compute_pool
+from app.utils.image_gen import depiction_cache
+from app.utils.response_cache import response_caches
+from benchmarks.asgi_client import post_json
+from benchmarks.stats import summarize_latencies
+
+TARGETS = ["TP53", "EGFR", "VEGFR2", "HER2", "BRAF"]
+
+
+async def _run_load(concurrency: int, total_requests: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await post_json(app, "/fetch_chambl_data/", {"pdb_id_input": TARGETS[i % len(TARGETS)]})
+            latencies.append(time.perf_counter() - start)
+            if response.status != 200:
+                raise RuntimeError(f"Request failed with {response.status}: {response.body[:200]!r}")
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total_requests)))
+    return summarize_latencies(latencies, time.perf_counter() - wall_start)
+
+
+async def _bench_mode(workers: int, args) -> dict:
+    for cache in response_caches.values():
+        cache.clear()
+        cache.max_entries = 0
+    compute_pool.start_compute_pool(workers)
+    try:
+        # Pay worker start-up and RDKit import once, outside the measurement
+        await _run_load(1, 1)
+        return await _run_load(args.concurrency, args.requests)
+    finally:
+        compute_pool.shutdown_compute_pool()
+
+
+async def main(args) -> dict:
+    if args.cold:
+        depiction_cache.max_entries = 0
+        depiction_cache.disk_dir = ""
+
+    report = {"concurrency": args.concurrency, "cold_cache": args.cold, "modes": {}}
+    report["modes"]["inline"] = await _bench_mode(0, args)
+    report["modes"][f"pool_{args.workers}"] = await _bench_mode(args.workers, args)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--cold", action="store_true", help="disable the depiction cache")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    for mode, stats in report["modes"].items():
+        print(
+            f"{mode:>10}: {stats['throughput_rps']:8.1f} req/s  "
+            f"p50 {stats['p50_ms']:8.1f} ms  p99 {stats['p99_ms']:8.1f} ms"
+        )
+    if args.json_path:
+        with open(args.json_path, "w") as fh:
+            json.dump(report, fh, indent=2)
@@ -0,0 +1,76 @@
+"""
+Queries/sec of SimilarityIndex top-k Tanimoto search on synthetic fingerprints.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_similarity --sizes 100000 1000000 --queries 200
+
+Fingerprints are random with ECFP4-like density (~45 of 2048 bits set), so
+no RDKit work is involved and the numbers isolate the scan itself. Each size
+is measured with no threshold (full scan) and with a threshold, where the
+bit-count prescreen skips rows that cannot qualify.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.services.similarity_index import FP_BITS, SimilarityIndex
+
+
+def synthetic_index(size: int, bits_set: int, rng: np.random.Generator) -> SimilarityIndex:
+    counts = np.clip(rng.poisson(bits_set, size), 1, FP_BITS)
+    bits = np.zeros((size, FP_BITS), dtype=np.uint8)
+    for row, count in enumerate(counts):
+        bits[row, rng.choice(FP_BITS, count, replace=False)] = 1
+    packed = np.packbits(bits, axis=1, bitorder="little")
+    compounds = [{"smiles": f"C{row}"} for row in range(size)]
+    return SimilarityIndex.from_packed([row.tobytes() for row in packed], compounds)
+
+
+def bench(index: SimilarityIndex, queries: np.ndarray, k: int, threshold: float) -> dict:
+    screened = 0
+    start = time.perf_counter()
+    for query in queries:
+        screened += index.search_words(query, k, threshold)["screened"]
+    elapsed = time.perf_counter() - start
+    return {
+        "threshold": threshold,
+        "queries_per_sec": len(queries) / elapsed,
+        "mean_ms": 1000 * elapsed / len(queries),
+        "screened_fraction": screened / (len(queries) * len(index)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--bits-set", type=int, default=45)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    report = []
+    for size in args.sizes:
+        index = synthetic_index(size, args.bits_set, rng)
+        queries = index.fingerprints[rng.choice(size, args.queries, replace=False)].copy()
+        for threshold in (0.0, args.threshold):
+            result = {"size": size, **bench(index, queries, args.k, threshold)}
+            report.append(result)
+            print(
+                f"{size:>9} compounds  threshold {threshold:.2f}: "
+                f"{result['queries_per_sec']:8.1f} q/s  {result['mean_ms']:7.2f} ms/query  "
+                f"screened {100 * result['screened_fraction']:5.1f}%"
+            )
+    if args.json_path:
+        with open(args.json_path, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
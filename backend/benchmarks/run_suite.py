@@ -0,0 +1,90 @@
+"""
+Micro-benchmarks plus route load in one run, compared against a stored baseline.
+
+Run from the backend directory:
+
+    python -m benchmarks.run_suite --json suite.json
+    python -m benchmarks.run_suite --save-baseline    # after a change that should become the new reference
+
+The baseline lives in benchmarks/baselines/suite.json. Only compare numbers
+taken on the same machine with the same flags. The run exits with status 1
+when throughput drops, or p50/p99 latency grows, by more than --tolerance
+percent on any benchmark.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+
+from benchmarks import bench_load, bench_micro
+from benchmarks.baseline import compare_reports
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "suite.json")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="micro-benchmark passes")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--no-response-cache", action="store_true")
+    parser.add_argument("--skip-load", action="store_true", help="micro-benchmarks only")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=15.0, help="allowed regression, in percent")
+    parser.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "response_cache": not args.no_response_cache,
+        },
+    }
+    report["micro"] = bench_micro.run(repeat=args.repeat)
+    bench_micro.print_report(report["micro"])
+    if not args.skip_load:
+        report["load"] = asyncio.run(bench_load.run(
+            concurrency=args.concurrency,
+            total_requests=args.requests,
+            workers=args.workers,
+            response_cache=not args.no_response_cache,
+        ))
+        bench_load.print_report(report["load"])
+
+    status = 0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        report["comparison"] = compare_reports(report, baseline, args.tolerance)
+        regressions = [row for row in report["comparison"] if row["regression"]]
+        for row in regressions:
+            print(
+                f"REGRESSION {row['benchmark']} {row['metric']}: "
+                f"{row['baseline']:.3f} -> {row['current']:.3f} ({row['change_pct']:+.1f}%)"
+            )
+        print(f"{len(regressions)} regressions against {args.baseline}")
+        status = 1 if regressions else 0
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    if args.json_path:
+        with open(args.json_path, "w") as fh:
+            json.dump(report, fh, indent=2)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
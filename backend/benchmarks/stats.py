@@ -0,0 +1,24 @@
+import math
+from typing import Dict, List
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize_latencies(latencies_s: List[float], wall_time_s: float) -> Dict:
+    """Throughput and latency percentiles (in milliseconds) for one run"""
+    ordered = sorted(latencies_s)
+    return {
+        "requests": len(ordered),
+        "throughput_rps": len(ordered) / wall_time_s if wall_time_s else 0.0,
+        "mean_ms": 1000 * sum(ordered) / len(ordered) if ordered else 0.0,
+        "p50_ms": 1000 * percentile(ordered, 50),
+        "p90_ms": 1000 * percentile(ordered, 90),
+        "p99_ms": 1000 * percentile(ordered, 99),
+        "max_ms": 1000 * ordered[-1] if ordered else 0.0,
+    }
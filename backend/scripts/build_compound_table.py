@@ -0,0 +1,93 @@
+"""
+Write every activity in the store into one memory-mappable columnar file.
+
+Run from the backend directory, then point COMPOUND_TABLE_PATH at the output:
+
+    python -m scripts.build_compound_table --out data/compounds.table --workers 8
+
+Without a store (or with --builtin) the table holds the built-in compounds.
+--descriptors also precomputes the descriptor columns (molecular weight, logP,
+TPSA, ...) across the compute pool, so sorting by them needs no RDKit work.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.services.compound_store import CompoundStore, Target, TargetStructure
+from app.services.compound_table import CompoundTable, builtin_rows
+from app.utils import compute_pool
+from app.utils.descriptors import compute_descriptor_rows
+
+logger = logging.getLogger("build_compound_table")
+
+
+def store_rows(store: CompoundStore) -> Tuple[Dict[str, List[dict]], Dict[str, str], Dict[str, str]]:
+    """Activities per target, with each target's name and its gene symbol, UniProt and PDB aliases"""
+    with store.Session() as session:
+        targets = session.execute(select(Target)).scalars().all()
+        structures = session.execute(select(TargetStructure)).scalars().all()
+    rows = {}
+    for target in targets:
+        count = store.count_actives(target.target_chembl_id)
+        if count:
+            rows[target.target_chembl_id] = store.top_actives(target.target_chembl_id, count)
+    pref_names = {target.target_chembl_id: target.pref_name for target in targets}
+    aliases = {}
+    for target in targets:
+        for alias in (target.gene_symbol, target.uniprot_accession):
+            if alias:
+                aliases[alias] = target.target_chembl_id
+    for structure in structures:
+        aliases.setdefault(structure.pdb_id, structure.target_chembl_id)
+    return rows, pref_names, aliases
+
+
+async def build(args) -> int:
+    rows = {}
+    if args.database_url and not args.builtin:
+        store = CompoundStore(args.database_url)
+        store.create_schema()
+        rows, pref_names, aliases = store_rows(store)
+    if not rows:
+        rows, pref_names, aliases = builtin_rows()
+
+    descriptors = None
+    if args.descriptors:
+        smiles_list = sorted({row["smiles"] for target_rows in rows.values() for row in target_rows})
+        compute_pool.start_compute_pool(args.workers)
+        try:
+            computed = await compute_pool.map_batches(compute_descriptor_rows, smiles_list, min_batch=256)
+        finally:
+            compute_pool.shutdown_compute_pool()
+        descriptors = {smiles: row for smiles, row in zip(smiles_list, computed) if row is not None}
+
+    table = CompoundTable.from_rows(rows, pref_names, aliases, descriptors)
+    table.save(args.out)
+    logger.info(
+        f"Wrote {len(table)} activities for {len(table.targets)} targets to {args.out} "
+        f"({table.memory_bytes() / 1e6:.1f} MB)"
+    )
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=settings.compound_table_path or "data/compounds.table")
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--builtin", action="store_true", help="table of the built-in compounds only")
+    parser.add_argument("--descriptors", action="store_true", help="precompute descriptor columns")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    return asyncio.run(build(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+"""
+Build the serialized disease-target index from an association TSV.
+
+The TSV needs a header with these columns (synonyms and pathways are
+"|"-separated; target_id is what /fetch_chambl_data/ is queried with):
+
+    disease_id  disease_name  synonyms  target_symbol  target_name  target_id  score  pathways
+
+Run from the backend directory, then point DISEASE_INDEX_PATH at the output:
+
+    python -m scripts.build_disease_index associations.tsv --out data/disease_index.json.gz
+"""
+import argparse
+import logging
+import sys
+
+from app.config import settings
+from app.services.disease_index import DiseaseTargetIndex
+
+logger = logging.getLogger("build_disease_index")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("tsv", nargs="?", default=settings.disease_associations_tsv or None,
+                        help="association TSV; the built-in associations are used when omitted")
+    parser.add_argument("--out", default=settings.disease_index_path or "data/disease_index.json.gz")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    index = DiseaseTargetIndex.from_tsv(args.tsv) if args.tsv else DiseaseTargetIndex.builtin()
+    index.save(args.out)
+    logger.info(f"Indexed {len(index)} diseases ({len(index.names)} names) into {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Precompute the fingerprint similarity and substructure screening indexes for
+every compound in the store.
+
+Run from the backend directory, then point SIMILARITY_INDEX_DIR at the output:
+
+    python -m scripts.build_similarity_index --out data/similarity_index --workers 8
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from typing import List
+
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.services.compound_store import Activity, CompoundStore
+from app.services.similarity_index import build_similarity_index, builtin_compounds
+from app.services.substructure_search import build_substructure_index
+from app.utils import compute_pool
+
+logger = logging.getLogger("build_similarity_index")
+
+
+def store_compounds(store: CompoundStore) -> List[dict]:
+    """One row per distinct structure: name, IC50 and target all from its most potent activity"""
+    potency_rank = func.row_number().over(
+        partition_by=Activity.canonical_smiles, order_by=(Activity.ic50_nm, Activity.id)
+    ).label("potency_rank")
+    ranked = select(
+        Activity.canonical_smiles,
+        func.coalesce(Activity.name, Activity.molecule_chembl_id).label("name"),
+        Activity.ic50_nm,
+        Activity.target_chembl_id,
+        potency_rank,
+    ).subquery()
+    query = (
+        select(ranked.c.canonical_smiles, ranked.c.name, ranked.c.ic50_nm, ranked.c.target_chembl_id)
+        .where(ranked.c.potency_rank == 1)
+        .order_by(ranked.c.canonical_smiles)
+    )
+    with store.Session() as session:
+        return [
+            {"smiles": smiles, "name": name, "ic50": ic50_nm / 1000.0, "target": target}
+            for smiles, name, ic50_nm, target in session.execute(query)
+        ]
+
+
+async def build(args) -> int:
+    compounds = builtin_compounds()
+    if args.database_url:
+        store = CompoundStore(args.database_url)
+        store.create_schema()
+        compounds = store_compounds(store) or compounds
+
+    compute_pool.start_compute_pool(args.workers)
+    try:
+        index = await build_similarity_index(compounds)
+        # Row-aligned with the similarity index so both share compounds.json
+        patterns = await build_substructure_index(index.compounds)
+    finally:
+        compute_pool.shutdown_compute_pool()
+
+    index.save(args.out)
+    patterns.save(args.out)
+    logger.info(f"Indexed {len(index)}/{len(compounds)} compounds into {args.out}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=settings.similarity_index_dir or "data/similarity_index")
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    return asyncio.run(build(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+Local stand-in for the ChEMBL web services, for exercising the web API
+fallback (app/services/chembl_client.py) without network access.
+
+Run from the backend directory and point CHEMBL_API_URL at it:
+
+    python -m scripts.chembl_stub_server --port 8765 --activities 2500
+    CHEMBL_API_URL=http://127.0.0.1:8765/chembl/api/data uvicorn app.main:app
+
+It serves target/search.json, target/{id}.json, target.json (by UniProt
+accession) and paginated activity.json for a few synthetic targets, or for
+those in a --fixture JSON file ({"targets": [{"target_chembl_id", "pref_name",
+"gene_symbol", "accession", "activities": [...]}]}). Responses carry ETags and
+honour If-None-Match. --latency and --fail-rate add delay and random 503s so
+the client's pooling, retries and cache can be observed; every request is logged.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import random
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+PREFIX = "/chembl/api/data"
+SYNTHETIC_TARGETS = (
+    ("CHEMBL2189121", "GTPase KRas", "KRAS", "P01116"),
+    ("CHEMBL4247", "ALK tyrosine kinase receptor", "ALK", "Q9UM73"),
+    ("CHEMBL2835", "Tyrosine-protein kinase JAK1", "JAK1", "P23458"),
+)
+
+logger = logging.getLogger("chembl_stub_server")
+
+
+def synthetic_activities(target_chembl_id: str, count: int, seed: int) -> List[Dict]:
+    """count IC50 records (nM) on distinct, valid SMILES built from two alkyl chains"""
+    rng = random.Random(f"{seed}:{target_chembl_id}")
+    records = []
+    for index in range(count):
+        head, tail = index % 25, index // 25
+        records.append({
+            "molecule_chembl_id": f"CHEMBL{900000 + index}",
+            "molecule_pref_name": None,
+            "canonical_smiles": f"{'C' * (head + 1)}Nc1ccc(cc1){'C' * (tail + 1)}O",
+            "standard_value": f"{10 ** rng.uniform(0, 4):.2f}",
+            "standard_units": "nM",
+            "standard_relation": "=",
+            "standard_type": "IC50",
+        })
+    return records
+
+
+def target_record(target: Dict) -> Dict:
+    return {
+        "target_chembl_id": target["target_chembl_id"],
+        "pref_name": target["pref_name"],
+        "target_type": "SINGLE PROTEIN",
+        "organism": "Homo sapiens",
+        "target_components": [{
+            "accession": target["accession"],
+            "target_component_synonyms": [{"component_synonym": target["gene_symbol"], "syn_type": "GENE_SYMBOL"}],
+        }],
+    }
+
+
+def page(records: List[Dict], key: str, query: Dict[str, str]) -> Dict:
+    limit = min(int(query.get("limit", 20)), 1000)
+    offset = int(query.get("offset", 0))
+    only = [field for field in query.get("only", "").split(",") if field]
+    selected = records[offset:offset + limit]
+    if only:
+        selected = [{field: record.get(field) for field in only} for record in selected]
+    return {
+        key: selected,
+        "page_meta": {"limit": limit, "offset": offset, "total_count": len(records)},
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    targets: List[Dict] = []
+    latency = 0.0
+    fail_rate = 0.0
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} {format % args}")
+
+    def _send_json(self, status: int, body: Dict) -> None:
+        data = json.dumps(body, sort_keys=True).encode()
+        etag = f'"{hashlib.sha256(data).hexdigest()[:16]}"'
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self, path: str, query: Dict[str, str]):
+        if path == "target/search.json":
+            term = query.get("q", "").upper()
+            matches = [
+                target_record(target) for target in self.targets
+                if term and (term == target["gene_symbol"].upper() or term in target["pref_name"].upper())
+            ]
+            return 200, page(matches, "targets", query)
+        if path == "target.json":
+            accession = query.get("target_components__accession", "").upper()
+            matches = [target_record(target) for target in self.targets if target["accession"] == accession]
+            return 200, page(matches, "targets", query)
+        if path.startswith("target/") and path.endswith(".json"):
+            chembl_id = path[len("target/"):-len(".json")].upper()
+            for target in self.targets:
+                if target["target_chembl_id"] == chembl_id:
+                    return 200, target_record(target)
+            return 404, {"error_message": f"No target {chembl_id}"}
+        if path == "activity.json":
+            records = [
+                record
+                for target in self.targets if target["target_chembl_id"] == query.get("target_chembl_id")
+                for record in target["activities"]
+                if record.get("standard_type", "IC50") == query.get("standard_type", "IC50")
+            ]
+            return 200, page(records, "activities", query)
+        return 404, {"error_message": f"Unknown resource {path}"}
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_rate and random.random() < self.fail_rate:
+            self._send_json(503, {"error_message": "Injected failure"})
+            return
+        if not url.path.startswith(PREFIX + "/"):
+            self._send_json(404, {"error_message": "Not found"})
+            return
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        status, body = self._route(url.path[len(PREFIX) + 1:], query)
+        self._send_json(status, body)
+
+
+def load_targets(args) -> List[Dict]:
+    if args.fixture:
+        with open(args.fixture) as fh:
+            return json.load(fh)["targets"]
+    return [
+        {
+            "target_chembl_id": chembl_id,
+            "pref_name": pref_name,
+            "gene_symbol": gene_symbol,
+            "accession": accession,
+            "activities": synthetic_activities(chembl_id, args.activities, args.seed),
+        }
+        for chembl_id, pref_name, gene_symbol, accession in SYNTHETIC_TARGETS
+    ]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixture", help="JSON file of targets and their activities")
+    parser.add_argument("--activities", type=int, default=2500, help="activities per synthetic target")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    StubHandler.targets = load_targets(args)
+    StubHandler.latency = args.latency
+    StubHandler.fail_rate = args.fail_rate
+    # HTTP/1.1 so clients can keep connections alive between requests
+    StubHandler.protocol_version = "HTTP/1.1"
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    logger.info(f"Serving {len(StubHandler.targets)} targets at http://{args.host}:{args.port}{PREFIX}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
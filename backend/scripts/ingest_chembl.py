@@ -0,0 +1,323 @@
+"""
+Load ChEMBL IC50 activities into the local compound store.
+
+Run from the backend directory with DATABASE_URL pointing at the store:
+
+    # CSV/TSV activity export (ChEMBL web export or snake_case columns)
+    python -m scripts.ingest_chembl activities.csv
+
+    # Full ChEMBL SQLite release
+    python -m scripts.ingest_chembl chembl_34.db
+
+    # PDB -> UniProt mappings (SIFTS pdb_chain_uniprot.csv) so PDB IDs resolve
+    python -m scripts.ingest_chembl activities.csv --pdb-map pdb_chain_uniprot.csv
+
+    # Just the built-in demo compounds
+    python -m scripts.ingest_chembl --builtin
+
+Every structure is canonicalized (RDKit canonical SMILES + InChIKey) across
+--workers processes. Repeated measurements of one compound against one target
+are collapsed into a single activity carrying the median IC50, the geometric
+mean and the measurement count. Measurements are keyed by target, compound
+and assay, so ingesting the same data again updates it instead of adding to it.
+"""
+import argparse
+import asyncio
+import csv
+import logging
+import os
+import sqlite3
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import delete, select
+
+from app.config import settings
+from app.services.chembl_service import MOLECULE_DATABASE, PROTEIN_NAMES
+from app.services.compound_store import (
+    Activity,
+    CompoundStore,
+    Measurement,
+    Target,
+    TargetStructure,
+)
+from app.utils import compute_pool
+from app.utils.canonical import canonicalize
+
+logger = logging.getLogger("ingest_chembl")
+
+BATCH_SIZE = 5000
+
+# Multipliers that bring a concentration to nM
+UNIT_TO_NM = {"pm": 1e-3, "nm": 1.0, "um": 1e3, "µm": 1e3, "μm": 1e3, "mm": 1e6, "m": 1e9}
+
+# Export column names -> the names used below
+COLUMN_ALIASES = {
+    "smiles": "canonical_smiles",
+    "molecule_name": "pref_name",
+    "target_name": "target_pref_name",
+    "uniprot_accessions": "uniprot_accession",
+}
+
+# ChEMBL identifiers for the targets in MOLECULE_DATABASE
+BUILTIN_TARGETS = {
+    "TP53": {"target_chembl_id": "CHEMBL4096", "uniprot_accession": "P04637", "pdb_ids": ["1TUP"]},
+    "EGFR": {"target_chembl_id": "CHEMBL203", "uniprot_accession": "P00533", "pdb_ids": []},
+    "VEGFR2": {"target_chembl_id": "CHEMBL279", "uniprot_accession": "P35968", "pdb_ids": []},
+    "HER2": {"target_chembl_id": "CHEMBL1824", "uniprot_accession": "P04626", "pdb_ids": []},
+    "BRAF": {"target_chembl_id": "CHEMBL5145", "uniprot_accession": "P15056", "pdb_ids": []},
+}
+
+SQLITE_ACTIVITY_QUERY = """
+SELECT md.chembl_id AS molecule_chembl_id,
+       md.pref_name AS pref_name,
+       cs.canonical_smiles AS canonical_smiles,
+       act.standard_value AS standard_value,
+       act.standard_units AS standard_units,
+       act.standard_relation AS standard_relation,
+       a.chembl_id AS assay_chembl_id,
+       td.chembl_id AS target_chembl_id,
+       td.pref_name AS target_pref_name,
+       csq.accession AS uniprot_accession,
+       (SELECT syn.component_synonym FROM component_synonyms syn
+         WHERE syn.component_id = tc.component_id AND syn.syn_type = 'GENE_SYMBOL'
+         LIMIT 1) AS gene_symbol
+FROM activities act
+JOIN assays a ON act.assay_id = a.assay_id
+JOIN target_dictionary td ON a.tid = td.tid
+JOIN molecule_dictionary md ON act.molregno = md.molregno
+JOIN compound_structures cs ON act.molregno = cs.molregno
+LEFT JOIN target_components tc ON td.tid = tc.tid
+LEFT JOIN component_sequences csq ON tc.component_id = csq.component_id
+WHERE act.standard_type = 'IC50'
+  AND td.target_type = 'SINGLE PROTEIN'
+  AND act.standard_value IS NOT NULL
+"""
+
+
+def _normalize_header(name: str) -> str:
+    key = name.strip().strip('"').lower().replace(" ", "_")
+    return COLUMN_ALIASES.get(key, key)
+
+
+def read_csv_activities(path: str) -> Iterator[Dict]:
+    with open(path, newline="", encoding="utf-8") as fh:
+        sample = fh.read(4096)
+        fh.seek(0)
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        reader = csv.reader(fh, dialect)
+        header = [_normalize_header(name) for name in next(reader)]
+        for row in reader:
+            yield dict(zip(header, row))
+
+
+def read_sqlite_activities(path: str) -> Iterator[Dict]:
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    try:
+        for row in conn.execute(SQLITE_ACTIVITY_QUERY):
+            yield dict(row)
+    finally:
+        conn.close()
+
+
+def normalize_ic50_nm(value, units, relation) -> Optional[float]:
+    """IC50 in nM for exact, positive measurements; None for anything else"""
+    if relation not in (None, "", "=", "'='"):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    factor = UNIT_TO_NM.get((units or "nM").strip().lower())
+    if factor is None or number <= 0:
+        return None
+    return number * factor
+
+
+async def _store_batch(store: CompoundStore, session, batch: List[Dict]) -> int:
+    """Canonicalize a batch in parallel and store its compounds and raw measurements"""
+    identities = await canonicalize([record["smiles"] for record in batch])
+    compounds: Dict[str, Dict] = {}
+    measurements = []
+    for record, identity in zip(batch, identities):
+        if identity is None:
+            continue
+        canonical_smiles, inchikey = identity
+        compounds.setdefault(inchikey, {
+            "inchikey": inchikey,
+            "canonical_smiles": canonical_smiles,
+            "name": record["name"],
+            "molecule_chembl_id": record["molecule_chembl_id"],
+        })
+        measurements.append({
+            "target_chembl_id": record["target_chembl_id"],
+            "inchikey": inchikey,
+            "assay_chembl_id": record["assay_chembl_id"],
+            "ic50_nm": record["ic50_nm"],
+        })
+    store.insert_compounds(session, compounds.values())
+    return store.upsert_measurements(session, measurements)
+
+
+async def ingest_activities(store: CompoundStore, records: Iterable[Dict]) -> int:
+    """
+    Store measurements in canonicalized batches, register every target seen,
+    then rebuild the deduplicated activities of those targets.
+    Returns the number of measurements stored.
+    """
+    targets: Dict[str, Dict] = {}
+    batch: List[Dict] = []
+    inserted = 0
+
+    with store.Session() as session:
+        for record in records:
+            if record.get("standard_type") not in (None, "", "IC50"):
+                continue
+            ic50_nm = normalize_ic50_nm(
+                record.get("standard_value"), record.get("standard_units"), record.get("standard_relation")
+            )
+            smiles = (record.get("canonical_smiles") or "").strip()
+            target_id = (record.get("target_chembl_id") or "").strip().upper()
+            if ic50_nm is None or not smiles or not target_id:
+                continue
+
+            targets.setdefault(target_id, {
+                "target_chembl_id": target_id,
+                "gene_symbol": (record.get("gene_symbol") or "").upper() or None,
+                "pref_name": record.get("target_pref_name") or None,
+                # Exports list complexes as "P1|P2"; keep the first accession
+                "uniprot_accession": (record.get("uniprot_accession") or "").split("|")[0].upper() or None,
+            })
+            batch.append({
+                "target_chembl_id": target_id,
+                "molecule_chembl_id": record.get("molecule_chembl_id") or None,
+                "name": record.get("pref_name") or None,
+                "smiles": smiles,
+                "assay_chembl_id": (record.get("assay_chembl_id") or "").strip().upper(),
+                "ic50_nm": ic50_nm,
+            })
+            if len(batch) >= BATCH_SIZE:
+                inserted += await _store_batch(store, session, batch)
+                batch = []
+
+        if batch:
+            inserted += await _store_batch(store, session, batch)
+        _upsert_targets(session, targets.values())
+        session.commit()
+
+    activities = store.rebuild_activities(targets)
+    logger.info(f"{inserted} measurements collapsed into {activities} compound activities")
+    return inserted
+
+
+def _upsert_targets(session, targets: Iterable[Dict]) -> None:
+    for target in targets:
+        existing = session.get(Target, target["target_chembl_id"])
+        if existing is None:
+            session.add(Target(**target))
+            continue
+        for field, value in target.items():
+            if value and not getattr(existing, field):
+                setattr(existing, field, value)
+
+
+def ingest_pdb_map(store: CompoundStore, path: str) -> int:
+    """Link PDB IDs to stored targets through their UniProt accession (SIFTS layout)"""
+    with store.Session() as session:
+        by_accession = {
+            accession: target_id
+            for target_id, accession in session.execute(
+                select(Target.target_chembl_id, Target.uniprot_accession)
+            )
+            if accession
+        }
+        links = set()
+        with open(path, newline="", encoding="utf-8") as fh:
+            # SIFTS files start with a "# ..." banner line
+            lines = (line for line in fh if not line.startswith("#"))
+            for row in csv.DictReader(lines):
+                target_id = by_accession.get((row.get("SP_PRIMARY") or "").upper())
+                if target_id:
+                    links.add(((row.get("PDB") or "").upper(), target_id))
+
+        for pdb_id, target_id in links:
+            session.merge(TargetStructure(pdb_id=pdb_id, target_chembl_id=target_id))
+        session.commit()
+    return len(links)
+
+
+async def ingest_builtin(store: CompoundStore) -> int:
+    """Load MOLECULE_DATABASE so the store alone can answer for the demo targets"""
+    records = []
+    with store.Session() as session:
+        for symbol, ids in BUILTIN_TARGETS.items():
+            target_id = ids["target_chembl_id"]
+            session.execute(delete(Activity).where(Activity.target_chembl_id == target_id))
+            session.execute(delete(Measurement).where(Measurement.target_chembl_id == target_id))
+            session.merge(Target(
+                target_chembl_id=target_id,
+                gene_symbol=symbol,
+                pref_name=PROTEIN_NAMES.get(symbol),
+                uniprot_accession=ids["uniprot_accession"],
+            ))
+            for pdb_id in ids["pdb_ids"]:
+                session.merge(TargetStructure(pdb_id=pdb_id, target_chembl_id=target_id))
+            for mol in MOLECULE_DATABASE[symbol]:
+                records.append({
+                    "canonical_smiles": mol["smiles"],
+                    "pref_name": mol["name"],
+                    "standard_value": mol["ic50"],
+                    "standard_units": "uM",
+                    "target_chembl_id": target_id,
+                })
+        session.commit()
+    return await ingest_activities(store, records)
+
+
+async def ingest(store: CompoundStore, args) -> None:
+    if args.builtin:
+        logger.info(f"Loaded {await ingest_builtin(store)} built-in activities")
+    if args.source:
+        is_sqlite = args.source.endswith((".db", ".sqlite", ".sqlite3"))
+        records = read_sqlite_activities(args.source) if is_sqlite else read_csv_activities(args.source)
+        logger.info(f"Loaded {await ingest_activities(store, records)} activities from {args.source}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", nargs="?", help="activities CSV/TSV or ChEMBL SQLite release")
+    parser.add_argument("--pdb-map", help="SIFTS pdb_chain_uniprot.csv")
+    parser.add_argument("--builtin", action="store_true", help="also load MOLECULE_DATABASE")
+    parser.add_argument("--replace", action="store_true", help="drop existing activities first")
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes used to canonicalize structures")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    if not args.database_url:
+        parser.error("set DATABASE_URL or pass --database-url")
+    if not (args.source or args.builtin or args.pdb_map):
+        parser.error("nothing to ingest")
+
+    store = CompoundStore(args.database_url)
+    store.create_schema()
+
+    if args.replace:
+        with store.Session() as session:
+            session.execute(delete(Activity))
+            session.execute(delete(Measurement))
+            session.commit()
+    compute_pool.start_compute_pool(args.workers)
+    try:
+        asyncio.run(ingest(store, args))
+    finally:
+        compute_pool.shutdown_compute_pool()
+    if args.pdb_map:
+        logger.info(f"Linked {ingest_pdb_map(store, args.pdb_map)} PDB entries to targets")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
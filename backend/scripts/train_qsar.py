@@ -0,0 +1,75 @@
+"""
+Train and save the per-target QSAR models, so the API loads them instead of
+training on first request.
+
+Run from the backend directory, then point QSAR_MODEL_DIR at the output:
+
+    python -m scripts.train_qsar --out data/qsar_models --workers 8
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from typing import List
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.services.chembl_service import MOLECULE_DATABASE, chembl_service
+from app.services.compound_store import Target, get_compound_store
+from app.services.qsar import train_model
+from app.utils import compute_pool
+
+logger = logging.getLogger("train_qsar")
+
+
+def all_targets() -> List[str]:
+    """Every target in the store, else the builtin dataset's targets"""
+    store = get_compound_store()
+    if store is not None:
+        with store.Session() as session:
+            targets = list(session.execute(select(Target.target_chembl_id)).scalars())
+        if targets:
+            return targets
+    return list(MOLECULE_DATABASE)
+
+
+async def train(args) -> int:
+    targets = args.targets or all_targets()
+    compute_pool.start_compute_pool(args.workers)
+    trained = 0
+    try:
+        for target in targets:
+            key = chembl_service.target_key(target)
+            model = await train_model(key, chembl_service.known_actives(key, settings.max_sort_candidates))
+            if model is None:
+                logger.info(f"Skipped {key}: too few measured actives, or the fit failed held-out validation")
+                continue
+            model.save(args.out)
+            trained += 1
+            logger.info(
+                f"{key}: n={model.metadata['n_train']} "
+                f"rmse={model.metadata['train_rmse']:.3f} r2={model.metadata['train_r2']:.3f} "
+                f"holdout_r2={model.metadata['holdout_r2']:.3f}"
+            )
+    finally:
+        compute_pool.shutdown_compute_pool()
+
+    logger.info(f"Trained {trained}/{len(targets)} models into {args.out}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=settings.qsar_model_dir or "data/qsar_models")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("targets", nargs="*", help="Targets to train (default: all)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    return asyncio.run(train(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+from app.services.compound_store import CompoundStore
+
+
+def _ingest(store: CompoundStore, target_id: str, values_nm: dict) -> None:
+    """Store one measurement per compound for a target, then rebuild its activities"""
+    with store.Session() as session:
+        store.insert_compounds(session, [
+            {"inchikey": inchikey, "canonical_smiles": smiles, "name": None, "molecule_chembl_id": None}
+            for inchikey, (smiles, _) in values_nm.items()
+        ])
+        store.upsert_measurements(session, [
+            {"target_chembl_id": target_id, "inchikey": inchikey, "assay_chembl_id": "", "ic50_nm": ic50_nm}
+            for inchikey, (_, ic50_nm) in values_nm.items()
+        ])
+        session.commit()
+    store.rebuild_activities([target_id])
+
+
+def test_reingesting_the_tail_target_changes_its_snapshot(tmp_path):
+    store = CompoundStore(f"sqlite:///{tmp_path / 'store.db'}")
+    store.create_schema()
+    _ingest(store, "CHEMBL1", {"KEY-A": ("CCO", 100.0), "KEY-B": ("CCN", 200.0)})
+    # Ingested last, so its activities hold the highest row ids
+    _ingest(store, "CHEMBL2", {"KEY-C": ("CCC", 300.0), "KEY-D": ("CCCl", 400.0)})
+    before = store.activity_snapshot("CHEMBL2")
+    other = store.activity_snapshot("CHEMBL1")
+
+    # Same compounds, new value: the rebuilt rows get the freed ids back on SQLite
+    _ingest(store, "CHEMBL2", {"KEY-C": ("CCC", 30.0), "KEY-D": ("CCCl", 400.0)})
+    after = store.activity_snapshot("CHEMBL2")
+
+    assert after[0] == before[0]
+    assert after != before
+    assert store.top_actives("CHEMBL2", 1)[0]["ic50_nm"] == 30.0
+    assert store.activity_snapshot("CHEMBL1") == other
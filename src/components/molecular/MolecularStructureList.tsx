@@ -9,6 +9,7 @@ interface Molecule {
   name: string;
   formula: string;
   ic50Value: number;
+  // data: URI or a /molecule_image/ URL; URLs are fetched lazily and cached by the browser
   structure: string;
   source: string;
   mechanism: string;
@@ -37,6 +38,8 @@ export default function MolecularStructureList({ molecules, onSelect }: Molecula
                 <img 
                   src={molecule.structure} 
                   alt={`Structure of ${molecule.name}`}
+                  loading="lazy"
+                  decoding="async"
                   className="h-40 w-40 object-contain bg-white rounded-lg border border-gray-200"
                 />
                 <div className="absolute inset-0 bg-black bg-opacity-0 group-hover:bg-opacity-30 rounded-lg flex items-center justify-center transition-all opacity-0 group-hover:opacity-100">
@@ -85,3 +85,55 @@ export function showEvaluation(smile: string){
     console.log('[FRONTEND API] showEvaluation() called with SMILES:', smile);
     return authApiClient.post("/find_data_evaluation_report/",{"smiles":smile});
 }
+
+export function startDiscoveryJob(disease: string, targetId?: string) {
+    return authApiClient.post("/jobs", {"kind": "discovery", "disease": disease, "target_id": targetId});
+}
+
+export function getJob(jobId: string) {
+    return authApiClient.get(`/jobs/${jobId}`);
+}
+
+// Server-Sent Events stream of stage progress; EventSource reconnects with Last-Event-ID on its own
+export function subscribeJobEvents(jobId: string) {
+    return new EventSource(`${authApiClient.defaults.baseURL}/jobs/${jobId}/events`);
+}
+
+// One image for a whole page of structures; `cells` gives each molecule's rectangle in it
+export function depictBatch(smiles: string[], layout: "grid" | "sprite" = "sprite", molsPerRow = 10) {
+    return authApiClient.post("/depict_batch/", {"smiles": smiles, "layout": layout, "mols_per_row": molsPerRow});
+}
+
+// One ranked list across several targets, each compound once with its IC50 per target
+export function screenBatch(targetIds: string[], sortBy: "potency" | "selectivity" | "coverage" = "potency", limit = 50, cursor?: string) {
+    return authApiClient.post("/screen_batch/", {"target_ids": targetIds, "sort_by": sortBy, "limit": limit, "cursor": cursor});
+}
+
+// Energy-ranked 3D conformers; SDF text inline, or fetch it later from each result's sdf_url
+export function generateConformers(smiles: string[], numConformers = 10, includeSdf = true) {
+    return authApiClient.post("/conformers/", {"smiles": smiles, "num_conformers": numConformers, "include_sdf": includeSdf});
+}
+
+// Streams hits as NDJSON so rows can be rendered as soon as each one arrives
+export async function streamHits(pdbId: string, onRow: (row: any) => void) {
+    const response = await fetch(`${authApiClient.defaults.baseURL}/fetch_chambl_data/`, {
+        method: "POST",
+        headers: {"Content-Type": "application/json", "Accept": "application/x-ndjson"},
+        body: JSON.stringify({"pdb_id_input": pdbId, "image_mode": "url"}),
+    });
+    if (!response.ok || !response.body) {
+        throw new Error(`Streaming hits failed: ${response.status}`);
+    }
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = "";
+    for (;;) {
+        const { done, value } = await reader.read();
+        buffered += decoder.decode(value ?? new Uint8Array(), { stream: !done });
+        const lines = buffered.split("\n");
+        buffered = lines.pop() ?? "";
+        lines.filter((line) => line.trim()).forEach((line) => onRow(JSON.parse(line)));
+        if (done) break;
+    }
+    if (buffered.trim()) onRow(JSON.parse(buffered));
+}